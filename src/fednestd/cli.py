@@ -1,7 +1,9 @@
 # src/fednestd/cli.py
 from __future__ import annotations
 
+import json
 from pathlib import Path
+from typing import Optional
 
 import typer
 
@@ -14,6 +16,8 @@ from .networking.haproxy_config import render_haproxy_config
 from .networking.vpn import render_vpn_peer_config
 from .federation.client import run_edge_client
 from .federation.server import run_fed_server
+from .federation.simulator import FleetSimulator, build_simulation_config
+from .orchestration.workflows import build_local_executor, federation_cycle
 
 
 app = typer.Typer(no_args_is_help=True, help="fednestd - Federated Nested MoE CLI")
@@ -44,6 +48,58 @@ def tier1_aggregate_experts(
     run_expert_aggregation(cfg)
 
 
+@tier1_app.command("run-cycle")
+def tier1_run_cycle(
+    config: Path = typer.Option(..., "--config", "-c", exists=True, readable=True),
+    input_version: str = typer.Option(
+        ..., "--input-version", help="Data/model version this cycle consumes"
+    ),
+) -> None:
+    cfg = load_config(config)
+    report = build_local_executor(cfg).run(federation_cycle(), cfg, input_version)
+    for timing in report.stages:
+        status = "cached" if timing.cached else f"{timing.seconds:.2f}s"
+        typer.echo(f"{timing.stage}: {status}")
+    typer.echo(f"cycle: {report.seconds:.2f}s")
+
+
+@tier1_app.command("simulate-fleet")
+def tier1_simulate_fleet(
+    config: Optional[Path] = typer.Option(
+        None, "--config", "-c", exists=True, readable=True
+    ),
+    clients: Optional[int] = typer.Option(None, help="Virtual edge clients"),
+    rounds: Optional[int] = typer.Option(None, help="Federation rounds"),
+    processes: Optional[int] = typer.Option(None, help="Client worker processes"),
+    seed: Optional[int] = typer.Option(None, help="Seed for reproducible runs"),
+    output: Optional[Path] = typer.Option(None, "--output", "-o"),
+) -> None:
+    """Load-test the round coordinator with simulated edge clients."""
+    cfg = load_config(config) if config is not None else {}
+    sim_cfg = build_simulation_config(cfg)
+    for key, value in (
+        ("num_clients", clients),
+        ("rounds", rounds),
+        ("processes", processes),
+        ("seed", seed),
+    ):
+        if value is not None:
+            setattr(sim_cfg, key, value)
+    report = FleetSimulator(sim_cfg).run()
+    for r in report.rounds:
+        typer.echo(
+            f"{r.round_id}: {r.accepted}/{r.selected} accepted, "
+            f"{r.wall_s:.2f}s wall, {r.simulated_s:.1f}s simulated"
+        )
+    typer.echo(
+        f"throughput: {report.throughput_updates_per_s:.0f} updates/s, "
+        f"server cpu {100 * report.server_cpu_utilization:.0f}%, "
+        f"peak rss {report.server_peak_rss_mb:.0f} MB"
+    )
+    if output is not None:
+        output.write_text(json.dumps(report.to_dict(), indent=2))
+
+
 @tier1_app.command("run-fed-server")
 def tier1_run_fed_server(
     config: Path = typer.Option(..., "--config", "-c", exists=True, readable=True),
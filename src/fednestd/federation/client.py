@@ -3,6 +3,8 @@ from __future__ import annotations
 
 from typing import Dict, Any
 
+from ..model.checkpointing import build_edge_checkpoint_ring
+
 try:
     from ..observability.logging import get_logger
     logger = get_logger(__name__)
@@ -24,8 +26,22 @@ def run_edge_client(config: Dict[str, Any]) -> None:
     """
     logger.info("Starting edge client with config: %s", config)
 
+    checkpoints = build_edge_checkpoint_ring(config)
+    if checkpoints is not None:
+        logger.info(
+            "Edge checkpoint ring at %s retains versions: %s",
+            checkpoints.root,
+            checkpoints.versions(),
+        )
+
     # TODO: implement the main client loop:
     # - subscribe to control.federation_rounds
     # - on RoundStart: download model, call training.tier2_trainer.run_edge_round(config)
-    # - send deltas via messaging.kafka_client
+    # - after the round: training.tier2_trainer.snapshot_adapters(checkpoints, ...);
+    #   on degraded local metrics: training.tier2_trainer.rollback_adapters(...)
+    # - frame adapter deltas with federation.messages.encode_delta and pass them
+    #   through governance.local_sidecar (build_sidecar) before publishing
+    # - send deltas via messaging.kafka_client; HTTP calls to the FedServer must
+    #   carry networking.haproxy_config.CLIENT_ID_HEADER so HAProxy pins the
+    #   client to one shard
     pass
\ No newline at end of file
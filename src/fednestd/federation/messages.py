@@ -0,0 +1,202 @@
+# src/fednestd/federation/messages.py
+from __future__ import annotations
+
+import json
+import struct
+from typing import Any, BinaryIO, Dict, List, Mapping, Optional, Tuple, TypedDict
+
+import torch
+
+from ..utils.serialization import dtype_from_name, dtype_name
+
+# Delta message wire format (updates.experts.local):
+#
+#   magic "FNDD" | u16 format version | u32 header length | header JSON |
+#   zero padding to ALIGN | tensor bytes (each tensor starts ALIGN-aligned)
+#
+# Leaf aggregators forward kind="partial" messages in the same framing
+# (see training/aggregation.py).
+#
+# Everything a relay or the sidecar needs to validate a message lives in the
+# header, so checks never touch tensor data, and tensors can be used as
+# zero-copy views into the received buffer.
+MAGIC = b"FNDD"
+WIRE_VERSION = 1
+ALIGN = 64
+_PREFIX = struct.Struct("<4sHI")
+
+
+class TensorHeader(TypedDict):
+    name: str
+    dtype: str
+    shape: List[int]
+    offset: int  # relative to the start of the data section
+    nbytes: int
+
+
+class DeltaHeader(TypedDict, total=False):
+    kind: str  # "delta"
+    client_id: str
+    round_id: str
+    model_version: str
+    num_examples: int
+    tensors: List[TensorHeader]
+    meta: Dict[str, Any]
+
+
+class PartialHeader(TypedDict):
+    kind: str  # "partial"
+    leaf_id: str
+    round_id: str
+    sample_count: int
+    client_count: int
+    version_histogram: Dict[str, int]
+    tensors: List[TensorHeader]
+
+
+def _align(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def layout_tensors(
+    specs: List[Tuple[str, torch.dtype, Tuple[int, ...]]],
+) -> Tuple[List[TensorHeader], int]:
+    """Aligned offsets for (name, dtype, shape) specs. Returns (headers, size)."""
+    headers: List[TensorHeader] = []
+    offset = 0
+    for name, dtype, shape in specs:
+        numel = 1
+        for s in shape:
+            numel *= int(s)
+        nbytes = numel * torch.empty((), dtype=dtype).element_size()
+        headers.append(
+            {
+                "name": name,
+                "dtype": dtype_name(dtype),
+                "shape": [int(s) for s in shape],
+                "offset": offset,
+                "nbytes": nbytes,
+            }
+        )
+        offset = _align(offset + nbytes)
+    return headers, offset
+
+
+def _frame_prefix(header: Mapping[str, Any]) -> bytes:
+    head = json.dumps(header, separators=(",", ":")).encode()
+    prefix = _PREFIX.pack(MAGIC, WIRE_VERSION, len(head)) + head
+    return prefix + b"\0" * (_align(len(prefix)) - len(prefix))
+
+
+def encode_message(
+    header: Mapping[str, Any],
+    tensors: Mapping[str, torch.Tensor],
+) -> bytearray:
+    """Frame `header` (without "tensors") plus named tensors into one buffer."""
+    specs = [(n, t.dtype, tuple(t.shape)) for n, t in tensors.items()]
+    layout, data_size = layout_tensors(specs)
+    prefix = _frame_prefix({**header, "tensors": layout})
+    buf = bytearray(len(prefix) + data_size)
+    buf[: len(prefix)] = prefix
+    for entry, tensor in zip(layout, tensors.values()):
+        view = tensor_view(buf, entry, data_start=len(prefix))
+        view.copy_(tensor.detach().reshape(view.shape))
+    return buf
+
+
+def frame_data(
+    header: Mapping[str, Any],
+    layout: List[TensorHeader],
+    data: bytes | bytearray | memoryview,
+) -> bytearray:
+    """Frame an already laid-out data section (e.g. a FlatParams buffer) as-is."""
+    prefix = _frame_prefix({**header, "tensors": layout})
+    buf = bytearray(len(prefix) + len(data))
+    buf[: len(prefix)] = prefix
+    buf[len(prefix) :] = data
+    return buf
+
+
+def encode_delta(
+    tensors: Mapping[str, torch.Tensor],
+    client_id: str,
+    round_id: str,
+    model_version: str,
+    num_examples: int,
+    meta: Optional[Dict[str, Any]] = None,
+) -> bytearray:
+    """Pack named delta tensors into one writable message buffer."""
+    header: Dict[str, Any] = {
+        "kind": "delta",
+        "client_id": client_id,
+        "round_id": round_id,
+        "model_version": model_version,
+        "num_examples": int(num_examples),
+    }
+    if meta:
+        header["meta"] = meta
+    return encode_message(header, tensors)
+
+
+def decode_header(buf: bytes | bytearray | memoryview) -> Tuple[DeltaHeader, int]:
+    """Parse the header only. Returns (header, data_start)."""
+    if len(buf) < _PREFIX.size:
+        raise ValueError("Delta message too short")
+    magic, version, head_len = _PREFIX.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a fednestd delta message (bad magic)")
+    if version != WIRE_VERSION:
+        raise ValueError(f"Unsupported delta wire version: {version}")
+    end = _PREFIX.size + head_len
+    if len(buf) < end:
+        raise ValueError("Delta message truncated inside header")
+    header: DeltaHeader = json.loads(bytes(buf[_PREFIX.size : end]))
+    return header, _align(end)
+
+
+def header_padding(prefix: bytes | bytearray | memoryview) -> memoryview:
+    """The bytes between the header JSON and the data section (zero on the wire)."""
+    _, _, head_len = _PREFIX.unpack_from(prefix, 0)
+    end = _PREFIX.size + head_len
+    return memoryview(prefix)[end : _align(end)]
+
+
+def read_header(stream: BinaryIO) -> Tuple[DeltaHeader, bytes]:
+    """Read only the framed header from a stream. Returns (header, raw prefix)."""
+    fixed = stream.read(_PREFIX.size)
+    if len(fixed) < _PREFIX.size:
+        raise ValueError("Delta message too short")
+    _, _, head_len = _PREFIX.unpack(fixed)
+    rest = stream.read(_align(_PREFIX.size + head_len) - _PREFIX.size)
+    prefix = fixed + rest
+    header, _ = decode_header(prefix)
+    return header, prefix
+
+
+def tensor_view(
+    buf: bytearray | memoryview,
+    entry: TensorHeader,
+    data_start: int,
+) -> torch.Tensor:
+    """Zero-copy tensor view of one entry; writes go straight into `buf`."""
+    dtype = dtype_from_name(entry["dtype"])
+    if entry["nbytes"] == 0:
+        return torch.empty(entry["shape"], dtype=dtype)
+    flat = torch.frombuffer(
+        buf,
+        dtype=dtype,
+        count=entry["nbytes"] // torch.empty((), dtype=dtype).element_size(),
+        offset=data_start + entry["offset"],
+    )
+    return flat.view(entry["shape"])
+
+
+def decode_delta(
+    buf: bytearray | memoryview,
+) -> Tuple[DeltaHeader, Dict[str, torch.Tensor]]:
+    """Header plus zero-copy tensor views for every entry."""
+    header, data_start = decode_header(buf)
+    tensors = {
+        e["name"]: tensor_view(buf, e, data_start) for e in header.get("tensors", [])
+    }
+    return header, tensors
@@ -0,0 +1,443 @@
+# src/fednestd/federation/simulator.py
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import math
+import multiprocessing as mp
+import queue
+import random
+import resource
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+
+import torch
+
+from ..observability.logging import get_logger
+from .messages import DeltaHeader, decode_delta, encode_delta
+
+logger = get_logger(__name__)
+
+
+# Fleet simulator: thousands of virtual edge clients as asyncio tasks spread
+# over worker processes, sending framed deltas (federation/messages.py) to an
+# in-process round coordinator through a local queue broker.
+#
+# Every per-client draw (selection, dropout, latency, bandwidth, staleness)
+# comes from an RNG seeded by (seed, round, client), so round outcomes and
+# simulated round times do not depend on process scheduling.
+
+
+@dataclass
+class SimulationConfig:
+    num_clients: int = 1000
+    rounds: int = 3
+    processes: int = 2
+    participation: float = 1.0  # fraction of clients selected per round
+    dropout: float = 0.05
+    latency_ms: float = 80.0  # median one-way latency
+    bandwidth_mbps: float = 10.0  # median uplink
+    compute_s: float = 1.0  # median local training time
+    staleness_prob: float = 0.05  # chance a client trained on an old model
+    max_lag: int = 3  # how far behind a stale client can be
+    max_staleness: int = 1  # server accepts deltas at most this many versions old
+    delta_numel: int = 16_384
+    round_timeout_s: float = 30.0  # simulated seconds
+    quorum: float = 0.8  # round closes once this fraction of selected clients report
+    time_scale: float = 0.0  # wall seconds per simulated second (0 = no sleeping)
+    seed: int = 0
+
+
+@dataclass
+class ClientPlan:
+    client_id: str
+    dropped: bool
+    lag: int
+    arrival_s: float  # simulated time at which the delta reaches the server
+    num_examples: int
+
+
+def _rng(seed: int, round_idx: int, client_idx: int) -> random.Random:
+    digest = hashlib.blake2b(
+        f"{seed}:{round_idx}:{client_idx}".encode(), digest_size=8
+    ).digest()
+    return random.Random(int.from_bytes(digest, "little"))
+
+
+def delta_nbytes(cfg: SimulationConfig) -> int:
+    return cfg.delta_numel * 4
+
+
+def plan_client(cfg: SimulationConfig, round_idx: int, client_idx: int) -> ClientPlan:
+    """Deterministic behaviour of one client in one round."""
+    rng = _rng(cfg.seed, round_idx, client_idx)
+    dropped = rng.random() < cfg.dropout
+    lag = (
+        rng.randint(1, max(1, cfg.max_lag)) if rng.random() < cfg.staleness_prob else 0
+    )
+    latency = cfg.latency_ms / 1000.0 * rng.lognormvariate(0.0, 0.5)
+    bandwidth = cfg.bandwidth_mbps * 1e6 * rng.lognormvariate(0.0, 0.7)
+    compute = cfg.compute_s * rng.lognormvariate(0.0, 0.3)
+    arrival = 2 * latency + compute + delta_nbytes(cfg) * 8 / bandwidth
+    return ClientPlan(
+        client_id=f"sim-{client_idx:07d}",
+        dropped=dropped,
+        lag=lag,
+        arrival_s=arrival,
+        num_examples=rng.randint(16, 512),
+    )
+
+
+def selected_clients(cfg: SimulationConfig, round_idx: int) -> List[int]:
+    if cfg.participation >= 1.0:
+        return list(range(cfg.num_clients))
+    k = max(1, int(round(cfg.num_clients * cfg.participation)))
+    return sorted(
+        random.Random(cfg.seed * 1_000_003 + round_idx).sample(
+            range(cfg.num_clients), k
+        )
+    )
+
+
+# ----------------------------------------------------------------------
+# Client side (worker processes)
+# ----------------------------------------------------------------------
+async def _virtual_client(
+    cfg: SimulationConfig,
+    plan: ClientPlan,
+    round_id: str,
+    version: int,
+    template: Dict[str, torch.Tensor],
+    updates: Any,
+) -> str:
+    if plan.dropped:
+        return "dropped"
+    if plan.arrival_s > cfg.round_timeout_s:
+        return "late"
+    if cfg.time_scale > 0:
+        await asyncio.sleep(plan.arrival_s * cfg.time_scale)
+    msg = encode_delta(
+        template,
+        client_id=plan.client_id,
+        round_id=round_id,
+        model_version=f"v{version - plan.lag:06d}",
+        num_examples=plan.num_examples,
+        meta={"sim_arrival_s": plan.arrival_s},
+    )
+    updates.put(msg)
+    return "sent"
+
+
+async def _run_worker_round(
+    cfg: SimulationConfig,
+    clients: List[int],
+    round_idx: int,
+    version: int,
+    template: Dict[str, torch.Tensor],
+    updates: Any,
+) -> Dict[str, int]:
+    round_id = f"r{round_idx:06d}"
+    tasks = [
+        _virtual_client(
+            cfg, plan_client(cfg, round_idx, c), round_id, version, template, updates
+        )
+        for c in clients
+    ]
+    outcomes = await asyncio.gather(*tasks)
+    counts = {"sent": 0, "dropped": 0, "late": 0}
+    for outcome in outcomes:
+        counts[outcome] += 1
+    return counts
+
+
+def _worker_main(
+    worker_idx: int,
+    cfg: SimulationConfig,
+    control: Any,
+    updates: Any,
+) -> None:
+    torch.set_num_threads(1)
+    gen = torch.Generator().manual_seed(cfg.seed * 7919 + worker_idx)
+    template = {
+        "experts.0.lora_A": torch.randn(cfg.delta_numel, generator=gen) * 1e-3,
+    }
+    while True:
+        msg = control.get()
+        if msg is None:
+            return
+        round_idx, version = msg
+        mine = [
+            c
+            for c in selected_clients(cfg, round_idx)
+            if c % cfg.processes == worker_idx
+        ]
+        counts = asyncio.run(
+            _run_worker_round(cfg, mine, round_idx, version, template, updates)
+        )
+        updates.put(("done", worker_idx, round_idx, counts))
+
+
+# ----------------------------------------------------------------------
+# Server side
+# ----------------------------------------------------------------------
+class RoundAggregator(Protocol):
+    def add(self, header: DeltaHeader, tensors: Dict[str, torch.Tensor]) -> None: ...
+
+    def finalize(self) -> Dict[str, torch.Tensor]: ...
+
+
+class WeightedMeanAggregator:
+    """FedAvg over accepted deltas, weighted by num_examples (float64 sums)."""
+
+    def __init__(self) -> None:
+        self._sums: Dict[str, torch.Tensor] = {}
+        self._weight = 0
+
+    def add(self, header: DeltaHeader, tensors: Dict[str, torch.Tensor]) -> None:
+        n = int(header["num_examples"])
+        for name, t in tensors.items():
+            acc = self._sums.get(name)
+            if acc is None:
+                acc = self._sums[name] = torch.zeros(t.shape, dtype=torch.float64)
+            acc.add_(t, alpha=n)
+        self._weight += n
+
+    def finalize(self) -> Dict[str, torch.Tensor]:
+        out = {k: (v / max(self._weight, 1)).float() for k, v in self._sums.items()}
+        self._sums, self._weight = {}, 0
+        return out
+
+
+@dataclass
+class RoundStats:
+    round_id: str
+    selected: int
+    accepted: int
+    dropped: int
+    late: int
+    stale_rejected: int
+    bytes_received: int
+    wall_s: float
+    simulated_s: float
+    updates_per_s: float
+
+
+@dataclass
+class SimulationReport:
+    config: SimulationConfig
+    rounds: List[RoundStats] = field(default_factory=list)
+    wall_s: float = 0.0
+    server_cpu_s: float = 0.0
+    server_peak_rss_mb: float = 0.0
+
+    @property
+    def throughput_updates_per_s(self) -> float:
+        return sum(r.accepted for r in self.rounds) / max(self.wall_s, 1e-9)
+
+    @property
+    def throughput_mb_per_s(self) -> float:
+        return sum(r.bytes_received for r in self.rounds) / 1e6 / max(self.wall_s, 1e-9)
+
+    @property
+    def server_cpu_utilization(self) -> float:
+        return self.server_cpu_s / max(self.wall_s, 1e-9)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "config": asdict(self.config),
+            "rounds": [asdict(r) for r in self.rounds],
+            "wall_s": self.wall_s,
+            "throughput_updates_per_s": self.throughput_updates_per_s,
+            "throughput_mb_per_s": self.throughput_mb_per_s,
+            "server_cpu_s": self.server_cpu_s,
+            "server_cpu_utilization": self.server_cpu_utilization,
+            "server_peak_rss_mb": self.server_peak_rss_mb,
+        }
+
+
+def _drain(updates: Any) -> int:
+    """Discard whatever is already queued; returns how many items were dropped."""
+    dropped = 0
+    while True:
+        try:
+            updates.get_nowait()
+        except queue.Empty:
+            return dropped
+        dropped += 1
+
+
+class FleetSimulator:
+    """
+    Drives rounds against the server-side round coordinator in this process.
+
+    The coordinator validates each delta from its header (round, staleness),
+    feeds accepted ones to `aggregator` as zero-copy tensor views, and closes
+    the round once every worker has reported.
+    """
+
+    def __init__(
+        self,
+        cfg: SimulationConfig,
+        aggregator: Optional[RoundAggregator] = None,
+    ) -> None:
+        if cfg.processes < 1:
+            raise ValueError("SimulationConfig.processes must be >= 1")
+        self.cfg = cfg
+        self.aggregator = aggregator or WeightedMeanAggregator()
+        self.model_version = cfg.max_lag  # leave room for stale versions
+
+    def _run_round(
+        self, round_idx: int, control: List[Any], updates: Any
+    ) -> Tuple[RoundStats, Dict[str, torch.Tensor]]:
+        cfg = self.cfg
+        round_id = f"r{round_idx:06d}"
+        start = time.perf_counter()
+        leftover = _drain(updates)
+        if leftover:
+            logger.warning("Dropped %d updates left over from earlier rounds", leftover)
+        for q in control:
+            q.put((round_idx, self.model_version))
+
+        counts = {"sent": 0, "dropped": 0, "late": 0}
+        accepted = stale = nbytes = received = 0
+        workers_done = 0
+        arrivals: List[float] = []
+        deadline = time.monotonic() + max(
+            60.0, cfg.round_timeout_s * cfg.time_scale * 4
+        )
+        while workers_done < len(control) or received < counts["sent"]:
+            try:
+                item = updates.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                logger.warning("Round %s timed out waiting for workers", round_id)
+                break
+            # A round that timed out can still deliver late; count only ours.
+            if isinstance(item, tuple):
+                _, _, done_round, worker_counts = item
+                if done_round != round_idx:
+                    continue
+                workers_done += 1
+                for k, v in worker_counts.items():
+                    counts[k] += v
+                continue
+            header, tensors = decode_delta(item)
+            if header["round_id"] != round_id:
+                continue
+            received += 1
+            nbytes += len(item)
+            lag = self.model_version - int(header["model_version"].lstrip("v"))
+            if lag > cfg.max_staleness:
+                stale += 1
+                continue
+            self.aggregator.add(header, tensors)
+            accepted += 1
+            arrivals.append(float(header["meta"]["sim_arrival_s"]))
+
+        update = self.aggregator.finalize()
+        self.model_version += 1
+        wall = time.perf_counter() - start
+        # Simulated close time: when the quorum-th accepted delta arrived, or
+        # the round timeout if the quorum was never reached.
+        need = max(1, math.ceil(cfg.quorum * sum(counts.values())))
+        arrivals.sort()
+        simulated = arrivals[need - 1] if len(arrivals) >= need else cfg.round_timeout_s
+        stats = RoundStats(
+            round_id=round_id,
+            selected=sum(counts.values()),
+            accepted=accepted,
+            dropped=counts["dropped"],
+            late=counts["late"],
+            stale_rejected=stale,
+            bytes_received=nbytes,
+            wall_s=wall,
+            simulated_s=simulated,
+            updates_per_s=accepted / max(wall, 1e-9),
+        )
+        logger.info(
+            "Sim round %s: %d/%d accepted (%d dropped, %d late, %d stale), "
+            "%.2fs wall, %.1fs simulated",
+            round_id,
+            accepted,
+            stats.selected,
+            stats.dropped,
+            stats.late,
+            stale,
+            wall,
+            simulated,
+        )
+        return stats, update
+
+    def run(self) -> SimulationReport:
+        cfg = self.cfg
+        ctx = mp.get_context()
+        updates = ctx.Queue()
+        control = [ctx.Queue() for _ in range(cfg.processes)]
+        workers = [
+            ctx.Process(
+                target=_worker_main,
+                args=(i, cfg, control[i], updates),
+                daemon=True,
+            )
+            for i in range(cfg.processes)
+        ]
+        for w in workers:
+            w.start()
+
+        report = SimulationReport(config=cfg)
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        try:
+            for round_idx in range(cfg.rounds):
+                stats, _ = self._run_round(round_idx, control, updates)
+                report.rounds.append(stats)
+        finally:
+            for q in control:
+                q.put(None)
+            for w in workers:
+                w.join(timeout=10)
+                if w.is_alive():
+                    w.terminate()
+        report.wall_s = time.perf_counter() - start
+        report.server_cpu_s = time.process_time() - cpu_start
+        # ru_maxrss is KiB on Linux.
+        report.server_peak_rss_mb = (
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+        )
+        logger.info(
+            "Simulation: %d clients x %d rounds, %.0f updates/s, %.1f MB/s, "
+            "server cpu %.0f%%, peak rss %.0f MB",
+            cfg.num_clients,
+            cfg.rounds,
+            report.throughput_updates_per_s,
+            report.throughput_mb_per_s,
+            100 * report.server_cpu_utilization,
+            report.server_peak_rss_mb,
+        )
+        return report
+
+
+def build_simulation_config(config: Dict[str, Any]) -> SimulationConfig:
+    """
+    Build a SimulationConfig from config; missing keys keep their defaults.
+
+    Expects:
+
+        config["simulation"] = {
+            "num_clients": 10000, "rounds": 5, "processes": 8,
+            "participation": 0.1, "dropout": 0.05, "latency_ms": 80,
+            "bandwidth_mbps": 10, "compute_s": 1.0, "staleness_prob": 0.05,
+            "max_lag": 3, "max_staleness": 1, "delta_numel": 16384,
+            "round_timeout_s": 30, "quorum": 0.8, "time_scale": 0.0,
+            "seed": 0,
+        }
+    """
+    sim_cfg = config.get("simulation", {})
+    defaults = asdict(SimulationConfig())
+    unknown = set(sim_cfg) - set(defaults)
+    if unknown:
+        raise ValueError(f"build_simulation_config: unknown keys {sorted(unknown)}")
+    values = {k: type(defaults[k])(sim_cfg.get(k, defaults[k])) for k in defaults}
+    if not math.isfinite(values["time_scale"]) or values["time_scale"] < 0:
+        raise ValueError("build_simulation_config: time_scale must be >= 0")
+    return SimulationConfig(**values)
@@ -0,0 +1,344 @@
+# src/fednestd/governance/global_ranger.py
+from __future__ import annotations
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypedDict
+
+from ..observability.logging import get_logger
+from ..observability.metrics import (
+    POLICY_DECISION_LATENCY,
+    POLICY_DECISIONS,
+    POLICY_LAST_SYNC,
+    POLICY_SYNC_FAILURES,
+    LatencyWindow,
+)
+
+logger = get_logger(__name__)
+
+
+# Policy bundle format (a flattened Ranger export):
+#
+#   {
+#     "version": "42",
+#     "policies": [
+#       {"id": "p1", "resource": "dataset:curated/*", "actions": ["read"],
+#        "principals": ["group:tier1-trainers"], "effect": "allow"},
+#       {"id": "p2", "resource": "topic:updates.experts.local", "actions": ["publish"],
+#        "principals": ["*"], "effect": "allow"},
+#     ]
+#   }
+#
+# Resources are "<type>:<path>"; a trailing "/*" matches everything below a
+# path and "<type>:*" matches the whole type. Deny wins over allow, and
+# anything not explicitly allowed is denied.
+
+
+class PolicyRule(TypedDict, total=False):
+    id: str
+    resource: str
+    actions: List[str]
+    principals: List[str]
+    effect: str  # "allow" | "deny"
+
+
+class PolicyBundle(TypedDict):
+    version: str
+    policies: List[PolicyRule]
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    policy_id: Optional[str]
+    bundle_version: str
+
+
+class CompiledPolicies:
+    """
+    Policy bundle indexed by (resource pattern, action) -> principal -> effect.
+
+    A lookup probes at most depth(resource) + 2 dict keys, so decisions cost
+    microseconds regardless of how many policies the bundle contains.
+    """
+
+    def __init__(self, bundle: PolicyBundle) -> None:
+        self.version = str(bundle["version"])
+        self._index: Dict[Tuple[str, str], Dict[str, Tuple[str, str]]] = {}
+        for rule in bundle.get("policies", []):
+            effect = rule.get("effect", "allow")
+            if effect not in ("allow", "deny"):
+                raise ValueError(f"Policy {rule.get('id')}: unknown effect {effect!r}")
+            for action in rule.get("actions", ["*"]):
+                slot = self._index.setdefault((rule["resource"], action), {})
+                for principal in rule.get("principals", []):
+                    previous = slot.get(principal)
+                    # Deny wins if two rules target the same principal.
+                    if previous is None or effect == "deny":
+                        slot[principal] = (effect, rule.get("id", ""))
+
+    @staticmethod
+    def _resource_keys(resource: str) -> List[str]:
+        rtype, _, path = resource.partition(":")
+        keys = [resource]
+        parts = path.split("/") if path else []
+        for i in range(len(parts) - 1, 0, -1):
+            keys.append(f"{rtype}:{'/'.join(parts[:i])}/*")
+        keys.append(f"{rtype}:*")
+        keys.append("*")
+        return keys
+
+    def decide(self, principals: Iterable[str], resource: str, action: str) -> Decision:
+        who = list(principals) + ["*"]
+        allow_id: Optional[str] = None
+        for rkey in self._resource_keys(resource):
+            for akey in (action, "*"):
+                slot = self._index.get((rkey, akey))
+                if not slot:
+                    continue
+                for p in who:
+                    hit = slot.get(p)
+                    if hit is None:
+                        continue
+                    effect, policy_id = hit
+                    if effect == "deny":
+                        return Decision(False, policy_id, self.version)
+                    if allow_id is None:
+                        allow_id = policy_id
+        return Decision(allow_id is not None, allow_id, self.version)
+
+
+PolicySource = Callable[[Optional[str]], Optional[PolicyBundle]]
+
+
+def http_policy_source(url: str, timeout_s: float = 2.0) -> PolicySource:
+    """
+    Fetch bundles from a Ranger-style policy endpoint.
+
+    Sends the current version as `If-None-Match`; a 304 means "unchanged"
+    and returns None, so an idle sync does not transfer the bundle.
+    """
+
+    def fetch(current_version: Optional[str]) -> Optional[PolicyBundle]:
+        req = urllib.request.Request(url)
+        if current_version is not None:
+            req.add_header("If-None-Match", current_version)
+        try:
+            with urllib.request.urlopen(req, timeout=timeout_s) as resp:
+                bundle: PolicyBundle = json.loads(resp.read())
+                return bundle
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None
+            raise
+
+    return fetch
+
+
+class PolicyDecisionPoint:
+    """
+    Local PDP in front of Ranger for dataset access and delta publish checks.
+
+    Bundles are synced periodically and compiled into an index; decisions are
+    memoized in a TTL cache that is implicitly invalidated whenever the bundle
+    version changes. If the policy server is unreachable, the last known
+    bundle (also persisted to `bundle_path`) keeps being served.
+    """
+
+    def __init__(
+        self,
+        source: PolicySource,
+        cache_ttl_s: float = 60.0,
+        bundle_path: Optional[Path | str] = None,
+        max_cache_entries: int = 100_000,
+    ) -> None:
+        self.source = source
+        self.cache_ttl_s = cache_ttl_s
+        self.bundle_path = Path(bundle_path) if bundle_path is not None else None
+        self.max_cache_entries = max_cache_entries
+
+        self._policies: Optional[CompiledPolicies] = None
+        self._cache: Dict[Tuple[Tuple[str, ...], str, str], Tuple[Decision, float]] = {}
+        self._lock = threading.Lock()
+        self._latency = LatencyWindow()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_sync_ok: Optional[float] = None
+
+        if self.bundle_path is not None and self.bundle_path.exists():
+            self._install(json.loads(self.bundle_path.read_text()), persist=False)
+            logger.info("Loaded last known policy bundle from %s", self.bundle_path)
+
+    @property
+    def bundle_version(self) -> Optional[str]:
+        return self._policies.version if self._policies is not None else None
+
+    def _install(self, bundle: PolicyBundle, persist: bool = True) -> None:
+        compiled = CompiledPolicies(bundle)
+        with self._lock:
+            self._policies = compiled
+            self._cache.clear()
+        if persist and self.bundle_path is not None:
+            self.bundle_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.bundle_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(bundle))
+            tmp.replace(self.bundle_path)
+
+    def sync(self) -> bool:
+        """Pull the latest bundle. Returns False (and keeps serving) on failure."""
+        try:
+            bundle = self.source(self.bundle_version)
+        except Exception as e:
+            POLICY_SYNC_FAILURES.inc()
+            logger.warning(
+                "Policy sync failed, serving last known bundle %s: %s",
+                self.bundle_version,
+                e,
+            )
+            return False
+        if bundle is not None and str(bundle["version"]) != self.bundle_version:
+            self._install(bundle)
+            logger.info("Installed policy bundle version %s", self.bundle_version)
+        self.last_sync_ok = time.time()
+        POLICY_LAST_SYNC.set(self.last_sync_ok)
+        return True
+
+    def start(self, interval_s: float = 30.0) -> None:
+        """Sync once, then keep syncing on a daemon thread."""
+        self.sync()
+
+        def loop() -> None:
+            while not self._stop.wait(interval_s):
+                self.sync()
+
+        self._thread = threading.Thread(target=loop, name="policy-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def decide(
+        self,
+        principal: str,
+        resource: str,
+        action: str,
+        groups: Iterable[str] = (),
+    ) -> Decision:
+        start = time.perf_counter()
+        policies = self._policies
+        if policies is None:
+            # No bundle ever loaded: fail closed.
+            decision = Decision(False, None, "")
+            source = "index"
+        else:
+            principals = (principal, *sorted(groups))
+            key = (principals, resource, action)
+            now = time.monotonic()
+            cached = self._cache.get(key)
+            if (
+                cached is not None
+                and cached[1] > now
+                and cached[0].bundle_version == policies.version
+            ):
+                decision, source = cached[0], "cache"
+            else:
+                decision = policies.decide(principals, resource, action)
+                source = "index"
+                if len(self._cache) >= self.max_cache_entries:
+                    self._cache.clear()
+                self._cache[key] = (decision, now + self.cache_ttl_s)
+
+        elapsed = time.perf_counter() - start
+        POLICY_DECISION_LATENCY.labels(source=source).observe(elapsed)
+        POLICY_DECISIONS.labels(
+            action=action, decision="allow" if decision.allowed else "deny"
+        ).inc()
+        self._latency.observe(elapsed)
+        return decision
+
+    def is_allowed(
+        self,
+        principal: str,
+        resource: str,
+        action: str,
+        groups: Iterable[str] = (),
+    ) -> bool:
+        return self.decide(principal, resource, action, groups).allowed
+
+    def require(
+        self,
+        principal: str,
+        resource: str,
+        action: str,
+        groups: Iterable[str] = (),
+    ) -> None:
+        decision = self.decide(principal, resource, action, groups)
+        if not decision.allowed:
+            logger.warning(
+                "Policy denied %s on %s for %s (policy=%s, bundle=%s)",
+                action,
+                resource,
+                principal,
+                decision.policy_id,
+                decision.bundle_version,
+            )
+            raise PermissionError(f"{principal} may not {action} {resource}")
+
+    def decision_latency_percentiles(self) -> Dict[str, float]:
+        return self._latency.percentiles()
+
+
+def check_dataset_access(
+    pdp: PolicyDecisionPoint,
+    principal: str,
+    dataset: str,
+    groups: Iterable[str] = (),
+) -> None:
+    """Raise PermissionError unless `principal` may read `dataset`."""
+    pdp.require(f"user:{principal}", f"dataset:{dataset}", "read", groups)
+
+
+def check_delta_publish(
+    pdp: PolicyDecisionPoint,
+    client_id: str,
+    topic: str,
+    groups: Iterable[str] = (),
+) -> None:
+    """Raise PermissionError unless `client_id` may publish deltas to `topic`."""
+    pdp.require(f"client:{client_id}", f"topic:{topic}", "publish", groups)
+
+
+def build_policy_decision_point(config: Dict[str, Any]) -> PolicyDecisionPoint:
+    """
+    Build a PDP from config.
+
+    Expects:
+
+        config["governance"]["ranger"] = {
+            "url": "https://ranger.fednestd.internal/bundles/tier1",
+            "cache_ttl_s": 60,
+            "timeout_s": 2.0,
+            "bundle_path": "/var/lib/fednestd/policy_bundle.json",
+        }
+    """
+    ranger_cfg = config.get("governance", {}).get("ranger", {})
+    if "url" not in ranger_cfg:
+        raise ValueError(
+            "build_policy_decision_point: "
+            "config['governance']['ranger']['url'] is missing"
+        )
+    source = http_policy_source(
+        ranger_cfg["url"], timeout_s=float(ranger_cfg.get("timeout_s", 2.0))
+    )
+    return PolicyDecisionPoint(
+        source,
+        cache_ttl_s=float(ranger_cfg.get("cache_ttl_s", 60.0)),
+        bundle_path=ranger_cfg.get("bundle_path"),
+    )
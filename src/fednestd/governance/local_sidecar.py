@@ -0,0 +1,657 @@
+# src/fednestd/governance/local_sidecar.py
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import io
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence, Tuple, cast
+
+import torch
+
+from ..federation.messages import (
+    ALIGN,
+    DeltaHeader,
+    TensorHeader,
+    decode_header,
+    header_padding,
+    read_header,
+    tensor_view,
+)
+from ..model.checkpointing import param_group
+from ..observability.logging import get_logger
+from ..utils.serialization import dtype_from_name
+
+logger = get_logger(__name__)
+
+
+# The sidecar is the only path by which anything leaves an edge device.
+# It works on the framed delta message (federation/messages.py) in place:
+#
+#   1. validate envelope + tensor allowlist from the header alone
+#   2. DP clip + Gaussian noise directly on zero-copy tensor views
+#   3. hash the outgoing bytes incrementally and append an audit record
+#
+# so a payload is never deserialized, copied or re-serialized.
+
+_HEADER_KEYS = {
+    "kind",
+    "client_id",
+    "round_id",
+    "model_version",
+    "num_examples",
+    "tensors",
+}
+_OPTIONAL_HEADER_KEYS = {"meta"}
+_TENSOR_KEYS = {"name", "dtype", "shape", "offset", "nbytes"}
+_FLOAT_DTYPES = {"float32", "float16", "bfloat16", "float64"}
+
+
+class PayloadRejected(ValueError):
+    """Raised when an outbound payload violates the local sidecar policy."""
+
+
+@dataclass
+class SidecarPolicy:
+    """
+    What may leave the device.
+
+    By default only the adapters level may be published; `tensor_allowlist`
+    (fnmatch patterns) narrows that further. `allowed_meta` lists the summary
+    fields (e.g. loss, steps) permitted in the header's `meta` object.
+    """
+
+    device_id: Optional[str] = None
+    allowed_groups: Sequence[str] = ("adapters",)
+    tensor_allowlist: Optional[Sequence[str]] = None
+    allowed_meta: Sequence[str] = ("loss", "steps", "duration_s")
+    max_message_bytes: int = 256 * 1024 * 1024
+
+
+@dataclass
+class DPConfig:
+    """
+    Gaussian mechanism on each outbound delta.
+
+    The whole delta is clipped to L2 norm `clip_norm` and gets noise with std
+    `noise_multiplier * clip_norm`. The streaming path clips each tensor to
+    `clip_norm / sqrt(num_tensors)` instead, which has the same sensitivity,
+    and adds the same noise std to every tensor.
+    """
+
+    enabled: bool = False
+    clip_norm: float = 1.0
+    noise_multiplier: float = 1.0
+    delta: float = 1e-5
+    max_epsilon: Optional[float] = None
+    seed: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        if not self.enabled:
+            return
+        if self.clip_norm <= 0:
+            raise ValueError(f"DP clip_norm must be > 0, got {self.clip_norm}")
+        if self.noise_multiplier <= 0:
+            raise ValueError(
+                f"DP noise_multiplier must be > 0, got {self.noise_multiplier}"
+            )
+        if not 0 < self.delta < 1:
+            raise ValueError(f"DP delta must be in (0, 1), got {self.delta}")
+
+
+_RDP_ORDERS: Tuple[float, ...] = tuple(
+    [1.25, 1.5, 1.75, 2.0, 2.5, 3.0, 4.0, 5.0, 6.0, 8.0, 10.0, 12.0, 16.0, 20.0]
+    + [24.0, 32.0, 48.0, 64.0, 128.0, 256.0]
+)
+
+
+class PrivacyAccountant:
+    """
+    Per-device Renyi-DP accountant for repeated Gaussian releases.
+
+    Each release with noise multiplier sigma adds alpha / (2 sigma^2) at every
+    order alpha; epsilon is the usual RDP -> (epsilon, delta) conversion. No
+    subsampling amplification is assumed, so the bound is conservative.
+    State is persisted to `path` so the budget survives restarts.
+    """
+
+    def __init__(self, delta: float, path: Optional[Path | str] = None) -> None:
+        self.delta = delta
+        self.path = Path(path) if path is not None else None
+        self.releases = 0
+        self._rdp = [0.0] * len(_RDP_ORDERS)
+        if self.path is not None and self.path.exists():
+            state = json.loads(self.path.read_text())
+            self.releases = int(state["releases"])
+            self._rdp = [float(x) for x in state["rdp"]]
+
+    @staticmethod
+    def _rdp_step(noise_multiplier: float) -> List[float]:
+        return [a / (2.0 * noise_multiplier**2) for a in _RDP_ORDERS]
+
+    def epsilon(self, extra_noise_multiplier: Optional[float] = None) -> float:
+        """Current epsilon, or the epsilon after one more release if given."""
+        rdp = self._rdp
+        if extra_noise_multiplier is not None:
+            step = self._rdp_step(extra_noise_multiplier)
+            rdp = [r + s for r, s in zip(rdp, step)]
+        if not any(rdp):
+            return 0.0
+        return min(
+            r + math.log(1.0 / self.delta) / (a - 1.0) for a, r in zip(_RDP_ORDERS, rdp)
+        )
+
+    def record(self, noise_multiplier: float) -> float:
+        step = self._rdp_step(noise_multiplier)
+        self._rdp = [r + s for r, s in zip(self._rdp, step)]
+        self.releases += 1
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"releases": self.releases, "rdp": self._rdp}))
+            tmp.replace(self.path)
+        return self.epsilon()
+
+
+class AuditLog:
+    """Append-only JSONL audit log; records hashes and metadata, never payloads."""
+
+    def __init__(self, path: Path | str, fsync: bool = True) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+
+    def append(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+
+@dataclass
+class SidecarResult:
+    header: DeltaHeader
+    sha256: str
+    nbytes: int
+    seconds: float
+    epsilon: Optional[float] = None
+    clipped: bool = False
+    overhead_fraction: Optional[float] = None
+
+
+@dataclass
+class _OverheadStats:
+    sidecar_s: float = 0.0
+    round_s: float = 0.0
+    messages: int = 0
+    history: List[float] = field(default_factory=list)
+
+
+def _is_count(v: Any) -> bool:
+    return isinstance(v, int) and not isinstance(v, bool) and v >= 0
+
+
+def _is_zero(data: bytes | memoryview) -> bool:
+    return not bytes(data).strip(b"\0")
+
+
+def _padded(n: int) -> int:
+    return -(-n // ALIGN) * ALIGN
+
+
+def _readinto_exact(src: BinaryIO, out: memoryview) -> int:
+    """Fill `out` from `src`; returns fewer bytes only at end of stream."""
+    reader = cast(io.BufferedIOBase, src)
+    got = 0
+    while got < len(out):
+        n = reader.readinto(out[got:])
+        if not n:
+            break
+        got += n
+    return got
+
+
+class LocalSidecar:
+    """Streaming outbound stage for edge deltas (validation, DP, audit)."""
+
+    def __init__(
+        self,
+        policy: SidecarPolicy,
+        audit: AuditLog,
+        dp: Optional[DPConfig] = None,
+        accountant: Optional[PrivacyAccountant] = None,
+    ) -> None:
+        self.policy = policy
+        self.audit = audit
+        self.dp = dp or DPConfig()
+        if self.dp.enabled and accountant is None:
+            accountant = PrivacyAccountant(self.dp.delta)
+        self.accountant = accountant
+        self._gen: Optional[torch.Generator] = None
+        if self.dp.seed is not None:
+            self._gen = torch.Generator().manual_seed(self.dp.seed)
+        self._overhead = _OverheadStats()
+
+    # ------------------------------------------------------------------
+    # Validation (header only)
+    # ------------------------------------------------------------------
+    def validate_header(self, header: DeltaHeader, message_bytes: int) -> None:
+        if not isinstance(header, dict):
+            raise PayloadRejected("envelope must be an object")
+        keys = set(header)
+        missing = _HEADER_KEYS - keys
+        if missing:
+            raise PayloadRejected(f"missing envelope fields: {sorted(missing)}")
+        extra = keys - _HEADER_KEYS - _OPTIONAL_HEADER_KEYS
+        if extra:
+            # Unknown fields are how raw samples or logs would sneak out.
+            raise PayloadRejected(f"unexpected envelope fields: {sorted(extra)}")
+        if header["kind"] != "delta":
+            raise PayloadRejected(
+                f"only 'delta' messages may leave the device, got {header['kind']!r}"
+            )
+        if (
+            self.policy.device_id is not None
+            and header["client_id"] != self.policy.device_id
+        ):
+            raise PayloadRejected("client_id does not match this device")
+        if not isinstance(header["num_examples"], int) or header["num_examples"] < 0:
+            raise PayloadRejected("num_examples must be a non-negative integer")
+        meta = header.get("meta", {})
+        if not isinstance(meta, dict):
+            raise PayloadRejected("meta must be an object")
+        bad_meta = [
+            k
+            for k, v in meta.items()
+            if k not in self.policy.allowed_meta or not isinstance(v, (int, float))
+        ]
+        if bad_meta:
+            raise PayloadRejected(f"meta fields not allowed: {sorted(bad_meta)}")
+        self._check_size(message_bytes)
+
+        tensors = header["tensors"]
+        if not isinstance(tensors, list):
+            raise PayloadRejected("tensors must be a list")
+        if not tensors:
+            raise PayloadRejected("delta message has no tensors")
+        spans: List[Tuple[int, int]] = []
+        for t in tensors:
+            self._validate_tensor(t)
+            spans.append((t["offset"], t["offset"] + t["nbytes"]))
+        spans.sort()
+        for (_, end), (start, _) in zip(spans, spans[1:]):
+            if start < end:
+                raise PayloadRejected("tensor byte ranges overlap")
+
+    def _check_size(self, message_bytes: int) -> None:
+        if message_bytes > self.policy.max_message_bytes:
+            limit = self.policy.max_message_bytes
+            raise PayloadRejected(f"message is {message_bytes} bytes, limit {limit}")
+
+    def _validate_tensor(self, t: TensorHeader) -> None:
+        # The header is untrusted JSON: check every type before using a value.
+        if not isinstance(t, dict) or set(t) != _TENSOR_KEYS:
+            raise PayloadRejected("malformed tensor entry")
+        name = t["name"]
+        if not isinstance(name, str) or not isinstance(t["dtype"], str):
+            raise PayloadRejected("malformed tensor entry: name/dtype must be strings")
+        if param_group(name) not in self.policy.allowed_groups:
+            raise PayloadRejected(
+                f"tensor {name} ({param_group(name)}) may not leave the device"
+            )
+        allow = self.policy.tensor_allowlist
+        if allow is not None and not any(fnmatch.fnmatchcase(name, p) for p in allow):
+            raise PayloadRejected(f"tensor {name} is not in the allowlist")
+        if t["dtype"] not in _FLOAT_DTYPES:
+            raise PayloadRejected(f"tensor {name} has non-float dtype {t['dtype']}")
+        if not isinstance(t["shape"], list) or not all(
+            _is_count(s) for s in t["shape"]
+        ):
+            raise PayloadRejected(f"tensor {name} has an invalid shape")
+        numel = math.prod(t["shape"])
+        elem = torch.empty((), dtype=dtype_from_name(t["dtype"])).element_size()
+        offset, nbytes = t["offset"], t["nbytes"]
+        if (
+            not _is_count(offset)
+            or not _is_count(nbytes)
+            or nbytes != numel * elem
+            or offset % elem
+        ):
+            raise PayloadRejected(f"tensor {name} has inconsistent size/offset")
+
+    def _check_padding(
+        self, buf: bytearray, header: DeltaHeader, data_start: int
+    ) -> None:
+        """Everything outside the declared tensors must be zero padding."""
+        if not _is_zero(header_padding(buf)):
+            raise PayloadRejected("non-zero bytes in header padding")
+        view = memoryview(buf)[data_start:]
+        pos = 0
+        for begin, end in sorted(
+            (t["offset"], t["offset"] + t["nbytes"]) for t in header["tensors"]
+        ):
+            if not _is_zero(view[pos:begin]):
+                raise PayloadRejected("non-zero bytes between tensors")
+            pos = end
+        if len(view) < pos:
+            raise PayloadRejected("tensor data extends past the end of the message")
+        if len(view) != _padded(pos) or not _is_zero(view[pos:]):
+            raise PayloadRejected("unexpected bytes after the last tensor")
+
+    def _check_budget(self) -> None:
+        if (
+            not self.dp.enabled
+            or self.dp.max_epsilon is None
+            or self.accountant is None
+        ):
+            return
+        projected = self.accountant.epsilon(self.dp.noise_multiplier)
+        if projected > self.dp.max_epsilon:
+            raise PayloadRejected(
+                f"privacy budget exhausted (epsilon would reach {projected:.3f}, "
+                f"limit {self.dp.max_epsilon})"
+            )
+
+    # ------------------------------------------------------------------
+    # DP (vectorized, in place)
+    # ------------------------------------------------------------------
+    def _add_noise_(self, view: torch.Tensor, std: float) -> None:
+        noise = torch.empty_like(view).normal_(0.0, std, generator=self._gen)
+        view.add_(noise)
+
+    def _apply_dp_(self, views: List[torch.Tensor]) -> bool:
+        norms = torch.stack(
+            [torch.linalg.vector_norm(v, dtype=torch.float32) for v in views]
+        )
+        total = float(torch.linalg.vector_norm(norms))
+        scale = min(1.0, self.dp.clip_norm / (total + 1e-12))
+        std = self.dp.noise_multiplier * self.dp.clip_norm
+        for v in views:
+            if scale < 1.0:
+                v.mul_(scale)
+            self._add_noise_(v, std)
+        return scale < 1.0
+
+    # ------------------------------------------------------------------
+    # Entry points
+    # ------------------------------------------------------------------
+    def process(
+        self,
+        buf: bytearray,
+        round_time_s: Optional[float] = None,
+    ) -> SidecarResult:
+        """
+        Validate, privatize and audit one framed delta message in place.
+
+        On success `buf` holds exactly the bytes to publish. On violation
+        PayloadRejected is raised and the rejection is audited.
+        """
+        start = time.perf_counter()
+        header: DeltaHeader = {}
+        try:
+            header, data_start = decode_header(buf)
+            self.validate_header(header, len(buf))
+            self._check_padding(buf, header, data_start)
+            self._check_budget()
+        except (PayloadRejected, ValueError) as e:
+            self._audit_reject(header, str(e))
+            raise PayloadRejected(str(e)) from e
+
+        clipped = False
+        epsilon: Optional[float] = None
+        if self.dp.enabled:
+            views = [tensor_view(buf, t, data_start) for t in header["tensors"]]
+            clipped = self._apply_dp_(views)
+            assert self.accountant is not None
+            epsilon = self.accountant.record(self.dp.noise_multiplier)
+
+        digest = hashlib.sha256(memoryview(buf)).hexdigest()
+        return self._finish(
+            header, digest, len(buf), start, epsilon, clipped, round_time_s
+        )
+
+    def process_stream(
+        self,
+        src: BinaryIO,
+        dst: BinaryIO,
+        round_time_s: Optional[float] = None,
+    ) -> SidecarResult:
+        """
+        Same as `process`, but copies src -> dst holding one tensor at a time.
+
+        Peak memory is the largest single tensor, not the whole message. DP
+        uses per-tensor clipping (see DPConfig). `src` must hold exactly one
+        message. A seekable `src` is checked for truncation or trailing bytes
+        before anything is written; otherwise a bad stream is only detected
+        mid-copy, in which case a seekable `dst` is truncated back to where it
+        started and a non-seekable one must be discarded.
+        """
+        start = time.perf_counter()
+        header: DeltaHeader = {}
+        try:
+            header, prefix = read_header(src)
+            self.validate_header(header, len(prefix))
+            if not _is_zero(header_padding(prefix)):
+                raise PayloadRejected("non-zero bytes in header padding")
+            entries = sorted(header["tensors"], key=lambda t: t["offset"])
+            data_len = _padded(max(t["offset"] + t["nbytes"] for t in entries))
+            self._check_size(len(prefix) + data_len)
+            if src.seekable():
+                here = src.tell()
+                available = src.seek(0, io.SEEK_END) - here
+                src.seek(here)
+                if available < data_len:
+                    raise PayloadRejected(
+                        "tensor data extends past the end of the message"
+                    )
+                if available > data_len:
+                    raise PayloadRejected("unexpected bytes after the last tensor")
+            self._check_budget()
+        except (PayloadRejected, ValueError) as e:
+            self._audit_reject(header, str(e))
+            raise PayloadRejected(str(e)) from e
+
+        dst_start = dst.tell() if dst.seekable() else None
+        hasher = hashlib.sha256(prefix)
+        dst.write(prefix)
+        written = len(prefix)
+        per_tensor_clip = self.dp.clip_norm / math.sqrt(len(entries))
+        std = self.dp.noise_multiplier * self.dp.clip_norm
+        clipped = False
+        pos = 0
+        scratch = bytearray(max(t["nbytes"] for t in entries))
+
+        def reject(reason: str) -> PayloadRejected:
+            if dst_start is not None:
+                dst.seek(dst_start)
+                dst.truncate()
+            self._audit_reject(header, reason)
+            return PayloadRejected(reason)
+
+        for t in entries:
+            gap = t["offset"] - pos
+            chunk = memoryview(scratch)[: t["nbytes"]]
+            pad = src.read(gap) if gap else b""
+            if len(pad) != gap or _readinto_exact(src, chunk) != t["nbytes"]:
+                raise reject(f"stream ended inside tensor {t['name']}")
+            if not _is_zero(pad):
+                raise reject(f"non-zero bytes before tensor {t['name']}")
+            if pad:
+                hasher.update(pad)
+                dst.write(pad)
+                written += gap
+            if self.dp.enabled:
+                view = tensor_view(scratch, {**t, "offset": 0}, data_start=0)
+                norm = float(torch.linalg.vector_norm(view, dtype=torch.float32))
+                if norm > per_tensor_clip:
+                    view.mul_(per_tensor_clip / norm)
+                    clipped = True
+                self._add_noise_(view, std)
+            hasher.update(chunk)
+            dst.write(chunk)
+            written += t["nbytes"]
+            pos = t["offset"] + t["nbytes"]
+        tail = src.read(data_len - pos)
+        if len(tail) != data_len - pos:
+            raise reject("stream ended inside the final padding")
+        if not _is_zero(tail) or src.read(1):
+            raise reject("unexpected bytes after the last tensor")
+        hasher.update(tail)
+        dst.write(tail)
+        written += len(tail)
+
+        epsilon: Optional[float] = None
+        if self.dp.enabled:
+            assert self.accountant is not None
+            epsilon = self.accountant.record(self.dp.noise_multiplier)
+        return self._finish(
+            header, hasher.hexdigest(), written, start, epsilon, clipped, round_time_s
+        )
+
+    # ------------------------------------------------------------------
+    # Audit / reporting
+    # ------------------------------------------------------------------
+    def _audit_reject(self, header: DeltaHeader, reason: str) -> None:
+        logger.warning("Sidecar rejected outbound payload: %s", reason)
+        envelope: Dict[str, Any] = dict(header) if isinstance(header, dict) else {}
+        self.audit.append(
+            {
+                "ts": time.time(),
+                "decision": "reject",
+                "reason": reason,
+                "client_id": envelope.get("client_id"),
+                "round_id": envelope.get("round_id"),
+            }
+        )
+
+    def _finish(
+        self,
+        header: DeltaHeader,
+        digest: str,
+        nbytes: int,
+        start: float,
+        epsilon: Optional[float],
+        clipped: bool,
+        round_time_s: Optional[float],
+    ) -> SidecarResult:
+        seconds = time.perf_counter() - start
+        fraction = seconds / round_time_s if round_time_s else None
+        self._overhead.sidecar_s += seconds
+        self._overhead.messages += 1
+        if round_time_s:
+            self._overhead.round_s += round_time_s
+            self._overhead.history.append(seconds / round_time_s)
+
+        self.audit.append(
+            {
+                "ts": time.time(),
+                "decision": "allow",
+                "client_id": header["client_id"],
+                "round_id": header["round_id"],
+                "model_version": header["model_version"],
+                "tensors": len(header["tensors"]),
+                "bytes": nbytes,
+                "sha256": digest,
+                "dp": {
+                    "enabled": self.dp.enabled,
+                    "clip_norm": self.dp.clip_norm,
+                    "noise_multiplier": self.dp.noise_multiplier,
+                    "clipped": clipped,
+                    "epsilon": epsilon,
+                    "delta": self.dp.delta,
+                },
+                "sidecar_s": seconds,
+            }
+        )
+        logger.info(
+            "Sidecar allowed delta %s/%s (%d bytes, sha256=%s..., eps=%s, %.4fs%s)",
+            header["client_id"],
+            header["round_id"],
+            nbytes,
+            digest[:12],
+            f"{epsilon:.3f}" if epsilon is not None else "n/a",
+            seconds,
+            f", {100 * fraction:.2f}% of round" if fraction is not None else "",
+        )
+        return SidecarResult(
+            header=header,
+            sha256=digest,
+            nbytes=nbytes,
+            seconds=seconds,
+            epsilon=epsilon,
+            clipped=clipped,
+            overhead_fraction=fraction,
+        )
+
+    def overhead_report(self) -> Dict[str, float]:
+        """Sidecar time as a fraction of round time, over all reported rounds."""
+        o = self._overhead
+        return {
+            "messages": float(o.messages),
+            "sidecar_s": o.sidecar_s,
+            "round_s": o.round_s,
+            "overhead_fraction": o.sidecar_s / o.round_s if o.round_s else 0.0,
+            "max_overhead_fraction": max(o.history, default=0.0),
+        }
+
+
+def build_sidecar(config: Dict[str, Any]) -> LocalSidecar:
+    """
+    Build the local sidecar from config.
+
+    Expects:
+
+        config["governance"]["sidecar"] = {
+            "device_id": "edge-0042",
+            "audit_log": "/data/fednestd/audit.jsonl",
+            "allowed_groups": ["adapters"],
+            "tensor_allowlist": ["experts.*.lora_*"],   # optional
+            "allowed_meta": ["loss", "steps"],
+            "max_message_bytes": 268435456,
+            "dp": {"enabled": true, "clip_norm": 1.0, "noise_multiplier": 1.1,
+                   "delta": 1e-5, "max_epsilon": 8.0},
+            "accountant_path": "/data/fednestd/privacy_accountant.json",
+        }
+    """
+    sc_cfg = config.get("governance", {}).get("sidecar", {})
+    if "audit_log" not in sc_cfg:
+        raise ValueError(
+            "build_sidecar: config['governance']['sidecar']['audit_log'] is missing"
+        )
+
+    defaults = SidecarPolicy()
+    policy = SidecarPolicy(
+        device_id=sc_cfg.get("device_id"),
+        allowed_groups=tuple(sc_cfg.get("allowed_groups", defaults.allowed_groups)),
+        tensor_allowlist=sc_cfg.get("tensor_allowlist"),
+        allowed_meta=tuple(sc_cfg.get("allowed_meta", defaults.allowed_meta)),
+        max_message_bytes=int(
+            sc_cfg.get("max_message_bytes", defaults.max_message_bytes)
+        ),
+    )
+    if "core" in policy.allowed_groups:
+        raise ValueError("build_sidecar: core weights may never leave an edge device")
+
+    dp_cfg = sc_cfg.get("dp", {})
+    dp = DPConfig(
+        enabled=bool(dp_cfg.get("enabled", False)),
+        clip_norm=float(dp_cfg.get("clip_norm", 1.0)),
+        noise_multiplier=float(dp_cfg.get("noise_multiplier", 1.0)),
+        delta=float(dp_cfg.get("delta", 1e-5)),
+        max_epsilon=dp_cfg.get("max_epsilon"),
+    )
+    accountant = (
+        PrivacyAccountant(dp.delta, sc_cfg.get("accountant_path"))
+        if dp.enabled
+        else None
+    )
+    return LocalSidecar(
+        policy, AuditLog(sc_cfg["audit_log"]), dp=dp, accountant=accountant
+    )
@@ -1,12 +1,35 @@
 from __future__ import annotations
 
-from typing import TypedDict
+from typing import List, TypedDict
+
+
+class FedServerBackend(TypedDict, total=False):
+    name: str
+    host: str
+    port: int
+    weight: int  # relative share of clients (1-256)
 
 
 class HAProxyProfile(TypedDict, total=False):
+    # Single-backend form (kept for existing profiles).
     fedserver_host: str
     fedserver_port: int
     kafka_broker: str
+    # Sharded form; takes precedence over fedserver_host/port.
+    fedserver_backends: List[FedServerBackend]
+    kafka_brokers: List[str]
+    bind_port: int
+    kafka_bind_port: int
+    max_clients: int  # expected concurrent edge connections
+    kafka_maxconn: int
+    server_maxconn: int  # per-shard override of the sized default
+    server_maxqueue: int
+    health_check_path: str
+    hash_balance_factor: int  # optional bounded-load hashing, e.g. 150
+    # TLS is terminated at HAProxy (the client-id header must be readable).
+    tls_cert: str  # PEM bundle (cert + key) for the FedServer frontend
+    backend_tls: bool  # re-encrypt to shards (and health-check) over TLS
+    backend_ca_file: str  # CA used to verify shard certificates
 
 
 class VPNProfile(TypedDict, total=False):
@@ -34,9 +57,21 @@ PROFILES: dict[str, DeploymentProfile] = {
     },
     "prod": {
         "haproxy": {
-            "fedserver_host": "fedserver.prod.local",
-            "fedserver_port": 443,
-            "kafka_broker": "kafka.prod.local:9092",
+            "fedserver_backends": [
+                {"name": "fed1", "host": "fedserver-1.prod.local", "port": 443},
+                {"name": "fed2", "host": "fedserver-2.prod.local", "port": 443},
+                {"name": "fed3", "host": "fedserver-3.prod.local", "port": 443},
+            ],
+            "kafka_brokers": [
+                "kafka-1.prod.local:9092",
+                "kafka-2.prod.local:9092",
+                "kafka-3.prod.local:9092",
+            ],
+            "bind_port": 443,
+            "tls_cert": "/etc/haproxy/certs/fedserver.pem",
+            "backend_tls": True,
+            "backend_ca_file": "/etc/haproxy/certs/fedserver-ca.pem",
+            "max_clients": 60000,
         },
         "vpn": {
             "endpoint": "vpn.prod.local:51820",
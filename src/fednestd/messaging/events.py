@@ -0,0 +1,309 @@
+# src/fednestd/messaging/events.py
+from __future__ import annotations
+
+import json
+import math
+import struct
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from kafka.partitioner.default import murmur2
+
+# Compact binary encoding for control-plane events (control.federation_rounds,
+# telemetry.edge, tasks.training):
+#
+#   u8 event type | u8 schema version | fields of v1 | fields of v2 | ...
+#
+# Within each version block the fixed-width fields are packed with one
+# struct, followed by u16-length-prefixed UTF-8 strings. Schemas evolve by
+# appending a new version block only, so
+#   - old payloads decode on new code (missing blocks get defaults), and
+#   - new payloads decode on old code (unknown trailing blocks are ignored).
+
+_FIXED_CODES = {
+    "u8": "B",
+    "u16": "H",
+    "u32": "I",
+    "u64": "Q",
+    "i64": "q",
+    "f32": "f",
+    "f64": "d",
+    "bool": "?",
+}
+_HEADER = struct.Struct("<BB")
+_STR_LEN = struct.Struct("<H")
+
+
+@dataclass(frozen=True)
+class Field:
+    name: str
+    kind: str  # one of _FIXED_CODES or "str"
+    since: int = 1  # schema version that introduced the field
+    default: Any = None  # None = required on encode
+
+
+class _Block:
+    """One version's fields: a fixed struct plus trailing strings."""
+
+    def __init__(self, fields: Sequence[Field]) -> None:
+        self.fixed = [f for f in fields if f.kind != "str"]
+        self.strings = [f for f in fields if f.kind == "str"]
+        self.struct = struct.Struct(
+            "<" + "".join(_FIXED_CODES[f.kind] for f in self.fixed)
+        )
+        self.fixed_names = [f.name for f in self.fixed]
+        self.string_names = [f.name for f in self.strings]
+
+
+class EventSchema:
+    def __init__(
+        self,
+        name: str,
+        type_id: int,
+        topic: str,
+        key_field: str,
+        fields: Sequence[Field],
+    ) -> None:
+        for f in fields:
+            if f.kind != "str" and f.kind not in _FIXED_CODES:
+                raise ValueError(f"{name}.{f.name}: unknown field kind {f.kind!r}")
+        if key_field not in {f.name for f in fields}:
+            raise ValueError(f"{name}: key field {key_field!r} is not a field")
+        self.name = name
+        self.type_id = type_id
+        self.topic = topic
+        self.key_field = key_field
+        self.fields = list(fields)
+        self.version = max(f.since for f in fields)
+        self.defaults = {f.name: f.default for f in fields if f.default is not None}
+        self.blocks = [
+            _Block([f for f in fields if f.since == v])
+            for v in range(1, self.version + 1)
+        ]
+
+
+_REGISTRY: Dict[int, EventSchema] = {}
+
+
+def register_schema(schema: EventSchema) -> EventSchema:
+    existing = _REGISTRY.get(schema.type_id)
+    if existing is not None and existing.name != schema.name:
+        raise ValueError(
+            f"Event type id {schema.type_id} already used by {existing.name}"
+        )
+    _REGISTRY[schema.type_id] = schema
+    return schema
+
+
+def get_schema(type_id: int) -> EventSchema:
+    try:
+        return _REGISTRY[type_id]
+    except KeyError:
+        raise ValueError(f"Unknown event type id: {type_id}")
+
+
+ROUND_START = register_schema(
+    EventSchema(
+        "round_start",
+        1,
+        "control.federation_rounds",
+        key_field="round_id",
+        fields=[
+            Field("round_id", "str"),
+            Field("model_version", "str"),
+            Field("deadline_ts", "f64"),
+            Field("target_clients", "u32"),
+        ],
+    )
+)
+ROUND_END = register_schema(
+    EventSchema(
+        "round_end",
+        2,
+        "control.federation_rounds",
+        key_field="round_id",
+        fields=[
+            Field("round_id", "str"),
+            Field("new_version", "str"),
+            Field("accepted", "u32"),
+            Field("rejected", "u32"),
+        ],
+    )
+)
+EDGE_TELEMETRY = register_schema(
+    EventSchema(
+        "edge_telemetry",
+        3,
+        "telemetry.edge",
+        key_field="client_id",
+        fields=[
+            Field("client_id", "str"),
+            Field("region", "str"),
+            Field("ts", "f64"),
+            Field("cpu_util", "f32"),
+            Field("mem_mb", "f32"),
+            Field("battery", "f32"),
+            Field("local_loss", "f32"),
+            Field("steps", "u32"),
+        ],
+    )
+)
+TRAINING_TASK = register_schema(
+    EventSchema(
+        "training_task",
+        4,
+        "tasks.training",
+        key_field="expert_id",
+        fields=[
+            Field("task_id", "str"),
+            Field("expert_id", "u32"),
+            Field("region", "str"),
+            Field("dataset", "str"),
+            Field("priority", "u8"),
+        ],
+    )
+)
+
+
+def encode_event(schema: EventSchema, event: Dict[str, Any]) -> bytes:
+    """Encode `event`; fields with a default may be omitted."""
+    if schema.defaults:
+        event = {**schema.defaults, **event}
+    parts = [_HEADER.pack(schema.type_id, schema.version)]
+    for block in schema.blocks:
+        parts.append(block.struct.pack(*[event[n] for n in block.fixed_names]))
+        for name in block.string_names:
+            raw = event[name].encode()
+            if len(raw) > 0xFFFF:
+                raise ValueError(f"{schema.name}.{name} is longer than 65535 bytes")
+            parts.append(_STR_LEN.pack(len(raw)))
+            parts.append(raw)
+    return b"".join(parts)
+
+
+def decode_event(data: bytes) -> Tuple[EventSchema, Dict[str, Any]]:
+    type_id, version = _HEADER.unpack_from(data, 0)
+    schema = get_schema(type_id)
+    event: Dict[str, Any] = {}
+    pos = _HEADER.size
+    for block in schema.blocks[: min(version, schema.version)]:
+        event.update(zip(block.fixed_names, block.struct.unpack_from(data, pos)))
+        pos += block.struct.size
+        for name in block.string_names:
+            (n,) = _STR_LEN.unpack_from(data, pos)
+            pos += _STR_LEN.size
+            event[name] = data[pos : pos + n].decode()
+            pos += n
+    if version < schema.version:
+        for f in schema.fields:
+            if f.since > version:
+                event[f.name] = f.default
+    return schema, event
+
+
+# ----------------------------------------------------------------------
+# Partitioning
+# ----------------------------------------------------------------------
+def partition_key(schema: EventSchema, event: Dict[str, Any]) -> bytes:
+    """Kafka message key: the schema's key field (client, round or expert)."""
+    return str(event[schema.key_field]).encode()
+
+
+def partition_for(key: bytes, num_partitions: int) -> int:
+    """Same choice as Kafka's default (murmur2) partitioner for this key."""
+    return int(murmur2(key) & 0x7FFFFFFF) % num_partitions
+
+
+def recommend_partitions(
+    fleet_size: int,
+    events_per_client_per_hour: float,
+    bytes_per_event: int,
+    peak_factor: float = 3.0,
+    partition_events_per_s: float = 5_000.0,
+    partition_bytes_per_s: float = 5_000_000.0,
+    min_partitions: int = 3,
+    max_partitions: int = 1024,
+) -> int:
+    """
+    Partitions needed for a topic at peak load.
+
+    Sized so no partition exceeds the per-partition event or byte rate
+    (one consumer thread's worth of work), clamped to [min, max].
+    """
+    peak_events = fleet_size * events_per_client_per_hour / 3600.0 * peak_factor
+    needed = max(
+        math.ceil(peak_events / partition_events_per_s),
+        math.ceil(peak_events * bytes_per_event / partition_bytes_per_s),
+        min_partitions,
+    )
+    return min(needed, max_partitions)
+
+
+def sized_topic_partitions(kafka_cfg: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Partition counts per topic from kafka_cfg["sizing"], if present:
+
+        "sizing": {
+            "fleet_size": 1000000,
+            "topics": {
+                "telemetry.edge": {"events_per_client_per_hour": 60,
+                                   "bytes_per_event": 48},
+                "control.federation_rounds": {"events_per_client_per_hour": 0.1,
+                                              "bytes_per_event": 40},
+            },
+        }
+    """
+    sizing = kafka_cfg.get("sizing")
+    if not sizing:
+        return {}
+    fleet_size = int(sizing["fleet_size"])
+    out: Dict[str, int] = {}
+    for topic, spec in sizing.get("topics", {}).items():
+        out[topic] = recommend_partitions(
+            fleet_size,
+            float(spec["events_per_client_per_hour"]),
+            int(spec.get("bytes_per_event", 64)),
+            peak_factor=float(spec.get("peak_factor", 3.0)),
+            min_partitions=int(kafka_cfg.get("num_partitions", 3)),
+        )
+    return out
+
+
+def benchmark_event_codec(
+    num_events: int = 20_000,
+    seed: Optional[int] = 0,
+) -> Dict[str, float]:
+    """Bytes per event and decode rate for edge telemetry, binary vs JSON."""
+    import random
+
+    rng = random.Random(seed)
+    events = [
+        {
+            "client_id": f"edge-{rng.randrange(1_000_000):07d}",
+            "region": rng.choice(["eu-west", "us-east", "ap-south"]),
+            "ts": 1.7e9 + i,
+            "cpu_util": rng.random(),
+            "mem_mb": rng.uniform(100, 4000),
+            "battery": rng.random(),
+            "local_loss": rng.uniform(0, 5),
+            "steps": rng.randrange(1000),
+        }
+        for i in range(num_events)
+    ]
+    binary = [encode_event(EDGE_TELEMETRY, e) for e in events]
+    as_json = [json.dumps({"type": "edge_telemetry", **e}).encode() for e in events]
+
+    def rate(fn: Any, payloads: List[bytes]) -> float:
+        start = time.perf_counter()
+        for p in payloads:
+            fn(p)
+        return len(payloads) / max(time.perf_counter() - start, 1e-9)
+
+    return {
+        "events": float(num_events),
+        "binary_bytes_per_event": sum(map(len, binary)) / num_events,
+        "json_bytes_per_event": sum(map(len, as_json)) / num_events,
+        "binary_decode_per_s": rate(decode_event, binary),
+        "json_decode_per_s": rate(json.loads, as_json),
+    }
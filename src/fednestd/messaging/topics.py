@@ -7,6 +7,7 @@ from kafka.admin import NewTopic
 from kafka.errors import TopicAlreadyExistsError
 
 from ..observability.logging import get_logger
+from .events import sized_topic_partitions
 from .kafka_client import get_admin_client
 
 logger = get_logger(__name__)
@@ -32,7 +33,14 @@ def bootstrap_topics(config: Dict[str, Any]) -> None:
             "num_partitions": 3,
             "replication_factor": 1,
             # optional: "topic_overrides": { "tasks.training": {"num_partitions": 6} }
+            # optional: "sizing": {"fleet_size": 1000000, "topics": {
+            #     "telemetry.edge": {"events_per_client_per_hour": 60,
+            #                        "bytes_per_event": 48}}}
         }
+
+    Partition counts come from topic_overrides first, then from the
+    fleet-size sizing (see messaging/events.py: recommend_partitions), then
+    from num_partitions.
     """
     kafka_cfg = config.get("kafka", {})
     if not kafka_cfg:
@@ -43,6 +51,7 @@ def bootstrap_topics(config: Dict[str, Any]) -> None:
     default_partitions = int(kafka_cfg.get("num_partitions", 3))
     default_replicas = int(kafka_cfg.get("replication_factor", 1))
     overrides: Dict[str, Dict[str, Any]] = kafka_cfg.get("topic_overrides", {})
+    sized = sized_topic_partitions(kafka_cfg)
 
     logger.info(
         "Bootstrapping topics: %s (default_partitions=%s, default_replicas=%s)",
@@ -60,7 +69,9 @@ def bootstrap_topics(config: Dict[str, Any]) -> None:
             continue
 
         override = overrides.get(name, {})
-        num_partitions = int(override.get("num_partitions", default_partitions))
+        num_partitions = int(
+            override.get("num_partitions", sized.get(name, default_partitions))
+        )
         replication_factor = int(override.get("replication_factor", default_replicas))
 
         logger.info(
@@ -0,0 +1,511 @@
+# src/fednestd/model/checkpointing.py
+from __future__ import annotations
+
+import json
+import os
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, TypedDict
+
+import torch
+
+from ..observability.logging import get_logger
+from ..utils.serialization import (
+    dtype_from_name,
+    dtype_name,
+    tensor_from_bytes,
+    tensor_to_bytes,
+)
+
+logger = get_logger(__name__)
+
+
+# Nested levels of the model. Every parameter belongs to exactly one of them.
+PARAM_GROUPS: tuple[str, ...] = ("core", "experts", "adapters")
+
+_ADAPTER_MARKERS: tuple[str, ...] = ("lora_", "adapter")
+_EXPERT_MARKERS: tuple[str, ...] = ("experts.",)
+
+
+def param_group(name: str) -> str:
+    """
+    Map a parameter name to its nested level: "core", "experts" or "adapters".
+
+    Adapters are checked first, since LoRA modules are attached to experts and
+    their names usually contain both markers (e.g. "experts.3.fc1.lora_A").
+    """
+    if any(marker in name for marker in _ADAPTER_MARKERS):
+        return "adapters"
+    if any(marker in name for marker in _EXPERT_MARKERS):
+        return "experts"
+    return "core"
+
+
+def partition_state_dict(
+    state_dict: Mapping[str, torch.Tensor],
+) -> Dict[str, Dict[str, torch.Tensor]]:
+    """
+    Split a flat state_dict into {"core": {...}, "experts": {...}, "adapters": {...}}.
+    """
+    groups: Dict[str, Dict[str, torch.Tensor]] = {g: {} for g in PARAM_GROUPS}
+    for name, tensor in state_dict.items():
+        groups[param_group(name)][name] = tensor
+    return groups
+
+
+def save_checkpoint(state_dict: Mapping[str, torch.Tensor], path: Path | str) -> Path:
+    """
+    Save a full checkpoint to `path`, keeping the core/experts/adapters split.
+
+    Writes to a temporary file first and renames it, so a crash never leaves
+    a truncated checkpoint behind.
+    """
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_suffix(p.suffix + ".tmp")
+    torch.save(partition_state_dict(state_dict), tmp)
+    tmp.replace(p)
+    logger.info("Saved checkpoint to %s (%d tensors)", p, len(state_dict))
+    return p
+
+
+def load_checkpoint(path: Path | str) -> Dict[str, torch.Tensor]:
+    """
+    Load a checkpoint written by `save_checkpoint` and return a flat state_dict.
+    """
+    p = Path(path)
+    if not p.exists():
+        raise FileNotFoundError(f"Checkpoint not found: {p}")
+
+    groups: Dict[str, Dict[str, torch.Tensor]] = torch.load(p, map_location="cpu")
+    state: Dict[str, torch.Tensor] = {}
+    for group in PARAM_GROUPS:
+        state.update(groups.get(group, {}))
+    return state
+
+
+# ----------------------------------------------------------------------
+# Edge checkpoint ring (Tier 2/3)
+# ----------------------------------------------------------------------
+#
+# Edge flash is small and slow, so the ring keeps one full "base" snapshot
+# every `base_interval` entries and stores the rest as deltas against that
+# base. Deltas are the XOR of the raw bit patterns (exact, unlike new - old
+# in floating point) followed by zlib: values that barely moved share their
+# sign/exponent/high mantissa bits, so the XOR is mostly zero bytes.
+#
+# On disk:
+#   snap-<seq>.bin   immutable snapshot file (written via tmp + fsync + rename)
+#   index.log        append-only JSON lines; a torn last line is ignored
+
+_XOR_VIEW: dict[torch.dtype, torch.dtype] = {
+    torch.float32: torch.int32,
+    torch.float64: torch.int64,
+    torch.float16: torch.int16,
+    torch.bfloat16: torch.int16,
+}
+
+
+class SnapshotEntry(TypedDict):
+    seq: int
+    version: str
+    kind: str  # "base" | "delta"
+    base_seq: int
+    file: str
+    bytes: int
+    logical_bytes: int
+    crc: int
+
+
+class RingStats(TypedDict):
+    snapshots: int
+    disk_bytes: int
+    bytes_written: int
+    logical_bytes: int
+    write_amplification: float
+    last_restore_s: float
+
+
+def _bits(t: torch.Tensor) -> torch.Tensor:
+    view = _XOR_VIEW.get(t.dtype)
+    return t.view(view) if view is not None else t
+
+
+def _encode_snapshot(
+    state: Mapping[str, torch.Tensor],
+    base: Optional[Mapping[str, torch.Tensor]],
+    level: int,
+) -> bytes:
+    header: Dict[str, Dict[str, object]] = {}
+    chunks: List[bytes] = []
+    offset = 0
+    for name, tensor in state.items():
+        t = tensor.detach().cpu().contiguous()
+        ref = base.get(name) if base is not None else None
+        meta: Dict[str, object] = {"dtype": dtype_name(t.dtype), "shape": list(t.shape)}
+        if ref is not None and ref.shape == t.shape and ref.dtype == t.dtype:
+            if torch.equal(_bits(ref), _bits(t)):
+                meta["mode"] = "same"
+                header[name] = meta
+                continue
+            payload = tensor_to_bytes(torch.bitwise_xor(_bits(t), _bits(ref)))
+            meta["mode"] = "xor"
+        else:
+            payload = tensor_to_bytes(t)
+            meta["mode"] = "full"
+        blob = zlib.compress(payload, level)
+        meta["offset"] = offset
+        meta["length"] = len(blob)
+        header[name] = meta
+        chunks.append(blob)
+        offset += len(blob)
+
+    head = json.dumps(header).encode()
+    return struct.pack("<I", len(head)) + head + b"".join(chunks)
+
+
+def _decode_snapshot(
+    data: bytes,
+    base: Optional[Mapping[str, torch.Tensor]],
+) -> Dict[str, torch.Tensor]:
+    (head_len,) = struct.unpack_from("<I", data, 0)
+    header = json.loads(data[4 : 4 + head_len])
+    body = memoryview(data)[4 + head_len :]
+    state: Dict[str, torch.Tensor] = {}
+    for name, meta in header.items():
+        mode = meta["mode"]
+        if mode == "same":
+            if base is None:
+                raise ValueError(f"Snapshot entry {name} references a missing base")
+            state[name] = base[name]
+            continue
+        start, length = meta["offset"], meta["length"]
+        raw = zlib.decompress(body[start : start + length])
+        dtype = dtype_from_name(meta["dtype"])
+        if mode == "full":
+            state[name] = tensor_from_bytes(raw, dtype, meta["shape"])
+            continue
+        if base is None:
+            raise ValueError(f"Snapshot entry {name} references a missing base")
+        ref = base[name]
+        bits_dtype = _XOR_VIEW.get(dtype, dtype)
+        xor = tensor_from_bytes(raw, bits_dtype, meta["shape"])
+        state[name] = torch.bitwise_xor(_bits(ref), xor).view(dtype)
+    return state
+
+
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:  # e.g. platforms without directory fds
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class EdgeCheckpointRing:
+    """
+    Bounded, crash-safe ring of adapter snapshots for edge rollback (PRD E5).
+
+    Most entries are compressed deltas against the latest base, so restoring
+    any retained version reads at most one base (cached in memory after the
+    first use) plus one small delta file.
+    """
+
+    INDEX_FILE = "index.log"
+
+    def __init__(
+        self,
+        root: Path | str,
+        max_snapshots: int = 8,
+        disk_budget_bytes: Optional[int] = None,
+        base_interval: int = 4,
+        compress_level: int = 1,
+    ) -> None:
+        if max_snapshots < 1 or base_interval < 1:
+            raise ValueError("max_snapshots and base_interval must be >= 1")
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_snapshots = max_snapshots
+        self.disk_budget_bytes = disk_budget_bytes
+        self.base_interval = base_interval
+        self.compress_level = compress_level
+
+        self._entries: Dict[int, SnapshotEntry] = {}
+        self._next_seq = 0
+        self._base_cache: Dict[int, Dict[str, torch.Tensor]] = {}
+        self._bytes_written = 0
+        self._logical_bytes = 0
+        self._last_restore_s = 0.0
+        self._index_records = 0
+        self._load_index()
+
+    # -- index ---------------------------------------------------------
+    def _load_index(self) -> None:
+        path = self.root / self.INDEX_FILE
+        if not path.exists():
+            return
+        data = path.read_bytes()
+        good = 0
+        for line in data.splitlines(keepends=True):
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("unterminated record")
+                record = json.loads(line)
+            except ValueError:
+                # Torn write from a crash mid-append; everything before it is
+                # intact. Cut it off so the next append starts on a clean line.
+                logger.warning("Truncating torn checkpoint index record in %s", path)
+                with open(path, "r+b") as f:
+                    f.truncate(good)
+                break
+            good += len(line)
+            self._index_records += 1
+            if "next_seq" in record:
+                self._next_seq = max(self._next_seq, int(record["next_seq"]))
+            elif "evict" in record:
+                seq = int(record["evict"])
+                self._entries.pop(seq, None)
+                self._next_seq = max(self._next_seq, seq + 1)
+            else:
+                entry: SnapshotEntry = record
+                self._next_seq = max(self._next_seq, entry["seq"] + 1)
+                if (self.root / entry["file"]).exists():
+                    self._entries[entry["seq"]] = entry
+        # Remove snapshot files that never made it into the index.
+        known = {e["file"] for e in self._entries.values()}
+        for p in self.root.glob("snap-*"):
+            if p.name not in known:
+                p.unlink(missing_ok=True)
+
+    def _append_index(self, record: Mapping[str, object]) -> None:
+        line = (json.dumps(record) + "\n").encode()
+        with open(self.root / self.INDEX_FILE, "ab") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self._bytes_written += len(line)
+        self._index_records += 1
+
+    def _compact_index(self) -> None:
+        """Rewrite the index with live entries only, once tombstones pile up.
+
+        The first record carries the sequence counter, so sequence numbers (and
+        file names) of evicted snapshots are never reused.
+        """
+        if self._index_records <= 4 * max(len(self._entries), 1):
+            return
+        path = self.root / self.INDEX_FILE
+        tmp = path.with_suffix(".tmp")
+        lines = [json.dumps({"next_seq": self._next_seq}) + "\n"]
+        lines += [json.dumps(self._entries[s]) + "\n" for s in sorted(self._entries)]
+        data = "".join(lines).encode()
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        _fsync_dir(self.root)
+        self._bytes_written += len(data)
+        self._index_records = len(lines)
+
+    # -- writing -------------------------------------------------------
+    def versions(self) -> List[str]:
+        return [self._entries[s]["version"] for s in sorted(self._entries)]
+
+    def _latest_base(self) -> Optional[SnapshotEntry]:
+        bases = [e for e in self._entries.values() if e["kind"] == "base"]
+        return max(bases, key=lambda e: e["seq"]) if bases else None
+
+    def save(self, version: str, state: Mapping[str, torch.Tensor]) -> SnapshotEntry:
+        """Append a snapshot of `state` (typically the adapters) as `version`."""
+        seq = self._next_seq
+        self._next_seq += 1
+        base = self._latest_base()
+        # Counted in writes, not retained entries, so evicting deltas cannot
+        # keep every future delta pinned to an ever older base.
+        as_base = base is None or seq - base["seq"] >= self.base_interval
+        base_state = None if as_base or base is None else self._load_base(base)
+
+        data = _encode_snapshot(state, base_state, self.compress_level)
+        file_name = f"snap-{seq:08d}.bin"
+        final = self.root / file_name
+        tmp = final.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, final)
+        _fsync_dir(self.root)
+
+        logical = sum(t.numel() * t.element_size() for t in state.values())
+        entry: SnapshotEntry = {
+            "seq": seq,
+            "version": version,
+            "kind": "base" if as_base else "delta",
+            "base_seq": seq if as_base or base is None else base["seq"],
+            "file": file_name,
+            "bytes": len(data),
+            "logical_bytes": logical,
+            "crc": zlib.crc32(data),
+        }
+        self._append_index(entry)
+        self._entries[seq] = entry
+        self._bytes_written += len(data)
+        self._logical_bytes += logical
+        if as_base:
+            snapshot = {k: v.detach().cpu().clone() for k, v in state.items()}
+            self._base_cache = {seq: snapshot}
+
+        logger.info(
+            "Edge checkpoint %s saved as %s (%d bytes, %.1f%% of logical size)",
+            version,
+            entry["kind"],
+            len(data),
+            100.0 * len(data) / max(logical, 1),
+        )
+        self._enforce_budget()
+        return entry
+
+    def _disk_bytes(self) -> int:
+        return sum(e["bytes"] for e in self._entries.values())
+
+    def _enforce_budget(self) -> None:
+        """
+        Evict the oldest chains (a base and its deltas) until within limits.
+
+        The newest snapshot and the base it depends on are never evicted, even
+        if together they exceed the disk budget.
+        """
+        latest_base = self._latest_base()
+        newest = max(self._entries)
+        while len(self._entries) > 1:
+            over_count = len(self._entries) > self.max_snapshots
+            over_disk = (
+                self.disk_budget_bytes is not None
+                and self._disk_bytes() > self.disk_budget_bytes
+            )
+            if not (over_count or over_disk):
+                break
+            oldest = self._entries[min(self._entries)]
+            if latest_base is not None and oldest["seq"] == latest_base["seq"]:
+                # Never evict the base the newest deltas depend on; evict
+                # its oldest delta instead.
+                deltas = sorted(
+                    s
+                    for s, e in self._entries.items()
+                    if e["kind"] == "delta" and s != newest
+                )
+                if not deltas:
+                    logger.warning(
+                        "Edge checkpoint ring exceeds its budget with only the "
+                        "newest snapshot and its base retained"
+                    )
+                    break
+                self._evict(deltas[0])
+                continue
+            if oldest["kind"] == "base":
+                # Deltas of an old base are useless without it.
+                chain = [
+                    s
+                    for s, e in self._entries.items()
+                    if e["base_seq"] == oldest["seq"]
+                ]
+                for s in chain:
+                    self._evict(s)
+            else:
+                self._evict(oldest["seq"])
+        self._compact_index()
+
+    def _evict(self, seq: int) -> None:
+        entry = self._entries.pop(seq)
+        self._append_index({"evict": seq})
+        (self.root / entry["file"]).unlink(missing_ok=True)
+        self._base_cache.pop(seq, None)
+        logger.info("Evicted edge checkpoint %s (seq=%d)", entry["version"], seq)
+
+    # -- reading -------------------------------------------------------
+    def _read(self, entry: SnapshotEntry) -> bytes:
+        data = (self.root / entry["file"]).read_bytes()
+        if zlib.crc32(data) != entry["crc"]:
+            raise ValueError(
+                f"Checkpoint file {entry['file']} is corrupt (crc mismatch)"
+            )
+        return data
+
+    def _load_base(self, entry: SnapshotEntry) -> Dict[str, torch.Tensor]:
+        cached = self._base_cache.get(entry["seq"])
+        if cached is None:
+            cached = _decode_snapshot(self._read(entry), None)
+            self._base_cache = {entry["seq"]: cached}
+        return cached
+
+    def restore(self, version: Optional[str] = None) -> Dict[str, torch.Tensor]:
+        """Return the state saved as `version` (default: the newest snapshot)."""
+        if not self._entries:
+            raise KeyError("Edge checkpoint ring is empty")
+        matches = [e for e in self._entries.values() if version in (None, e["version"])]
+        if not matches:
+            raise KeyError(f"Edge checkpoint version not retained: {version}")
+        entry = max(matches, key=lambda e: e["seq"])
+
+        start = time.perf_counter()
+        base = self._load_base(self._entries[entry["base_seq"]])
+        if entry["kind"] == "base":
+            state = {k: v.clone() for k, v in base.items()}
+        else:
+            state = _decode_snapshot(self._read(entry), base)
+            state = {k: v.clone() if v is base.get(k) else v for k, v in state.items()}
+        self._last_restore_s = time.perf_counter() - start
+        logger.info(
+            "Restored edge checkpoint %s (%s) in %.4fs",
+            entry["version"],
+            entry["kind"],
+            self._last_restore_s,
+        )
+        return state
+
+    def stats(self) -> RingStats:
+        return {
+            "snapshots": len(self._entries),
+            "disk_bytes": self._disk_bytes(),
+            "bytes_written": self._bytes_written,
+            "logical_bytes": self._logical_bytes,
+            "write_amplification": self._bytes_written / max(self._logical_bytes, 1),
+            "last_restore_s": self._last_restore_s,
+        }
+
+
+def build_edge_checkpoint_ring(config: Dict[str, Any]) -> Optional[EdgeCheckpointRing]:
+    """
+    Build the edge checkpoint ring from config, or None if not configured.
+
+    Expects:
+
+        config["checkpoints"] = {
+            "dir": "/data/fednestd/checkpoints",
+            "max_snapshots": 8,
+            "disk_budget_bytes": 67108864,
+            "base_interval": 4,
+            "compress_level": 1,
+        }
+    """
+    ckpt_cfg = config.get("checkpoints")
+    if not ckpt_cfg:
+        return None
+    if "dir" not in ckpt_cfg:
+        raise ValueError(
+            "build_edge_checkpoint_ring: config['checkpoints']['dir'] is required"
+        )
+    budget = ckpt_cfg.get("disk_budget_bytes")
+    return EdgeCheckpointRing(
+        ckpt_cfg["dir"],
+        max_snapshots=int(ckpt_cfg.get("max_snapshots", 8)),
+        disk_budget_bytes=int(budget) if budget is not None else None,
+        base_interval=int(ckpt_cfg.get("base_interval", 4)),
+        compress_level=int(ckpt_cfg.get("compress_level", 1)),
+    )
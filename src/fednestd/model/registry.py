@@ -0,0 +1,516 @@
+# src/fednestd/model/registry.py
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, TypedDict
+
+import torch
+
+from ..observability.logging import get_logger
+from ..utils.serialization import (
+    dtype_name,
+    tensor_digest,
+    tensor_from_bytes,
+    tensor_to_bytes,
+)
+from .checkpointing import param_group
+
+try:
+    import boto3
+except ImportError:  # optional dependency, only needed for the S3/MinIO backend
+    boto3 = None
+
+logger = get_logger(__name__)
+
+
+# Storage layout (identical for every backend):
+#
+#   blobs/<aa>/<sha256>        raw tensor bytes, content-addressed
+#   manifests/<version>.json   tensor name -> blob + dtype + shape
+#   refs/<name>                version id (e.g. refs/current, refs/canary)
+#
+# Blobs and manifests are immutable once written; only refs ever change,
+# which is what makes rollback and pinning a single small write.
+BLOBS_PREFIX = "blobs/"
+MANIFESTS_PREFIX = "manifests/"
+REFS_PREFIX = "refs/"
+CURRENT_REF = "current"
+
+
+class TensorEntry(TypedDict):
+    blob: str
+    dtype: str
+    shape: List[int]
+    group: str
+
+
+class Manifest(TypedDict):
+    version: str
+    parent: Optional[str]
+    created_at: float
+    metadata: Dict[str, Any]
+    tensors: Dict[str, TensorEntry]
+
+
+@dataclass
+class VersionDiff:
+    """Per-tensor differences between two versions, computed from manifests only."""
+
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+
+    def changed_groups(self) -> Dict[str, int]:
+        """Count of added/removed/changed tensors per nested level."""
+        counts: Dict[str, int] = {}
+        for name in self.added + self.removed + self.changed:
+            group = param_group(name)
+            counts[group] = counts.get(group, 0) + 1
+        return counts
+
+
+class RegistryBackend(ABC):
+    """Minimal key/value object store used by the registry."""
+
+    @abstractmethod
+    def put(self, key: str, data: bytes) -> None: ...
+
+    @abstractmethod
+    def get(self, key: str) -> bytes: ...
+
+    @abstractmethod
+    def exists(self, key: str) -> bool: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    def list(self, prefix: str) -> List[str]: ...
+
+    @abstractmethod
+    def modified(self, key: str) -> float:
+        """Unix time the object was last written."""
+
+
+class LocalFSBackend(RegistryBackend):
+    """Registry storage on a local (or network-mounted) filesystem."""
+
+    def __init__(self, root: Path | str) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so readers never observe a partial object.
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def get(self, key: str) -> bytes:
+        path = self._path(key)
+        if not path.exists():
+            raise KeyError(key)
+        return path.read_bytes()
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def modified(self, key: str) -> float:
+        return self._path(key).stat().st_mtime
+
+    def list(self, prefix: str) -> List[str]:
+        base = self._path(prefix)
+        if not base.exists():
+            return []
+        return sorted(
+            p.relative_to(self.root).as_posix()
+            for p in base.rglob("*")
+            if p.is_file() and not p.name.startswith(".tmp-")
+        )
+
+
+class S3Backend(RegistryBackend):
+    """
+    Registry storage on MinIO or any S3-compatible object store.
+
+    Pass `client` to reuse an existing boto3 client (or a fake in tests);
+    otherwise one is created from `endpoint_url` and the usual AWS_* env vars.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: Optional[str] = None,
+        client: Any = None,
+    ) -> None:
+        if client is None:
+            if boto3 is None:
+                raise RuntimeError(
+                    "S3Backend requires boto3; install it or pass an explicit client"
+                )
+            client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def put(self, key: str, data: bytes) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data)
+
+    def get(self, key: str) -> bytes:
+        try:
+            obj = self.client.get_object(Bucket=self.bucket, Key=self._key(key))
+        except Exception as e:
+            if not self.exists(key):
+                raise KeyError(key) from e
+            raise
+        body: bytes = obj["Body"].read()
+        return body
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except Exception:
+            return False
+        return True
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def modified(self, key: str) -> float:
+        head = self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        return float(head["LastModified"].timestamp())
+
+    def list(self, prefix: str) -> List[str]:
+        keys: List[str] = []
+        kwargs: Dict[str, Any] = {"Bucket": self.bucket, "Prefix": self._key(prefix)}
+        while True:
+            resp = self.client.list_objects_v2(**kwargs)
+            for obj in resp.get("Contents", []):
+                keys.append(obj["Key"][len(self.prefix):])
+            if not resp.get("IsTruncated"):
+                break
+            kwargs["ContinuationToken"] = resp["NextContinuationToken"]
+        return sorted(keys)
+
+
+def _blob_key(digest: str) -> str:
+    return f"{BLOBS_PREFIX}{digest[:2]}/{digest}"
+
+
+def _manifest_key(version: str) -> str:
+    return f"{MANIFESTS_PREFIX}{version}.json"
+
+
+def _ref_key(name: str) -> str:
+    return f"{REFS_PREFIX}{name}"
+
+
+class ModelRegistry:
+    """
+    Content-addressed registry of global model versions.
+
+    Each tensor is stored once under its content hash, so experts that did not
+    change in a round are shared by every version that contains them. A version
+    is just a manifest, and rollback / pinning only rewrites a ref.
+    """
+
+    def __init__(self, backend: RegistryBackend) -> None:
+        self.backend = backend
+        # Manifests are immutable, so caching them is always safe.
+        self._manifests: Dict[str, Manifest] = {}
+
+    # ------------------------------------------------------------------
+    # Writing versions
+    # ------------------------------------------------------------------
+    def commit(
+        self,
+        state_dict: Mapping[str, torch.Tensor],
+        version: Optional[str] = None,
+        parent: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        set_current: bool = True,
+    ) -> str:
+        """
+        Store a new version and return its id.
+
+        Only tensors whose content is not already in the store are uploaded.
+        `parent` defaults to the current version, if any.
+        """
+        if version is None:
+            version = self._next_version_id()
+        if self.backend.exists(_manifest_key(version)):
+            raise ValueError(f"Model version already exists: {version}")
+        if parent is None:
+            parent = self.resolve(CURRENT_REF) if self.has_ref(CURRENT_REF) else None
+
+        tensors: Dict[str, TensorEntry] = {}
+        uploaded = 0
+        uploaded_bytes = 0
+        for name, tensor in state_dict.items():
+            raw = tensor_to_bytes(tensor)
+            digest = tensor_digest(tensor, raw=raw)
+            key = _blob_key(digest)
+            if not self.backend.exists(key):
+                self.backend.put(key, raw)
+                uploaded += 1
+                uploaded_bytes += len(raw)
+            tensors[name] = {
+                "blob": digest,
+                "dtype": dtype_name(tensor.dtype),
+                "shape": list(tensor.shape),
+                "group": param_group(name),
+            }
+
+        manifest: Manifest = {
+            "version": version,
+            "parent": parent,
+            "created_at": time.time(),
+            "metadata": dict(metadata or {}),
+            "tensors": tensors,
+        }
+        self.backend.put(_manifest_key(version), json.dumps(manifest).encode())
+        self._manifests[version] = manifest
+        if set_current:
+            self.set_ref(CURRENT_REF, version)
+
+        logger.info(
+            "Committed model version %s (parent=%s): "
+            "%d tensors, %d new blobs (%d bytes)",
+            version,
+            parent,
+            len(tensors),
+            uploaded,
+            uploaded_bytes,
+        )
+        return version
+
+    def _next_version_id(self) -> str:
+        existing = self.list_versions()
+        numbers = [
+            int(v[1:]) for v in existing if v.startswith("v") and v[1:].isdigit()
+        ]
+        return f"v{(max(numbers) + 1) if numbers else 1:06d}"
+
+    # ------------------------------------------------------------------
+    # Refs: rollback / pinning
+    # ------------------------------------------------------------------
+    def set_ref(self, name: str, version: str) -> None:
+        if not self.backend.exists(_manifest_key(version)):
+            raise KeyError(f"Unknown model version: {version}")
+        self.backend.put(_ref_key(name), version.encode())
+        logger.info("Ref %s -> %s", name, version)
+
+    def has_ref(self, name: str) -> bool:
+        return self.backend.exists(_ref_key(name))
+
+    def refs(self) -> Dict[str, str]:
+        return {
+            key[len(REFS_PREFIX):]: self.backend.get(key).decode()
+            for key in self.backend.list(REFS_PREFIX)
+        }
+
+    def resolve(self, ref_or_version: str) -> str:
+        """Return the version id for a ref name or a version id."""
+        if self.has_ref(ref_or_version):
+            return self.backend.get(_ref_key(ref_or_version)).decode()
+        if self.backend.exists(_manifest_key(ref_or_version)):
+            return ref_or_version
+        raise KeyError(f"Unknown model ref or version: {ref_or_version}")
+
+    def rollback(self, version: str) -> None:
+        """Point `current` at an older version. No tensor data is copied."""
+        previous = self.resolve(CURRENT_REF) if self.has_ref(CURRENT_REF) else None
+        self.set_ref(CURRENT_REF, version)
+        logger.warning("Rolled back current model version %s -> %s", previous, version)
+
+    def pin(self, name: str, version: str) -> None:
+        """Pin a named ref (e.g. "stable", "canary") to a version."""
+        self.set_ref(name, self.resolve(version))
+
+    def unpin(self, name: str) -> None:
+        if name == CURRENT_REF:
+            raise ValueError("The current ref cannot be removed")
+        self.backend.delete(_ref_key(name))
+
+    # ------------------------------------------------------------------
+    # Reading versions
+    # ------------------------------------------------------------------
+    def manifest(self, ref_or_version: str) -> Manifest:
+        version = self.resolve(ref_or_version)
+        cached = self._manifests.get(version)
+        if cached is not None:
+            return cached
+        manifest: Manifest = json.loads(self.backend.get(_manifest_key(version)))
+        self._manifests[version] = manifest
+        return manifest
+
+    def list_versions(self) -> List[str]:
+        """Version ids in the store (sorted), from a key listing only."""
+        return sorted(
+            key[len(MANIFESTS_PREFIX):-len(".json")]
+            for key in self.backend.list(MANIFESTS_PREFIX)
+            if key.endswith(".json")
+        )
+
+    def load(
+        self,
+        ref_or_version: str = CURRENT_REF,
+        base_version: Optional[str] = None,
+        base_state: Optional[Mapping[str, torch.Tensor]] = None,
+        groups: Optional[List[str]] = None,
+    ) -> Dict[str, torch.Tensor]:
+        """
+        Materialize a version as a flat state_dict.
+
+        If `base_version` / `base_state` describe tensors already in memory,
+        only tensors whose blob differs are fetched; the rest are reused as-is.
+        `groups` restricts loading to some nested levels (e.g. ["adapters"]).
+        """
+        manifest = self.manifest(ref_or_version)
+        base_entries = (
+            self.manifest(base_version)["tensors"]
+            if base_version is not None and base_state is not None
+            else {}
+        )
+
+        state: Dict[str, torch.Tensor] = {}
+        fetched = 0
+        for name, entry in manifest["tensors"].items():
+            if groups is not None and entry["group"] not in groups:
+                continue
+            base_entry = base_entries.get(name)
+            if (
+                base_state is not None
+                and base_entry is not None
+                and base_entry["blob"] == entry["blob"]
+                and name in base_state
+            ):
+                state[name] = base_state[name]
+                continue
+            raw = self.backend.get(_blob_key(entry["blob"]))
+            state[name] = tensor_from_bytes(raw, entry["dtype"], entry["shape"])
+            fetched += 1
+
+        logger.info(
+            "Loaded model version %s (%d tensors, %d fetched)",
+            manifest["version"],
+            len(state),
+            fetched,
+        )
+        return state
+
+    def diff(self, a: str, b: str) -> VersionDiff:
+        """Compare two versions by blob id, without touching tensor data."""
+        ta = self.manifest(a)["tensors"]
+        tb = self.manifest(b)["tensors"]
+        result = VersionDiff()
+        for name in sorted(set(ta) | set(tb)):
+            if name not in ta:
+                result.added.append(name)
+            elif name not in tb:
+                result.removed.append(name)
+            elif ta[name]["blob"] != tb[name]["blob"]:
+                result.changed.append(name)
+            else:
+                result.unchanged.append(name)
+        return result
+
+    # ------------------------------------------------------------------
+    # Retention / garbage collection
+    # ------------------------------------------------------------------
+    def delete_version(self, version: str) -> None:
+        """Delete a manifest. Blobs are reclaimed by the next `gc()`."""
+        pinned = [name for name, v in self.refs().items() if v == version]
+        if pinned:
+            raise ValueError(f"Model version {version} is still referenced by {pinned}")
+        self.backend.delete(_manifest_key(version))
+        self._manifests.pop(version, None)
+        logger.info("Deleted model version %s", version)
+
+    def gc(self, grace_s: float = 3600.0) -> int:
+        """
+        Delete blobs not referenced by any remaining manifest. Returns the count.
+
+        `commit` uploads blobs before its manifest, so blobs written in the last
+        `grace_s` seconds are kept: they may belong to a commit in flight.
+        That covers new uploads only. A blob that a concurrent commit reuses
+        (deduplicated, not rewritten) can still be collected. Run GC from a
+        single writer, or while no commits are running, on shared backends.
+        """
+        live: set[str] = set()
+        for version in self.list_versions():
+            live.update(e["blob"] for e in self.manifest(version)["tensors"].values())
+
+        cutoff = time.time() - grace_s
+        removed = 0
+        for key in self.backend.list(BLOBS_PREFIX):
+            if key.rsplit("/", 1)[-1] in live:
+                continue
+            if grace_s > 0 and self.backend.modified(key) > cutoff:
+                continue
+            self.backend.delete(key)
+            removed += 1
+        logger.info("Registry GC removed %d unreferenced blobs", removed)
+        return removed
+
+
+def build_registry(config: Dict[str, Any]) -> ModelRegistry:
+    """
+    Build a ModelRegistry from config.
+
+    Expects:
+
+        config["registry"] = {
+            "backend": "local",            # or "s3" (MinIO / S3-compatible)
+            "root": "/var/lib/fednestd/registry",
+            # for "s3":
+            # "bucket": "fednestd-models",
+            # "prefix": "registry",
+            # "endpoint_url": "http://minio.fednestd.svc:9000",
+        }
+    """
+    reg_cfg = config.get("registry", {})
+    if not reg_cfg:
+        raise ValueError("build_registry: config['registry'] is missing or empty")
+
+    backend_name = reg_cfg.get("backend", "local")
+    backend: RegistryBackend
+    if backend_name == "local":
+        backend = LocalFSBackend(reg_cfg.get("root", "registry"))
+    elif backend_name == "s3":
+        if "bucket" not in reg_cfg:
+            raise ValueError("build_registry: 's3' backend requires 'bucket'")
+        backend = S3Backend(
+            bucket=reg_cfg["bucket"],
+            prefix=reg_cfg.get("prefix", ""),
+            endpoint_url=reg_cfg.get("endpoint_url"),
+        )
+    else:
+        raise ValueError(f"Unknown registry backend: {backend_name}")
+
+    logger.info("Using %s model registry backend", backend_name)
+    return ModelRegistry(backend)
@@ -0,0 +1,310 @@
+# src/fednestd/multitenancy/tenancy_manager.py
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from ..observability.logging import get_logger
+from ..observability.metrics import (
+    TENANT_QUEUE_DEPTH,
+    TENANT_QUEUE_LATENCY,
+    TENANT_QUOTA_REJECTIONS,
+    LatencyWindow,
+)
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class TenantQuota:
+    """
+    Per-tenant limits on the shared Tier 1 cluster.
+
+    `cpu_share` is the tenant's weight in the fair-share queue: with shares
+    0.75 / 0.25 and both tenants backlogged, the first gets ~3x the work.
+    `None` means unlimited.
+    """
+
+    cpu_share: float = 1.0
+    max_deltas_per_round: Optional[int] = None
+    storage_bytes: Optional[int] = None
+    kafka_bytes_per_sec: Optional[float] = None
+    kafka_burst_bytes: Optional[float] = None
+
+
+@dataclass
+class TenantJob:
+    tenant: str
+    kind: str  # "aggregation" | "training" | ...
+    fn: Callable[[], Any]
+    cost: float
+    submitted_at: float = field(default_factory=time.perf_counter)
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def consume(self, amount: float, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = now
+        if amount > self.tokens:
+            return False
+        self.tokens -= amount
+        return True
+
+
+class TenancyManager:
+    """
+    Quotas plus a deficit round-robin (DRR) fair queue for Tier 1 work.
+
+    Aggregation and training jobs are submitted per tenant with an estimated
+    cost (e.g. CPU-seconds or number of deltas). Each dispatch round a tenant's
+    deficit grows by `quantum * cpu_share`, and it may run jobs while the
+    deficit covers their cost, so a tenant with a huge backlog cannot delay
+    other tenants by more than one quantum each.
+    """
+
+    def __init__(self, quotas: Dict[str, TenantQuota], quantum: float = 1.0) -> None:
+        if quantum <= 0:
+            raise ValueError("TenancyManager: quantum must be > 0")
+        for tenant, quota in quotas.items():
+            # A zero share never earns deficit, so next_job would spin forever.
+            if not 0 < quota.cpu_share < float("inf"):
+                raise ValueError(f"Tenant {tenant}: cpu_share must be > 0")
+            for name in ("kafka_bytes_per_sec", "kafka_burst_bytes"):
+                value = getattr(quota, name)
+                if value is not None and value < 0:
+                    raise ValueError(f"Tenant {tenant}: {name} must be >= 0")
+        self.quotas = dict(quotas)
+        self.quantum = quantum
+        self._lock = threading.Lock()
+
+        self._queues: Dict[str, Deque[TenantJob]] = {t: deque() for t in quotas}
+        self._deficit: Dict[str, float] = {t: 0.0 for t in quotas}
+        self._active: Deque[str] = deque()
+        self._credited = False  # head of _active already got its quantum
+
+        self._round_deltas: Dict[str, Dict[str, int]] = {t: {} for t in quotas}
+        self._storage_used: Dict[str, int] = {t: 0 for t in quotas}
+        self._kafka: Dict[str, _TokenBucket] = {}
+        for tenant, quota in quotas.items():
+            if quota.kafka_bytes_per_sec is not None:
+                burst = quota.kafka_burst_bytes or quota.kafka_bytes_per_sec
+                self._kafka[tenant] = _TokenBucket(quota.kafka_bytes_per_sec, burst)
+
+        self._latency: Dict[str, LatencyWindow] = {t: LatencyWindow() for t in quotas}
+
+    def _quota(self, tenant: str) -> TenantQuota:
+        try:
+            return self.quotas[tenant]
+        except KeyError:
+            raise ValueError(f"Unknown tenant: {tenant}")
+
+    def _reject(self, tenant: str, quota: str) -> bool:
+        TENANT_QUOTA_REJECTIONS.labels(tenant=tenant, quota=quota).inc()
+        logger.warning("Tenant %s exceeded %s quota", tenant, quota)
+        return False
+
+    # ------------------------------------------------------------------
+    # Quotas
+    # ------------------------------------------------------------------
+    def admit_delta(self, tenant: str, round_id: str) -> bool:
+        """Count one incoming delta against the tenant's per-round quota."""
+        limit = self._quota(tenant).max_deltas_per_round
+        with self._lock:
+            counts = self._round_deltas[tenant]
+            used = counts.get(round_id, 0)
+            if limit is not None and used >= limit:
+                return self._reject(tenant, "deltas_per_round")
+            counts[round_id] = used + 1
+        return True
+
+    def end_round(self, tenant: str, round_id: str) -> None:
+        with self._lock:
+            self._round_deltas[tenant].pop(round_id, None)
+
+    def reserve_storage(self, tenant: str, nbytes: int) -> bool:
+        limit = self._quota(tenant).storage_bytes
+        with self._lock:
+            used = self._storage_used[tenant]
+            if limit is not None and used + nbytes > limit:
+                return self._reject(tenant, "storage")
+            self._storage_used[tenant] = used + nbytes
+        return True
+
+    def release_storage(self, tenant: str, nbytes: int) -> None:
+        with self._lock:
+            self._storage_used[tenant] = max(0, self._storage_used[tenant] - nbytes)
+
+    def consume_kafka(
+        self, tenant: str, nbytes: int, now: Optional[float] = None
+    ) -> bool:
+        """Token-bucket check for a tenant's produce throughput on shared topics."""
+        self._quota(tenant)
+        bucket = self._kafka.get(tenant)
+        if bucket is None:
+            return True
+        with self._lock:
+            ok = bucket.consume(nbytes, now)
+        return ok or self._reject(tenant, "kafka_throughput")
+
+    # ------------------------------------------------------------------
+    # Fair queue (deficit round-robin)
+    # ------------------------------------------------------------------
+    def submit(
+        self,
+        tenant: str,
+        fn: Callable[[], Any],
+        cost: float = 1.0,
+        kind: str = "aggregation",
+    ) -> None:
+        self._quota(tenant)
+        if cost <= 0:
+            raise ValueError("TenancyManager.submit: cost must be > 0")
+        with self._lock:
+            queue = self._queues[tenant]
+            if not queue:
+                self._active.append(tenant)
+            queue.append(TenantJob(tenant=tenant, kind=kind, fn=fn, cost=cost))
+            TENANT_QUEUE_DEPTH.labels(tenant=tenant).set(len(queue))
+
+    def next_job(self) -> Optional[TenantJob]:
+        """Pop the next job in DRR order, or None if every queue is empty."""
+        with self._lock:
+            while self._active:
+                tenant = self._active[0]
+                queue = self._queues[tenant]
+                if not self._credited:
+                    share = self.quotas[tenant].cpu_share
+                    self._deficit[tenant] += self.quantum * share
+                    self._credited = True
+                if queue[0].cost <= self._deficit[tenant]:
+                    job = queue.popleft()
+                    self._deficit[tenant] -= job.cost
+                    if not queue:
+                        # Idle tenants must not bank credit for later bursts.
+                        self._active.popleft()
+                        self._deficit[tenant] = 0.0
+                        self._credited = False
+                    TENANT_QUEUE_DEPTH.labels(tenant=tenant).set(len(queue))
+                    self._record_dispatch(job)
+                    return job
+                self._active.rotate(-1)
+                self._credited = False
+        return None
+
+    def _record_dispatch(self, job: TenantJob) -> None:
+        waited = time.perf_counter() - job.submitted_at
+        TENANT_QUEUE_LATENCY.labels(tenant=job.tenant, kind=job.kind).observe(waited)
+        self._latency[job.tenant].observe(waited)
+
+    def run_pending(self, limit: Optional[int] = None) -> int:
+        """Run queued jobs in fair-share order on the calling thread."""
+        ran = 0
+        while limit is None or ran < limit:
+            job = self.next_job()
+            if job is None:
+                break
+            try:
+                job.fn()
+            except Exception:
+                logger.exception("Job for tenant %s (%s) failed", job.tenant, job.kind)
+            ran += 1
+        return ran
+
+    def queue_depths(self) -> Dict[str, int]:
+        with self._lock:
+            return {t: len(q) for t, q in self._queues.items()}
+
+    def queue_latency_percentiles(self, tenant: str) -> Dict[str, float]:
+        self._quota(tenant)
+        return self._latency[tenant].percentiles()
+
+    # ------------------------------------------------------------------
+    # Partition isolation on shared topics
+    # ------------------------------------------------------------------
+    def tenant_partitions(self, tenant: str, num_partitions: int) -> List[int]:
+        """
+        Contiguous partition range reserved for a tenant on a shared topic.
+
+        Ranges are sized by `cpu_share` (at least one partition each), so a
+        backlogged tenant only fills its own partitions and consumers of other
+        tenants never wait behind it.
+        """
+        self._quota(tenant)
+        tenants = sorted(self.quotas)
+        if num_partitions < len(tenants):
+            raise ValueError(
+                f"Need at least {len(tenants)} partitions to isolate "
+                f"{len(tenants)} tenants"
+            )
+        total_share = sum(self.quotas[t].cpu_share for t in tenants)
+        spare = num_partitions - len(tenants)
+        start = 0
+        for t in tenants:
+            extra = int(spare * self.quotas[t].cpu_share / total_share)
+            count = 1 + extra
+            if t == tenants[-1]:
+                count = num_partitions - start
+            if t == tenant:
+                return list(range(start, start + count))
+            start += count
+        raise AssertionError("unreachable")
+
+    def partition_for(self, tenant: str, key: str, num_partitions: int) -> int:
+        """Stable partition for `key` (e.g. client id) inside the tenant's range."""
+        owned = self.tenant_partitions(tenant, num_partitions)
+        digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+        return owned[int.from_bytes(digest, "big") % len(owned)]
+
+    @staticmethod
+    def partition_key(tenant: str, key: str) -> bytes:
+        """Message key for shared topics: tenant-prefixed so keys never collide."""
+        return f"{tenant}/{key}".encode()
+
+
+def build_tenancy_manager(config: Dict[str, Any]) -> TenancyManager:
+    """
+    Build a TenancyManager from config.
+
+    Expects:
+
+        config["tenancy"] = {
+            "quantum": 1.0,
+            "tenants": {
+                "acme":   {"cpu_share": 0.75, "max_deltas_per_round": 50000,
+                           "storage_bytes": 500_000_000_000,
+                           "kafka_bytes_per_sec": 50_000_000},
+                "globex": {"cpu_share": 0.25},
+            },
+        }
+    """
+    ten_cfg = config.get("tenancy", {})
+    tenants_cfg: Dict[str, Dict[str, Any]] = ten_cfg.get("tenants", {})
+    if not tenants_cfg:
+        raise ValueError(
+            "build_tenancy_manager: config['tenancy']['tenants'] is missing or empty"
+        )
+
+    quotas: Dict[str, TenantQuota] = {}
+    for name, q in tenants_cfg.items():
+        quotas[name] = TenantQuota(
+            cpu_share=float(q.get("cpu_share", 1.0)),
+            max_deltas_per_round=q.get("max_deltas_per_round"),
+            storage_bytes=q.get("storage_bytes"),
+            kafka_bytes_per_sec=q.get("kafka_bytes_per_sec"),
+            kafka_burst_bytes=q.get("kafka_burst_bytes"),
+        )
+
+    logger.info("Configured %d tenants: %s", len(quotas), sorted(quotas))
+    return TenancyManager(quotas, quantum=float(ten_cfg.get("quantum", 1.0)))
@@ -1,13 +1,196 @@
 # src/fednestd/networking/haproxy_config.py
 from __future__ import annotations
 
+import math
+import string
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Set, Tuple
 
 from ..observability.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Edge clients must send their id in this header; HAProxy hashes it to pick
+# a FedServer shard.
+CLIENT_ID_HEADER = "X-Fednestd-Client-Id"
+
+# Per-shard connection headroom over an even split of max_clients, so the
+# remaining shards can absorb part of a failed shard's clients.
+_SHARD_HEADROOM = 1.25
+
+_DEFAULTS: Dict[str, Any] = {
+    "bind_port": 8080,
+    "kafka_bind_port": 9092,
+    "max_clients": 10000,
+    "kafka_maxconn": 1024,
+    "health_check_path": "/healthz",
+    "health_check_interval": "2s",
+    "connect_timeout": "5s",
+    "client_timeout": "60s",
+    "server_timeout": "120s",
+    "queue_timeout": "30s",
+    "keepalive_timeout": "30s",
+}
+
+
+def _template_path() -> Path:
+    return (
+        Path(__file__).resolve().parent.parent  # -> src/fednestd
+        / "infra"
+        / "config_templates"
+        / "haproxy.cfg.j2"
+    )
+
+
+def _template_fields(template_text: str) -> Set[str]:
+    return {
+        name
+        for _, name, _, _ in string.Formatter().parse(template_text)
+        if name is not None
+    }
+
+
+def _backends(hap: Dict[str, Any]) -> List[Dict[str, Any]]:
+    if "fedserver_backends" in hap:
+        return [dict(b) for b in hap["fedserver_backends"]]
+    return [
+        {
+            "name": "fed1",
+            "host": hap.get("fedserver_host", "127.0.0.1"),
+            "port": hap.get("fedserver_port", 8080),
+        }
+    ]
+
+
+def _brokers(hap: Dict[str, Any]) -> List[str]:
+    if "kafka_brokers" in hap:
+        return list(hap["kafka_brokers"])
+    return [hap.get("kafka_broker", "127.0.0.1:9092")]
+
+
+def _valid_port(port: Any) -> bool:
+    return isinstance(port, int) and 0 < port < 65536
+
+
+# Hosts that reach HAProxy itself when it binds *:<port>.
+_SELF_HOSTS = {"localhost", "::1", "::", "0.0.0.0", "*", ""}
+
+
+def _is_self(host: str) -> bool:
+    host = host.strip("[]").lower()
+    return host in _SELF_HOSTS or host.startswith("127.")
+
+
+def validate_haproxy_profile(hap: Dict[str, Any]) -> List[str]:
+    """Return every problem found in an HAProxy profile (empty list = valid)."""
+    errors: List[str] = []
+    backends = _backends(hap)
+    if not backends:
+        errors.append("fedserver_backends is empty")
+    names: Set[str] = set()
+    addrs: Set[Tuple[str, int]] = set()
+    for i, b in enumerate(backends):
+        label = b.get("name", f"#{i}")
+        if not b.get("name") or not str(b["name"]).replace("-", "").isalnum():
+            errors.append(f"backend {label}: name must be alphanumeric (dashes ok)")
+        elif b["name"] in names:
+            errors.append(f"backend {label}: duplicate name")
+        names.add(str(b.get("name")))
+        if not b.get("host"):
+            errors.append(f"backend {label}: host is missing")
+        if not _valid_port(b.get("port")):
+            errors.append(f"backend {label}: invalid port {b.get('port')!r}")
+        addr = (str(b.get("host")), b.get("port"))
+        if addr in addrs:
+            errors.append(f"backend {label}: duplicate address {addr[0]}:{addr[1]}")
+        addrs.add(addr)  # type: ignore[arg-type]
+        weight = b.get("weight", 1)
+        if not isinstance(weight, int) or not 1 <= weight <= 256:
+            errors.append(f"backend {label}: weight must be 1-256, got {weight!r}")
+
+    brokers = _brokers(hap)
+    if not brokers:
+        errors.append("kafka_brokers is empty")
+    for broker in brokers:
+        host, _, port = str(broker).rpartition(":")
+        if not host or not port.isdigit() or not _valid_port(int(port)):
+            errors.append(f"kafka broker {broker!r} must be host:port")
+
+    for key in ("bind_port", "kafka_bind_port"):
+        if key in hap and not _valid_port(hap[key]):
+            errors.append(f"{key}: invalid port {hap[key]!r}")
+    if hap.get("bind_port", _DEFAULTS["bind_port"]) == hap.get(
+        "kafka_bind_port", _DEFAULTS["kafka_bind_port"]
+    ):
+        errors.append("bind_port and kafka_bind_port must differ")
+    # With the single-backend defaults, a profile without a haproxy section
+    # would proxy *:8080 to 127.0.0.1:8080, i.e. to itself.
+    bind_ports = {
+        hap.get("bind_port", _DEFAULTS["bind_port"]),
+        hap.get("kafka_bind_port", _DEFAULTS["kafka_bind_port"]),
+    }
+    for b in backends:
+        if _is_self(str(b.get("host"))) and b.get("port") in bind_ports:
+            errors.append(
+                f"backend {b.get('name')}: {b.get('host')}:{b.get('port')} "
+                "is HAProxy's own listener (proxy loop)"
+            )
+    for broker in brokers:
+        host, _, port = str(broker).rpartition(":")
+        if _is_self(host) and port.isdigit() and int(port) in bind_ports:
+            errors.append(
+                f"kafka broker {broker} is HAProxy's own listener (proxy loop)"
+            )
+    for key in ("max_clients", "kafka_maxconn", "server_maxconn", "server_maxqueue"):
+        if key in hap and (not isinstance(hap[key], int) or hap[key] < 1):
+            errors.append(f"{key} must be a positive integer, got {hap[key]!r}")
+    factor = hap.get("hash_balance_factor")
+    if factor is not None and (not isinstance(factor, int) or factor <= 100):
+        errors.append(f"hash_balance_factor must be an integer > 100, got {factor!r}")
+    if hap.get("bind_port", _DEFAULTS["bind_port"]) == 443 and not hap.get("tls_cert"):
+        errors.append("bind_port 443 needs tls_cert (TLS terminated at HAProxy)")
+    cert = hap.get("tls_cert")
+    if cert is not None and not str(cert).startswith("/"):
+        errors.append(f"tls_cert must be an absolute path, got {cert!r}")
+    if hap.get("backend_tls"):
+        if not str(hap.get("backend_ca_file", "")).startswith("/"):
+            errors.append("backend_tls needs an absolute backend_ca_file path")
+    else:
+        for b in backends:
+            if b.get("port") == 443:
+                errors.append(
+                    f"backend {b.get('name')}: port 443 needs backend_tls "
+                    "(plain HTTP health checks would mark it down)"
+                )
+    path = hap.get("health_check_path", _DEFAULTS["health_check_path"])
+    if not str(path).startswith("/") or " " in str(path):
+        errors.append(f"health_check_path must be an absolute URL path, got {path!r}")
+    return errors
+
+
+def _server_lines(hap: Dict[str, Any], backends: List[Dict[str, Any]]) -> List[str]:
+    max_clients = int(hap.get("max_clients", _DEFAULTS["max_clients"]))
+    total_weight = sum(int(b.get("weight", 1)) for b in backends)
+    lines = []
+    for b in backends:
+        weight = int(b.get("weight", 1))
+        maxconn = hap.get("server_maxconn") or math.ceil(
+            max_clients * weight / total_weight * _SHARD_HEADROOM
+        )
+        maxqueue = hap.get("server_maxqueue") or maxconn
+        # `ssl` also applies to health checks; verifyhost pins the shard name.
+        tls = (
+            f" ssl verify required ca-file {hap['backend_ca_file']} "
+            f"verifyhost {b['host']}"
+            if hap.get("backend_tls")
+            else ""
+        )
+        lines.append(
+            f"    server {b['name']} {b['host']}:{b['port']} "
+            f"weight {weight} maxconn {maxconn} maxqueue {maxqueue}{tls}"
+        )
+    return lines
+
 
 def render_haproxy_config(profile: Dict[str, Any]) -> str:
     """
@@ -18,45 +201,83 @@ def render_haproxy_config(profile: Dict[str, Any]) -> str:
 
     {
       "haproxy": {
-        "fedserver_host": "fedserver.prod.local",
-        "fedserver_port": 443,
-        "kafka_broker": "kafka.prod.local:9092"
+        "fedserver_backends": [
+          {"name": "fed1", "host": "fedserver-1.prod.local", "port": 443},
+          {"name": "fed2", "host": "fedserver-2.prod.local", "port": 443, "weight": 2}
+        ],
+        "kafka_brokers": ["kafka-1.prod.local:9092"],
+        "max_clients": 60000,
+        "bind_port": 443,
+        "tls_cert": "/etc/haproxy/certs/fedserver.pem",
+        "backend_tls": true,
+        "backend_ca_file": "/etc/haproxy/certs/fedserver-ca.pem"
       }
     }
-    """
-
-    template_path = (
-        Path(__file__)
-        .resolve()
-        .parent.parent          # -> src/fednestd
-        / "infra"
-        / "config_templates"
-        / "haproxy.cfg.j2"
-    )
 
+    Port 443 (frontend or shard) requires TLS: `tls_cert` terminates it at
+    HAProxy and `backend_tls` re-encrypts to the shards. The older
+    single-backend keys (fedserver_host, fedserver_port, kafka_broker) are
+    still accepted. Raises ValueError listing every profile problem, or
+    any mismatch between the template's placeholders and the values the
+    renderer provides.
+    """
+    template_path = _template_path()
     if not template_path.exists():
         raise FileNotFoundError(f"HAProxy template not found at {template_path}")
-
     template_text = template_path.read_text()
 
     hap = profile.get("haproxy", {})
+    errors = validate_haproxy_profile(hap)
+    if errors:
+        raise ValueError("Invalid HAProxy profile:\n  - " + "\n  - ".join(errors))
 
-    fedserver_host = hap.get("fedserver_host", "127.0.0.1")
-    fedserver_port = hap.get("fedserver_port", 8080)
-    kafka_broker  = hap.get("kafka_broker", "127.0.0.1:9092")
+    backends = _backends(hap)
+    brokers = _brokers(hap)
+    settings = {**_DEFAULTS, **hap}
+    balance_factor = hap.get("hash_balance_factor")
+    values = {
+        "GLOBAL_MAXCONN": settings["max_clients"] + settings["kafka_maxconn"],
+        "FEDSERVER_MAXCONN": settings["max_clients"],
+        "KAFKA_MAXCONN": settings["kafka_maxconn"],
+        "FEDSERVER_BIND_PORT": settings["bind_port"],
+        "FEDSERVER_BIND_TLS": (
+            f" ssl crt {hap['tls_cert']} alpn h2,http/1.1"
+            if hap.get("tls_cert")
+            else ""
+        ),
+        "KAFKA_BIND_PORT": settings["kafka_bind_port"],
+        "CLIENT_ID_HEADER": CLIENT_ID_HEADER,
+        "HEALTH_CHECK_PATH": settings["health_check_path"],
+        "HEALTH_CHECK_INTERVAL": settings["health_check_interval"],
+        "CONNECT_TIMEOUT": settings["connect_timeout"],
+        "CLIENT_TIMEOUT": settings["client_timeout"],
+        "SERVER_TIMEOUT": settings["server_timeout"],
+        "QUEUE_TIMEOUT": settings["queue_timeout"],
+        "KEEPALIVE_TIMEOUT": settings["keepalive_timeout"],
+        # Optional bounded-load consistent hashing; off by default because it
+        # moves clients off an overloaded shard.
+        "HASH_BALANCE_FACTOR": (
+            f"    hash-balance-factor {int(balance_factor)}\n" if balance_factor else ""
+        ),
+        "FEDSERVER_SERVERS": "\n".join(_server_lines(hap, backends)),
+        "KAFKA_SERVERS": "\n".join(
+            f"    server kafka{i + 1} {broker}" for i, broker in enumerate(brokers)
+        ),
+    }
 
-    logger.info(
-        "Rendering HAProxy config with host=%s port=%s kafka=%s",
-        fedserver_host,
-        fedserver_port,
-        kafka_broker,
-    )
+    fields = _template_fields(template_text)
+    missing = fields - set(values)
+    unused = set(values) - fields
+    if missing or unused:
+        raise ValueError(
+            f"HAProxy template {template_path} does not match the renderer: "
+            f"unknown placeholders {sorted(missing)}, unused values {sorted(unused)}"
+        )
 
-    # Template must use {FEDSERVER_HOST}, {FEDSERVER_PORT}, {KAFKA_BROKER}
-    rendered = template_text.format(
-        FEDSERVER_HOST=fedserver_host,
-        FEDSERVER_PORT=fedserver_port,
-        KAFKA_BROKER=kafka_broker,
+    logger.info(
+        "Rendering HAProxy config with %d FedServer shard(s) %s and %d Kafka broker(s)",
+        len(backends),
+        [f"{b['host']}:{b['port']}" for b in backends],
+        len(brokers),
     )
-
-    return rendered
\ No newline at end of file
+    return template_text.format(**values)
@@ -0,0 +1,86 @@
+# src/fednestd/observability/metrics.py
+from __future__ import annotations
+
+from collections import deque
+from typing import Deque, Dict, Iterable
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Prometheus metrics are process-global; define them once here and import
+# them where needed, so a module reload never registers a duplicate name.
+
+# Buckets tuned for scheduler queueing delays (sub-millisecond to minutes).
+_QUEUE_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0, 120.0)
+
+TENANT_QUEUE_LATENCY = Histogram(
+    "fednestd_tenant_queue_latency_seconds",
+    "Time a tenant's aggregation/training job waited in the fair-share queue",
+    ["tenant", "kind"],
+    buckets=_QUEUE_BUCKETS,
+)
+TENANT_QUEUE_DEPTH = Gauge(
+    "fednestd_tenant_queue_depth",
+    "Jobs currently queued per tenant",
+    ["tenant"],
+)
+TENANT_QUOTA_REJECTIONS = Counter(
+    "fednestd_tenant_quota_rejections_total",
+    "Requests rejected because a tenant quota was exhausted",
+    ["tenant", "quota"],
+)
+
+
+class LatencyWindow:
+    """
+    Bounded window of recent latency samples with percentile queries.
+
+    Prometheus histograms are the export path; this keeps exact recent
+    percentiles in-process for logs, tests and admin endpoints.
+    """
+
+    def __init__(self, maxlen: int = 4096) -> None:
+        self._samples: Deque[float] = deque(maxlen=maxlen)
+
+    def observe(self, value: float) -> None:
+        self._samples.append(value)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentiles(self, qs: Iterable[float] = (50, 95, 99)) -> Dict[str, float]:
+        if not self._samples:
+            return {}
+        ordered = sorted(self._samples)
+        last = len(ordered) - 1
+        return {f"p{q:g}": ordered[min(last, int(round(q / 100 * last)))] for q in qs}
+
+
+_DECISION_BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 0.01)
+
+POLICY_DECISION_LATENCY = Histogram(
+    "fednestd_policy_decision_latency_seconds",
+    "Local policy decision latency (Ranger-style PDP)",
+    ["source"],  # "cache" | "index"
+    buckets=_DECISION_BUCKETS,
+)
+POLICY_DECISIONS = Counter(
+    "fednestd_policy_decisions_total",
+    "Policy decisions by outcome",
+    ["action", "decision"],
+)
+POLICY_LAST_SYNC = Gauge(
+    "fednestd_policy_last_sync_timestamp_seconds",
+    "Unix time of the last successful policy bundle sync",
+)
+POLICY_SYNC_FAILURES = Counter(
+    "fednestd_policy_sync_failures_total",
+    "Failed policy bundle syncs (last known bundle kept in service)",
+)
+
+
+WORKFLOW_STAGE_SECONDS = Histogram(
+    "fednestd_workflow_stage_seconds",
+    "Wall time per workflow stage and cycle (cache hits included)",
+    ["workflow", "stage", "cached"],
+    buckets=(0.01, 0.1, 1.0, 10.0, 60.0, 300.0, 1800.0, 7200.0, 28800.0),
+)
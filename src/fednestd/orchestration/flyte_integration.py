@@ -0,0 +1,108 @@
+# src/fednestd/orchestration/flyte_integration.py
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Optional
+
+from ..observability.logging import get_logger
+from .workflows import Workflow, resolve_ref
+
+logger = get_logger(__name__)
+
+try:  # Flyte is optional; the LocalExecutor covers clusters without it.
+    import flytekit
+    from flytekit import ImperativeWorkflow
+except ImportError:  # pragma: no cover - exercised only without flytekit
+    flytekit = None
+    ImperativeWorkflow = None
+
+# Bump when stage semantics change so Flyte's own cache is invalidated.
+STAGE_CACHE_VERSION = "1"
+
+
+def flyte_available() -> bool:
+    return flytekit is not None
+
+
+def run_stage_json(
+    stage_name: str,
+    stage_ref: str,
+    config_keys: Optional[List[str]],
+    config_json: str,
+    input_version: str,
+    upstream: List[str],
+) -> str:
+    """
+    Run one stage from JSON inputs; the body of the Flyte task.
+
+    `upstream` holds the JSON outputs of the dependency stages, each tagged
+    with its stage name, and `config_keys` (None = whole config, empty = no
+    config) mirrors Stage.config_keys so stages see the same config and
+    input version as in LocalExecutor.
+    """
+    config: Dict[str, Any] = json.loads(config_json)
+    if config_keys is not None:
+        config = {k: config[k] for k in config_keys if k in config}
+    deps: Dict[str, Any] = {}
+    for raw in upstream:
+        item = json.loads(raw)
+        deps[item["stage"]] = item["output"]
+    output = resolve_ref(stage_ref)(config, deps, input_version)
+    return json.dumps({"stage": stage_name, "output": output}, default=str)
+
+
+if flytekit is not None:
+
+    @flytekit.task(cache=True, cache_version=STAGE_CACHE_VERSION)  # type: ignore[untyped-decorator]
+    def fednestd_stage(
+        stage_name: str,
+        stage_ref: str,
+        config_keys: Optional[List[str]],
+        config_json: str,
+        input_version: str,
+        upstream: List[str],
+    ) -> str:
+        # Flyte's cache key covers every input, matching the LocalExecutor's
+        # (config, input version, upstream) key.
+        return run_stage_json(
+            stage_name, stage_ref, config_keys, config_json, input_version, upstream
+        )
+
+
+def compile_to_flyte(workflow: Workflow) -> Any:
+    """
+    Compile a Workflow into a Flyte ImperativeWorkflow.
+
+    The result takes `config_json` and `input_version` inputs; every stage
+    becomes a cached `fednestd_stage` task node wired to its dependencies,
+    so Flyte runs independent stages in parallel and skips unchanged ones.
+    """
+    if flytekit is None:
+        raise ImportError(
+            "compile_to_flyte requires flytekit; install it or use "
+            "orchestration.workflows.LocalExecutor"
+        )
+    wf = ImperativeWorkflow(name=f"fednestd.{workflow.name}")
+    config_json = wf.add_workflow_input("config_json", str)
+    input_version = wf.add_workflow_input("input_version", str)
+
+    nodes: Dict[str, Any] = {}
+    for name in workflow.order:
+        stage = workflow.stages[name]
+        nodes[name] = wf.add_entity(
+            fednestd_stage,
+            stage_name=name,
+            stage_ref=stage.ref,
+            config_keys=(
+                list(stage.config_keys) if stage.config_keys is not None else None
+            ),
+            config_json=config_json,
+            input_version=input_version,
+            upstream=[nodes[d].outputs["o0"] for d in stage.deps],
+        )
+    depended_on = {d for s in workflow.stages.values() for d in s.deps}
+    for name in workflow.order:
+        if name not in depended_on:
+            wf.add_workflow_output(name, nodes[name].outputs["o0"], python_type=str)
+    logger.info("Compiled workflow %s to Flyte (%d stages)", workflow.name, len(nodes))
+    return wf
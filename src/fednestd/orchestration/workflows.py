@@ -0,0 +1,425 @@
+# src/fednestd/orchestration/workflows.py
+from __future__ import annotations
+
+import hashlib
+import importlib
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+from ..observability.logging import get_logger
+from ..observability.metrics import WORKFLOW_STAGE_SECONDS
+
+logger = get_logger(__name__)
+
+
+# A workflow is a DAG of stages. Each stage function takes
+# (config, upstream, input_version) and returns a small JSON-serializable
+# summary, where `upstream` maps dependency stage names to their summaries and
+# `input_version` is the data/model version the cycle consumes. Heavy
+# artifacts (checkpoints, deltas) live in the model registry, not in stage
+# outputs, so the same DAG runs locally or on Flyte.
+StageFn = Callable[[Dict[str, Any], Dict[str, Any], str], Dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    fn: StageFn
+    deps: Sequence[str] = ()
+    # Top-level config sections the stage reads; None means the whole config.
+    # Only these sections feed the stage's cache key.
+    config_keys: Optional[Sequence[str]] = None
+    cache: bool = True
+
+    @property
+    def ref(self) -> str:
+        """Import path of the stage function ("module:qualname")."""
+        return f"{self.fn.__module__}:{self.fn.__qualname__}"
+
+
+def resolve_ref(ref: str) -> Any:
+    module, _, qualname = ref.partition(":")
+    obj: Any = importlib.import_module(module)
+    for part in qualname.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def config_hash(config: Mapping[str, Any], keys: Optional[Sequence[str]] = None) -> str:
+    """Stable hash of `config` (or of the given top-level sections)."""
+    if keys is not None:
+        config = {k: config.get(k) for k in sorted(keys)}
+    blob = json.dumps(config, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def stage_config(stage: Stage, config: Dict[str, Any]) -> Dict[str, Any]:
+    if stage.config_keys is None:
+        return config
+    return {k: config[k] for k in stage.config_keys if k in config}
+
+
+class Workflow:
+    """A named DAG of stages, validated on construction."""
+
+    def __init__(self, name: str, stages: Sequence[Stage]) -> None:
+        self.name = name
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Workflow {name}: duplicate stage {stage.name!r}")
+            self.stages[stage.name] = stage
+        for stage in stages:
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(
+                        f"Workflow {name}: stage {stage.name!r} depends on "
+                        f"unknown stage {dep!r}"
+                    )
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        indegree = {n: len(s.deps) for n, s in self.stages.items()}
+        ready = [n for n, d in indegree.items() if d == 0]
+        order: List[str] = []
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for other in self.stages.values():
+                if name in other.deps:
+                    indegree[other.name] -= 1
+                    if indegree[other.name] == 0:
+                        ready.append(other.name)
+        if len(order) != len(self.stages):
+            raise ValueError(f"Workflow {self.name}: stages form a cycle")
+        return order
+
+
+class StageCache:
+    """Memoized stage outputs on disk, one JSON file per cache key."""
+
+    def __init__(self, root: Path | str) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, stage: str, key: str) -> Path:
+        return self.root / stage / f"{key}.json"
+
+    def get(self, stage: str, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(stage, key)
+        if not path.exists():
+            return None
+        output: Dict[str, Any] = json.loads(path.read_text())
+        return output
+
+    def put(self, stage: str, key: str, output: Dict[str, Any]) -> None:
+        path = self._path(stage, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(output, sort_keys=True, default=str))
+        tmp.replace(path)
+
+
+@dataclass
+class StageTiming:
+    stage: str
+    seconds: float
+    cached: bool
+    cache_key: str
+
+
+@dataclass
+class CycleReport:
+    workflow: str
+    input_version: str
+    seconds: float
+    stages: List[StageTiming] = field(default_factory=list)
+    outputs: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    @property
+    def cache_hits(self) -> int:
+        return sum(1 for s in self.stages if s.cached)
+
+
+def _run_stage(
+    ref: str,
+    config: Dict[str, Any],
+    upstream: Dict[str, Any],
+    input_version: str,
+) -> Any:
+    # Module-level so it pickles into pool workers; the stage function is
+    # re-imported by reference on the worker side.
+    start = time.perf_counter()
+    output = resolve_ref(ref)(config, upstream, input_version)
+    return output, time.perf_counter() - start
+
+
+class LocalExecutor:
+    """
+    Run a workflow on this machine without Flyte.
+
+    Stages whose dependencies are satisfied run concurrently on a process
+    pool (`max_workers=0` runs them inline, in topological order). A stage is
+    skipped when its cache key is unchanged: the key covers the stage's
+    config sections, the cycle's input version and its upstream stages' keys,
+    so an upstream change invalidates everything downstream of it.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[StageCache] = None,
+        max_workers: int = 0,
+        timings_log: Optional[Path | str] = None,
+    ) -> None:
+        self.cache = cache
+        self.max_workers = max_workers
+        self.timings_log = Path(timings_log) if timings_log is not None else None
+        self.history: List[CycleReport] = []
+
+    @staticmethod
+    def cache_key(
+        stage: Stage,
+        config: Mapping[str, Any],
+        input_version: str,
+        upstream_keys: Mapping[str, str],
+    ) -> str:
+        h = hashlib.sha256()
+        h.update(stage.ref.encode())
+        h.update(config_hash(config, stage.config_keys).encode())
+        h.update(input_version.encode())
+        for dep in sorted(upstream_keys):
+            h.update(f"{dep}={upstream_keys[dep]}".encode())
+        return h.hexdigest()
+
+    def run(
+        self,
+        workflow: Workflow,
+        config: Dict[str, Any],
+        input_version: str,
+    ) -> CycleReport:
+        start = time.perf_counter()
+        report = CycleReport(workflow.name, input_version, 0.0)
+        keys: Dict[str, str] = {}
+        pending = list(workflow.order)
+        running: Dict[Future[Any], str] = {}
+        pool = (
+            ProcessPoolExecutor(max_workers=self.max_workers)
+            if self.max_workers > 0
+            else None
+        )
+
+        def finish(
+            name: str, output: Dict[str, Any], seconds: float, hit: bool
+        ) -> None:
+            report.outputs[name] = output
+            report.stages.append(StageTiming(name, seconds, hit, keys[name]))
+            WORKFLOW_STAGE_SECONDS.labels(
+                workflow=workflow.name, stage=name, cached=str(hit).lower()
+            ).observe(seconds)
+            if not hit and self.cache is not None and workflow.stages[name].cache:
+                self.cache.put(name, keys[name], output)
+            logger.info(
+                "Workflow %s stage %s %s in %.3fs",
+                workflow.name,
+                name,
+                "cached" if hit else "ran",
+                seconds,
+            )
+
+        try:
+            while pending or running:
+                launched = False
+                for name in list(pending):
+                    stage = workflow.stages[name]
+                    if any(d not in report.outputs for d in stage.deps):
+                        continue
+                    pending.remove(name)
+                    launched = True
+                    keys[name] = self.cache_key(
+                        stage,
+                        config,
+                        input_version,
+                        {d: keys[d] for d in stage.deps},
+                    )
+                    hit = (
+                        self.cache.get(name, keys[name])
+                        if self.cache is not None and stage.cache
+                        else None
+                    )
+                    if hit is not None:
+                        finish(name, hit, 0.0, True)
+                        continue
+                    upstream = {d: report.outputs[d] for d in stage.deps}
+                    args = (
+                        stage.ref,
+                        stage_config(stage, config),
+                        upstream,
+                        input_version,
+                    )
+                    if pool is None:
+                        output, seconds = _run_stage(*args)
+                        finish(name, output, seconds, False)
+                    else:
+                        running[pool.submit(_run_stage, *args)] = name
+                if launched:
+                    continue
+                if not running:
+                    if pending:
+                        raise RuntimeError(
+                            f"Workflow {workflow.name} stalled: {pending}"
+                        )
+                    break
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    name = running.pop(fut)
+                    output, seconds = fut.result()
+                    finish(name, output, seconds, False)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        report.seconds = time.perf_counter() - start
+        self.history.append(report)
+        if self.timings_log is not None:
+            self.timings_log.parent.mkdir(parents=True, exist_ok=True)
+            record = {
+                "ts": time.time(),
+                "workflow": report.workflow,
+                "input_version": report.input_version,
+                "seconds": report.seconds,
+                "stages": [asdict(s) for s in report.stages],
+            }
+            with open(self.timings_log, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        logger.info(
+            "Workflow %s cycle for %s done in %.3fs (%d/%d stages cached)",
+            workflow.name,
+            input_version,
+            report.seconds,
+            report.cache_hits,
+            len(report.stages),
+        )
+        return report
+
+
+# ----------------------------------------------------------------------
+# Federation cycle: core update + expert aggregation -> evaluate -> rollout
+# ----------------------------------------------------------------------
+def core_update_stage(
+    config: Dict[str, Any], upstream: Dict[str, Any], input_version: str
+) -> Dict[str, Any]:
+    from ..training.tier1_trainer import run_core_update
+
+    run_core_update(config)
+    return {"stage": "core_update", "completed": True}
+
+
+def expert_aggregation_stage(
+    config: Dict[str, Any], upstream: Dict[str, Any], input_version: str
+) -> Dict[str, Any]:
+    from ..training.aggregation import run_expert_aggregation
+
+    run_expert_aggregation(config)
+    return {"stage": "aggregate_experts", "completed": True}
+
+
+def evaluation_stage(
+    config: Dict[str, Any], upstream: Dict[str, Any], input_version: str
+) -> Dict[str, Any]:
+    """
+    Gate the cycle's input version (the candidate) against the baseline.
+    Needs config["evaluation"]["eval_fn"] ("module:function") and "shards";
+    without them the gate is skipped. With config["registry"], both sides are
+    resolved to version ids first: baseline outputs are cached per version, and
+    the baseline ref ("production") moves with every rollout.
+    """
+    from ..model.registry import build_registry
+    from ..training.evaluation import build_evaluation_engine
+
+    eval_cfg = config.get("evaluation", {})
+    if "eval_fn" not in eval_cfg or not eval_cfg.get("shards"):
+        logger.warning("No evaluation.eval_fn/shards configured; skipping gate")
+        return {"decision": "skipped"}
+    candidate = input_version
+    baseline = str(eval_cfg.get("baseline", "production"))
+    if "registry" in config:
+        registry = build_registry(config)
+        candidate = registry.resolve(candidate)
+        baseline = registry.resolve(baseline)
+    engine = build_evaluation_engine(config, resolve_ref(eval_cfg["eval_fn"]))
+    report = engine.compare(
+        candidate=candidate,
+        baseline=baseline,
+        shards=list(eval_cfg["shards"]),
+    )
+    return {
+        "decision": report.decision,
+        "candidate": report.candidate,
+        "baseline": report.baseline,
+        "mean_loss_delta": report.mean_loss_delta,
+        "fraction_evaluated": report.fraction_evaluated,
+    }
+
+
+def rollout_stage(
+    config: Dict[str, Any], upstream: Dict[str, Any], input_version: str
+) -> Dict[str, Any]:
+    """Point the rollout ref at the input version if evaluation accepted it."""
+    from ..model.registry import build_registry
+
+    evaluation = upstream.get("evaluate", {})
+    if evaluation.get("decision") != "accept" or "registry" not in config:
+        return {"rolled_out": False, "reason": evaluation.get("decision", "no-eval")}
+    registry = build_registry(config)
+    ref = str(config.get("rollout", {}).get("ref", "production"))
+    version = registry.resolve(input_version)
+    registry.set_ref(ref, version)
+    return {"rolled_out": True, "ref": ref, "version": version}
+
+
+def federation_cycle() -> Workflow:
+    """The Tier 1 cycle; core update and expert aggregation run in parallel."""
+    return Workflow(
+        "federation_cycle",
+        [
+            Stage("core_update", core_update_stage),
+            Stage("aggregate_experts", expert_aggregation_stage),
+            Stage(
+                "evaluate",
+                evaluation_stage,
+                deps=("core_update", "aggregate_experts"),
+                config_keys=("evaluation", "registry"),
+            ),
+            Stage(
+                "rollout",
+                rollout_stage,
+                deps=("evaluate",),
+                config_keys=("registry", "rollout"),
+            ),
+        ],
+    )
+
+
+def build_local_executor(config: Dict[str, Any]) -> LocalExecutor:
+    """
+    Build a LocalExecutor from config.
+
+    Expects:
+
+        config["workflows"] = {
+            "cache_dir": "/var/lib/fednestd/workflow_cache",   # optional
+            "max_workers": 2,                                  # 0 = inline
+            "timings_log": "/var/log/fednestd/cycles.jsonl",   # optional
+        }
+    """
+    wf_cfg = config.get("workflows", {})
+    cache_dir = wf_cfg.get("cache_dir")
+    return LocalExecutor(
+        cache=StageCache(cache_dir) if cache_dir else None,
+        max_workers=int(wf_cfg.get("max_workers", 0)),
+        timings_log=wf_cfg.get("timings_log"),
+    )
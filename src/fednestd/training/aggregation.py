@@ -1,7 +1,20 @@
 # src/fednestd/training/aggregation.py
 from __future__ import annotations
 
-from typing import Dict, Any
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+
+import torch
+
+from ..federation.messages import (
+    DeltaHeader,
+    PartialHeader,
+    decode_delta,
+    encode_delta,
+    encode_message,
+)
 
 try:
     from ..observability.logging import get_logger
@@ -25,4 +38,255 @@ def run_expert_aggregation(config: Dict[str, Any]) -> None:
 
     # TODO: implement: create Kafka consumer, read messages, aggregate weights,
     # persist new model version, etc.
-    pass
\ No newline at end of file
+    # - aggregation.mode == "leaf": feed edge deltas to build_leaf_aggregator(config)
+    #   and publish LeafAggregator.flush() upstream once per round
+    # - aggregation.mode == "root": feed partials (and any direct edge deltas) to
+    #   RootAggregator and commit RootAggregator.finalize() to the registry
+    pass
+
+
+# ----------------------------------------------------------------------
+# Hierarchical aggregation (edge -> leaf -> root)
+# ----------------------------------------------------------------------
+# A leaf (per region/site) reduces its edge deltas to a weighted partial sum
+#
+#     S = sum_i n_i * delta_i        (float64),   N = sum_i n_i
+#
+# and forwards only S plus metadata. The root adds partials the same way it
+# adds single deltas, so sum(S) / sum(N) is the FedAvg the root would have
+# computed from every delta directly, up to float64 summation order.
+#
+# Delivery is at-least-once, so each aggregate remembers which clients and
+# leaves it has merged for its round and ignores repeats instead of counting
+# them twice.
+
+
+@dataclass
+class PartialAggregate:
+    round_id: str
+    sums: Dict[str, torch.Tensor] = field(default_factory=dict)
+    sample_count: int = 0
+    client_count: int = 0
+    version_histogram: Counter[str] = field(default_factory=Counter)
+    merged: Set[Tuple[str, str]] = field(default_factory=set)
+
+    def _accumulate(self, name: str, tensor: torch.Tensor, weight: float) -> None:
+        acc = self.sums.get(name)
+        if acc is None:
+            acc = self.sums[name] = torch.zeros(tensor.shape, dtype=torch.float64)
+        elif acc.shape != tensor.shape:
+            raise ValueError(
+                f"Shape mismatch for {name}: "
+                f"{tuple(tensor.shape)} vs {tuple(acc.shape)}"
+            )
+        acc.add_(tensor, alpha=weight)
+
+    def _check_round(self, round_id: str) -> None:
+        if round_id != self.round_id:
+            raise ValueError(
+                f"Update for round {round_id} sent to aggregator for {self.round_id}"
+            )
+
+    def _first_from(self, kind: str, sender: str) -> bool:
+        if (kind, sender) in self.merged:
+            logger.warning(
+                "Ignoring repeated update from %s %s in round %s",
+                kind,
+                sender,
+                self.round_id,
+            )
+            return False
+        self.merged.add((kind, sender))
+        return True
+
+    def add_delta(
+        self, header: DeltaHeader, tensors: Mapping[str, torch.Tensor]
+    ) -> bool:
+        """Merge one edge delta; False if this client was already merged."""
+        self._check_round(header["round_id"])
+        if not self._first_from("client", header["client_id"]):
+            return False
+        n = int(header["num_examples"])
+        for name, tensor in tensors.items():
+            self._accumulate(name, tensor, n)
+        self.sample_count += n
+        self.client_count += 1
+        self.version_histogram[header["model_version"]] += 1
+        return True
+
+    def add_partial(
+        self, header: PartialHeader, sums: Mapping[str, torch.Tensor]
+    ) -> bool:
+        """Merge one leaf partial; False if this leaf was already merged."""
+        self._check_round(header["round_id"])
+        if not self._first_from("leaf", header["leaf_id"]):
+            return False
+        for name, tensor in sums.items():
+            self._accumulate(name, tensor, 1.0)
+        self.sample_count += int(header["sample_count"])
+        self.client_count += int(header["client_count"])
+        self.version_histogram.update(header["version_histogram"])
+        return True
+
+    def mean(self) -> Dict[str, torch.Tensor]:
+        if self.sample_count == 0:
+            return {}
+        return {k: (v / self.sample_count).float() for k, v in self.sums.items()}
+
+    def to_message(self, leaf_id: str) -> bytearray:
+        header = {
+            "kind": "partial",
+            "leaf_id": leaf_id,
+            "round_id": self.round_id,
+            "sample_count": self.sample_count,
+            "client_count": self.client_count,
+            "version_histogram": dict(self.version_histogram),
+        }
+        return encode_message(header, self.sums)
+
+
+class LeafAggregator:
+    """
+    Site/region aggregator: absorbs edge deltas, forwards one partial per round.
+
+    `add` has the same signature as the root's, so a leaf can stand in for
+    the root wherever single deltas are consumed (e.g. the fleet simulator).
+    """
+
+    def __init__(self, leaf_id: str, round_id: str) -> None:
+        self.leaf_id = leaf_id
+        self.partial = PartialAggregate(round_id)
+
+    def add(self, header: DeltaHeader, tensors: Mapping[str, torch.Tensor]) -> bool:
+        return self.partial.add_delta(header, tensors)
+
+    def add_message(self, buf: bytearray) -> bool:
+        header, tensors = decode_delta(buf)
+        return self.add(header, tensors)
+
+    def flush(self, next_round_id: Optional[str] = None) -> bytearray:
+        """Encode the partial for upstream and start a fresh one."""
+        msg = self.partial.to_message(self.leaf_id)
+        logger.info(
+            "Leaf %s forwarding partial for %s: %d clients, %d samples, %d bytes",
+            self.leaf_id,
+            self.partial.round_id,
+            self.partial.client_count,
+            self.partial.sample_count,
+            len(msg),
+        )
+        self.partial = PartialAggregate(next_round_id or self.partial.round_id)
+        return msg
+
+
+class RootAggregator:
+    """Merges leaf partials and any direct edge deltas for one round."""
+
+    def __init__(self, round_id: str) -> None:
+        self.partial = PartialAggregate(round_id)
+        self.leaves: List[str] = []
+
+    def add(self, header: Any, tensors: Mapping[str, torch.Tensor]) -> bool:
+        if header.get("kind") != "partial":
+            return self.partial.add_delta(header, tensors)
+        if not self.partial.add_partial(header, tensors):
+            return False
+        self.leaves.append(header["leaf_id"])
+        return True
+
+    def add_message(self, buf: bytearray) -> bool:
+        header, tensors = decode_delta(buf)
+        return self.add(header, tensors)
+
+    def metadata(self) -> Dict[str, Any]:
+        return {
+            "round_id": self.partial.round_id,
+            "sample_count": self.partial.sample_count,
+            "client_count": self.partial.client_count,
+            "version_histogram": dict(self.partial.version_histogram),
+            "leaves": list(self.leaves),
+        }
+
+    def finalize(self) -> Dict[str, torch.Tensor]:
+        """Sample-weighted mean update over everything received."""
+        return self.partial.mean()
+
+
+def build_leaf_aggregator(config: Dict[str, Any], round_id: str) -> LeafAggregator:
+    """
+    Build a leaf aggregator from config.
+
+    Expects:
+
+        config["aggregation"] = {
+            "mode": "leaf",            # "leaf" | "root"
+            "leaf_id": "eu-west-site-3",
+        }
+    """
+    agg_cfg = config.get("aggregation", {})
+    if agg_cfg.get("mode") != "leaf" or "leaf_id" not in agg_cfg:
+        raise ValueError(
+            "build_leaf_aggregator: config['aggregation'] "
+            "needs mode='leaf' and a leaf_id"
+        )
+    return LeafAggregator(str(agg_cfg["leaf_id"]), round_id)
+
+
+def benchmark_hierarchical_aggregation(
+    num_clients: int = 1000,
+    fan_in: int = 50,
+    numel: int = 16_384,
+    seed: int = 0,
+) -> Dict[str, float]:
+    """
+    Compare a flat root against leaves of `fan_in` clients feeding a root.
+
+    Reports upstream bytes into the root, root CPU seconds, and the max abs
+    difference between the two resulting updates. Partials are float64, so
+    for float32 deltas bytes drop by about fan_in / 2 and root CPU by fan_in.
+    """
+    gen = torch.Generator().manual_seed(seed)
+    round_id = "bench"
+    messages = []
+    for i in range(num_clients):
+        delta = {"experts.0.lora_A": torch.randn(numel, generator=gen)}
+        n = int(torch.randint(16, 512, (1,), generator=gen))
+        messages.append(encode_delta(delta, f"c{i}", round_id, f"v{i % 3}", n))
+
+    flat = RootAggregator(round_id)
+    flat_bytes = sum(len(m) for m in messages)
+    start = time.process_time()
+    for m in messages:
+        flat.add_message(m)
+    flat_update = flat.finalize()
+    flat_cpu = time.process_time() - start
+
+    partials = []
+    for lo in range(0, num_clients, fan_in):
+        leaf = LeafAggregator(f"leaf{lo // fan_in}", round_id)
+        for m in messages[lo : lo + fan_in]:
+            leaf.add_message(m)
+        partials.append(leaf.flush())
+
+    root = RootAggregator(round_id)
+    hier_bytes = sum(len(p) for p in partials)
+    start = time.process_time()
+    for p in partials:
+        root.add_message(p)
+    hier_update = root.finalize()
+    hier_cpu = time.process_time() - start
+
+    diff = max(
+        float((flat_update[k] - hier_update[k]).abs().max()) for k in flat_update
+    )
+    return {
+        "clients": float(num_clients),
+        "fan_in": float(fan_in),
+        "flat_upstream_bytes": float(flat_bytes),
+        "hier_upstream_bytes": float(hier_bytes),
+        "bytes_reduction": flat_bytes / max(hier_bytes, 1),
+        "flat_root_cpu_s": flat_cpu,
+        "hier_root_cpu_s": hier_cpu,
+        "cpu_reduction": flat_cpu / max(hier_cpu, 1e-9),
+        "max_abs_diff": diff,
+    }
\ No newline at end of file
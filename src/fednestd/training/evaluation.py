@@ -0,0 +1,386 @@
+# src/fednestd/training/evaluation.py
+from __future__ import annotations
+
+import math
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypedDict
+
+import torch
+
+from ..observability.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class ShardOutput(TypedDict, total=False):
+    """
+    Result of evaluating one model version on one dataset shard.
+
+    `losses` holds one value per example, in a fixed order, so candidate and
+    baseline can be compared pairwise. `logits` is optional (it can be large).
+    """
+
+    losses: torch.Tensor
+    metrics: Dict[str, float]
+    logits: torch.Tensor
+
+
+# (version, shard_id) -> ShardOutput. Must be a picklable, module-level
+# callable so it can run in worker processes.
+EvalFn = Callable[[str, str], ShardOutput]
+
+
+class BaselineCache:
+    """
+    On-disk cache of shard outputs, keyed by (dataset, version, shard).
+
+    The baseline version is fixed for a whole rollout cycle, so its outputs are
+    computed once and every candidate round only has to run the candidate.
+    """
+
+    def __init__(self, root: Path | str, dataset_id: str = "default") -> None:
+        self.root = Path(root) / dataset_id
+        self._mem: Dict[Tuple[str, str], ShardOutput] = {}
+
+    def _path(self, version: str, shard_id: str) -> Path:
+        safe_shard = shard_id.replace("/", "_")
+        return self.root / version / f"{safe_shard}.pt"
+
+    def get(self, version: str, shard_id: str) -> Optional[ShardOutput]:
+        key = (version, shard_id)
+        if key in self._mem:
+            return self._mem[key]
+        path = self._path(version, shard_id)
+        if not path.exists():
+            return None
+        out: ShardOutput = torch.load(path, map_location="cpu")
+        self._mem[key] = out
+        return out
+
+    def put(self, version: str, shard_id: str, output: ShardOutput) -> None:
+        path = self._path(version, shard_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        torch.save(dict(output), tmp)
+        tmp.replace(path)
+        self._mem[(version, shard_id)] = output
+
+
+@dataclass
+class SequentialTestConfig:
+    """
+    Paired sequential test on per-example loss differences (candidate - baseline).
+
+    `margin`: tolerated mean loss increase before a candidate counts as worse.
+    `z_threshold`: boundary for early decisions; kept well above 1.96 because
+      the test is re-checked after every shard.
+    `final_z`: one-sided boundary once every shard is seen; the candidate is
+      rejected only if it is significantly worse than `margin` (1.64 ~ 5%).
+    `min_fraction`: no early decision before this fraction of examples is seen.
+    `early_accept`: also stop early when the candidate is clearly not worse.
+    """
+
+    margin: float = 0.0
+    z_threshold: float = 3.0
+    final_z: float = 1.64
+    min_fraction: float = 0.1
+    early_accept: bool = False
+
+
+@dataclass
+class EvalReport:
+    candidate: str
+    baseline: str
+    decision: str  # "accept" | "reject"
+    early_stopped: bool
+    mean_loss_delta: float
+    z_score: float
+    examples_evaluated: int
+    examples_total: int
+    shards_evaluated: int
+    baseline_cache_hits: int
+    time_to_decision_s: float
+    candidate_metrics: Dict[str, float] = field(default_factory=dict)
+    baseline_metrics: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def fraction_evaluated(self) -> float:
+        return self.examples_evaluated / max(self.examples_total, 1)
+
+
+class _RunningPairedStats:
+    """Welford running mean/variance of paired differences."""
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, diffs: torch.Tensor) -> None:
+        d = diffs.double()
+        n_b = d.numel()
+        if n_b == 0:
+            return
+        mean_b = float(d.mean())
+        m2_b = float(((d - mean_b) ** 2).sum())
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self._m2 += m2_b + delta * delta * self.n * n_b / n
+        self.n = n
+
+    @property
+    def stderr(self) -> float:
+        if self.n < 2:
+            return math.inf
+        return math.sqrt(self._m2 / (self.n - 1) / self.n)
+
+    def z(self, margin: float) -> float:
+        se = self.stderr
+        if se == 0.0:
+            if self.mean == margin:
+                return 0.0
+            return math.copysign(math.inf, self.mean - margin)
+        return (self.mean - margin) / se
+
+
+def _merge_metrics(outputs: Sequence[ShardOutput]) -> Dict[str, float]:
+    """Example-weighted average of per-shard metrics, plus mean loss."""
+    totals: Dict[str, float] = {}
+    n_total = 0
+    loss_sum = 0.0
+    for out in outputs:
+        n = int(out["losses"].numel())
+        n_total += n
+        loss_sum += float(out["losses"].double().sum())
+        for name, value in out.get("metrics", {}).items():
+            totals[name] = totals.get(name, 0.0) + value * n
+    if n_total == 0:
+        return {}
+    merged = {name: value / n_total for name, value in totals.items()}
+    merged["loss"] = loss_sum / n_total
+    return merged
+
+
+class EvaluationEngine:
+    """
+    Candidate-vs-baseline regression check over dataset shards.
+
+    Shards are evaluated in parallel on a process pool; each finished shard
+    updates a paired sequential test, and pending shards are cancelled as soon
+    as the test reaches a decision.
+    """
+
+    def __init__(
+        self,
+        eval_fn: EvalFn,
+        cache: BaselineCache,
+        test: Optional[SequentialTestConfig] = None,
+        max_workers: int = 0,
+    ) -> None:
+        self.eval_fn = eval_fn
+        self.cache = cache
+        self.test = test or SequentialTestConfig()
+        self.max_workers = max_workers
+
+    def _executor(self) -> Optional[Executor]:
+        if self.max_workers <= 0:
+            return None
+        return ProcessPoolExecutor(max_workers=self.max_workers)
+
+    def warm_baseline(self, baseline: str, shards: Sequence[str]) -> int:
+        """Compute and cache baseline outputs for any shard not cached yet."""
+        missing = [s for s in shards if self.cache.get(baseline, s) is None]
+        executor = self._executor()
+        try:
+            if executor is None:
+                for shard in missing:
+                    self.cache.put(baseline, shard, self.eval_fn(baseline, shard))
+            else:
+                futures = {
+                    executor.submit(self.eval_fn, baseline, s): s for s in missing
+                }
+                for fut in as_completed(futures):
+                    self.cache.put(baseline, futures[fut], fut.result())
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return len(missing)
+
+    def compare(
+        self,
+        candidate: str,
+        baseline: str,
+        shards: Sequence[str],
+        shard_sizes: Optional[Dict[str, int]] = None,
+    ) -> EvalReport:
+        """
+        Evaluate `candidate` against `baseline` and return an accept/reject report.
+
+        `shard_sizes` (examples per shard) lets `min_fraction` apply before all
+        shards are seen; without it, the cached baseline sizes are used when
+        available and otherwise the fraction is computed over finished shards.
+        """
+        start = time.perf_counter()
+        cache_hits = sum(1 for s in shards if self.cache.get(baseline, s) is not None)
+        sizes = dict(shard_sizes or {})
+        for s in shards:
+            cached = self.cache.get(baseline, s)
+            if s not in sizes and cached is not None:
+                sizes[s] = int(cached["losses"].numel())
+        total = sum(sizes.values()) if len(sizes) == len(shards) else 0
+
+        stats = _RunningPairedStats()
+        cand_outputs: List[ShardOutput] = []
+        base_outputs: List[ShardOutput] = []
+        decision: Optional[str] = None
+        early = False
+
+        def on_pair(shard: str, cand: ShardOutput, base: ShardOutput) -> Optional[str]:
+            if cand["losses"].shape != base["losses"].shape:
+                raise ValueError(
+                    f"Shard {shard}: candidate/baseline example counts differ "
+                    f"({tuple(cand['losses'].shape)} vs {tuple(base['losses'].shape)})"
+                )
+            cand_outputs.append(cand)
+            base_outputs.append(base)
+            stats.update(cand["losses"].flatten() - base["losses"].flatten())
+            seen = stats.n / total if total else len(cand_outputs) / len(shards)
+            if seen < self.test.min_fraction or len(cand_outputs) == len(shards):
+                return None
+            z = stats.z(self.test.margin)
+            if z > self.test.z_threshold:
+                return "reject"
+            if self.test.early_accept and z < -self.test.z_threshold:
+                return "accept"
+            return None
+
+        pending_base: Dict[str, ShardOutput] = {}
+        pending_cand: Dict[str, ShardOutput] = {}
+
+        def on_result(version: str, shard: str, out: ShardOutput) -> Optional[str]:
+            if version == baseline:
+                self.cache.put(baseline, shard, out)
+                pending_base[shard] = out
+            else:
+                pending_cand[shard] = out
+            if shard in pending_base and shard in pending_cand:
+                return on_pair(shard, pending_cand.pop(shard), pending_base.pop(shard))
+            return None
+
+        jobs: List[Tuple[str, str]] = []
+        for s in shards:
+            cached = self.cache.get(baseline, s)
+            if cached is not None:
+                pending_base[s] = cached
+            else:
+                jobs.append((baseline, s))
+            jobs.append((candidate, s))
+
+        executor = self._executor()
+        try:
+            if executor is None:
+                for version, shard in jobs:
+                    decision = on_result(version, shard, self.eval_fn(version, shard))
+                    if decision is not None:
+                        break
+            else:
+                futures: Dict[Future[ShardOutput], Tuple[str, str]] = {
+                    executor.submit(self.eval_fn, v, s): (v, s) for v, s in jobs
+                }
+                for fut in as_completed(futures):
+                    version, shard = futures[fut]
+                    decision = on_result(version, shard, fut.result())
+                    if decision is not None:
+                        for other in futures:
+                            other.cancel()
+                        break
+            # Stop the clock here: shutdown below waits for shards still running.
+            decided_at = time.perf_counter()
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        if decision is not None:
+            early = True
+        else:
+            final_z = stats.z(self.test.margin)
+            decision = "reject" if final_z > self.test.final_z else "accept"
+
+        if not total and cand_outputs:
+            # Unknown shard sizes: extrapolate from the shards we did see.
+            total = round(stats.n / len(cand_outputs) * len(shards))
+
+        elapsed = decided_at - start
+        report = EvalReport(
+            candidate=candidate,
+            baseline=baseline,
+            decision=decision,
+            early_stopped=early,
+            mean_loss_delta=stats.mean,
+            z_score=stats.z(self.test.margin),
+            examples_evaluated=stats.n,
+            examples_total=total or stats.n,
+            shards_evaluated=len(cand_outputs),
+            baseline_cache_hits=cache_hits,
+            time_to_decision_s=elapsed,
+            candidate_metrics=_merge_metrics(cand_outputs),
+            baseline_metrics=_merge_metrics(base_outputs),
+        )
+        logger.info(
+            "Evaluation %s vs %s: %s (early=%s, delta=%.5f, z=%.2f, "
+            "examples=%d/%d, cache_hits=%d, time_to_decision=%.3fs)",
+            candidate,
+            baseline,
+            report.decision,
+            report.early_stopped,
+            report.mean_loss_delta,
+            report.z_score,
+            report.examples_evaluated,
+            report.examples_total,
+            report.baseline_cache_hits,
+            report.time_to_decision_s,
+        )
+        return report
+
+
+def build_evaluation_engine(
+    config: Dict[str, Any], eval_fn: EvalFn
+) -> EvaluationEngine:
+    """
+    Build an EvaluationEngine from config.
+
+    Expects:
+
+        config["evaluation"] = {
+            "cache_dir": "/var/lib/fednestd/eval_cache",
+            "dataset_id": "validation-v3",
+            "max_workers": 4,        # 0 = evaluate inline
+            "margin": 0.0,
+            "z_threshold": 3.0,
+            "final_z": 1.64,
+            "min_fraction": 0.1,
+            "early_accept": false,
+        }
+    """
+    eval_cfg = config.get("evaluation", {})
+    cache = BaselineCache(
+        eval_cfg.get("cache_dir", "eval_cache"),
+        dataset_id=str(eval_cfg.get("dataset_id", "default")),
+    )
+    test = SequentialTestConfig(
+        margin=float(eval_cfg.get("margin", 0.0)),
+        z_threshold=float(eval_cfg.get("z_threshold", 3.0)),
+        final_z=float(eval_cfg.get("final_z", 1.64)),
+        min_fraction=float(eval_cfg.get("min_fraction", 0.1)),
+        early_accept=bool(eval_cfg.get("early_accept", False)),
+    )
+    return EvaluationEngine(
+        eval_fn,
+        cache,
+        test=test,
+        max_workers=int(eval_cfg.get("max_workers", 0)),
+    )
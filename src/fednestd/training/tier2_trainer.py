@@ -1,7 +1,11 @@
 # src/fednestd/training/tier2_trainer.py
 from __future__ import annotations
 
-from typing import Dict, Any
+from typing import Dict, Any, Mapping, Optional
+
+import torch
+
+from ..model.checkpointing import EdgeCheckpointRing, partition_state_dict
 
 try:
     from ..observability.logging import get_logger
@@ -20,4 +24,44 @@ def run_edge_round(config: Dict[str, Any]) -> None:
     logger.info("Starting edge adapters training round with config: %s", config)
 
     # TODO: implement actual adapters training logic.
-    pass
\ No newline at end of file
+    pass
+
+
+def snapshot_adapters(
+    ring: EdgeCheckpointRing,
+    version: str,
+    state_dict: Mapping[str, torch.Tensor],
+) -> None:
+    """
+    Record the adapter weights after a local round in the edge checkpoint ring.
+
+    Only the adapters group is stored: core and experts are frozen on edge
+    nodes and can always be re-fetched from the global model version.
+    """
+    adapters = partition_state_dict(state_dict)["adapters"]
+    ring.save(version, adapters)
+    stats = ring.stats()
+    logger.info(
+        "Edge checkpoint ring: %d snapshots, %d bytes on disk, write amp %.3f",
+        stats["snapshots"],
+        stats["disk_bytes"],
+        stats["write_amplification"],
+    )
+
+
+def rollback_adapters(
+    ring: EdgeCheckpointRing,
+    version: Optional[str] = None,
+) -> Dict[str, torch.Tensor]:
+    """
+    Restore adapter weights from a retained local checkpoint (default: newest).
+
+    Call this when a local update degrades behavior (PRD E5).
+    """
+    state = ring.restore(version)
+    logger.warning(
+        "Rolled back edge adapters to %s (restore took %.4fs)",
+        version or "latest",
+        ring.stats()["last_restore_s"],
+    )
+    return state
@@ -0,0 +1,93 @@
+# src/fednestd/utils/serialization.py
+from __future__ import annotations
+
+import hashlib
+from typing import List, Sequence
+
+import torch
+
+# Stable, human-readable dtype names used in manifests and wire headers.
+# torch.dtype objects are not JSON-serializable, so everything that leaves
+# the process refers to dtypes by these names.
+DTYPE_NAMES: dict[torch.dtype, str] = {
+    torch.float32: "float32",
+    torch.float64: "float64",
+    torch.float16: "float16",
+    torch.bfloat16: "bfloat16",
+    torch.int64: "int64",
+    torch.int32: "int32",
+    torch.int16: "int16",
+    torch.int8: "int8",
+    torch.uint8: "uint8",
+    torch.bool: "bool",
+}
+NAME_TO_DTYPE: dict[str, torch.dtype] = {v: k for k, v in DTYPE_NAMES.items()}
+
+
+def dtype_name(dtype: torch.dtype) -> str:
+    try:
+        return DTYPE_NAMES[dtype]
+    except KeyError:
+        raise ValueError(f"Unsupported tensor dtype for serialization: {dtype}")
+
+
+def dtype_from_name(name: str) -> torch.dtype:
+    try:
+        return NAME_TO_DTYPE[name]
+    except KeyError:
+        raise ValueError(f"Unknown serialized dtype name: {name}")
+
+
+def tensor_to_bytes(tensor: torch.Tensor) -> bytes:
+    """
+    Return the raw little-endian bytes of a tensor (CPU, contiguous copy if needed).
+
+    Uses a uint8 view + copy into a preallocated buffer, so it stays fast
+    without requiring numpy on edge devices.
+    """
+    t = tensor.detach()
+    if t.device.type != "cpu":
+        t = t.cpu()
+    t = t.contiguous()
+    nbytes = t.numel() * t.element_size()
+    if nbytes == 0:
+        return b""
+    buf = bytearray(nbytes)
+    torch.frombuffer(buf, dtype=torch.uint8).copy_(t.reshape(-1).view(torch.uint8))
+    return bytes(buf)
+
+
+def tensor_from_bytes(
+    data: bytes | bytearray | memoryview,
+    dtype: torch.dtype | str,
+    shape: Sequence[int],
+) -> torch.Tensor:
+    """
+    Rebuild a tensor from raw bytes produced by `tensor_to_bytes`.
+
+    The returned tensor owns its memory (it does not alias `data`).
+    """
+    if isinstance(dtype, str):
+        dtype = dtype_from_name(dtype)
+    shape_list: List[int] = [int(s) for s in shape]
+    if len(data) == 0:
+        return torch.empty(shape_list, dtype=dtype)
+    flat = torch.frombuffer(bytearray(data), dtype=dtype)
+    return flat.reshape(shape_list)
+
+
+def tensor_digest(tensor: torch.Tensor, raw: bytes | None = None) -> str:
+    """
+    Content hash of a tensor (dtype + shape + raw bytes), hex-encoded sha256.
+
+    Two tensors with the same digest are interchangeable, which is what the
+    model registry relies on to share unchanged experts across versions.
+    Pass `raw` if the caller already has the bytes, to avoid a second copy.
+    """
+    if raw is None:
+        raw = tensor_to_bytes(tensor)
+    h = hashlib.sha256()
+    h.update(dtype_name(tensor.dtype).encode())
+    h.update(repr(tuple(tensor.shape)).encode())
+    h.update(raw)
+    return h.hexdigest()
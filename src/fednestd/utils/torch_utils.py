@@ -0,0 +1,285 @@
+# src/fednestd/utils/torch_utils.py
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import torch
+
+from ..federation.messages import (
+    ALIGN,
+    TensorHeader,
+    decode_header,
+    frame_data,
+    layout_tensors,
+)
+from ..model.checkpointing import param_group
+from .serialization import dtype_from_name
+
+
+def select_params(
+    named: Iterable[Tuple[str, torch.Tensor]],
+    groups: Optional[Iterable[str]] = None,
+    prefix: Optional[str] = None,
+) -> Dict[str, torch.Tensor]:
+    """
+    Pick parameters by nested level and/or name prefix.
+
+    e.g. groups=("adapters",) for an edge delta, or prefix="experts.3." for
+    one expert's weights.
+    """
+    wanted = set(groups) if groups is not None else None
+    return {
+        name: t
+        for name, t in named
+        if (wanted is None or param_group(name) in wanted)
+        and (prefix is None or name.startswith(prefix))
+    }
+
+
+class FlatParams:
+    """
+    Named tensors packed into one contiguous buffer.
+
+    The buffer is laid out exactly like the data section of a delta message
+    (federation/messages.py: ALIGN-aligned offsets, zero padding), so
+    `to_message` frames it with a single memcpy and `from_message` wraps a
+    received message without copying. Because the padding is zero, every op
+    below is a single kernel over `flat` and never touches named tensors.
+    """
+
+    def __init__(
+        self,
+        layout: List[TensorHeader],
+        data: bytearray | memoryview,
+        data_start: int = 0,
+    ) -> None:
+        dtypes = {e["dtype"] for e in layout}
+        if len(dtypes) > 1:
+            raise ValueError(f"FlatParams needs a single dtype, got {sorted(dtypes)}")
+        self.layout = layout
+        self.dtype = dtype_from_name(dtypes.pop()) if dtypes else torch.float32
+        elem = torch.empty((), dtype=self.dtype).element_size()
+        end = max((e["offset"] + e["nbytes"] for e in layout), default=0)
+        self.nbytes = (end + ALIGN - 1) // ALIGN * ALIGN
+        if data_start + self.nbytes > len(data):
+            raise ValueError("Buffer is smaller than the flat layout")
+        self._data = data
+        self._data_start = data_start
+        self.flat = (
+            torch.frombuffer(
+                data, dtype=self.dtype, count=self.nbytes // elem, offset=data_start
+            )
+            if self.nbytes
+            else torch.empty(0, dtype=self.dtype)
+        )
+        self.views: Dict[str, torch.Tensor] = {
+            e["name"]: self.flat[
+                e["offset"] // elem : (e["offset"] + e["nbytes"]) // elem
+            ].view(e["shape"])
+            for e in layout
+        }
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+    @classmethod
+    def empty(cls, layout: List[TensorHeader]) -> FlatParams:
+        end = max((e["offset"] + e["nbytes"] for e in layout), default=0)
+        return cls(layout, bytearray((end + ALIGN - 1) // ALIGN * ALIGN))
+
+    @classmethod
+    def from_tensors(
+        cls,
+        named: Mapping[str, torch.Tensor],
+        dtype: Optional[torch.dtype] = None,
+    ) -> FlatParams:
+        """Pack (copy) tensors, optionally casting them all to `dtype`."""
+        specs = [(n, dtype or t.dtype, tuple(t.shape)) for n, t in named.items()]
+        layout, _ = layout_tensors(specs)
+        flat = cls.empty(layout)
+        flat.copy_from_(named)
+        return flat
+
+    @classmethod
+    def from_message(cls, buf: bytearray | memoryview) -> FlatParams:
+        """
+        Zero-copy view over a received delta message's tensors.
+
+        Padding bytes come from the sender, so they are zeroed here before
+        any whole-buffer op (norm, clip) can see them.
+        """
+        header, data_start = decode_header(buf)
+        flat = cls(header["tensors"], buf, data_start)
+        flat._zero_padding_()
+        return flat
+
+    def _zero_padding_(self) -> None:
+        elem = self.flat.element_size()
+        pos = 0
+        for e in sorted(self.layout, key=lambda e: e["offset"]):
+            if e["offset"] > pos:
+                self.flat[pos // elem : e["offset"] // elem].zero_()
+            pos = max(pos, e["offset"] + e["nbytes"])
+        self.flat[pos // elem :].zero_()
+
+    def zeros_like(self) -> FlatParams:
+        return FlatParams.empty(self.layout)
+
+    def clone(self) -> FlatParams:
+        out = self.zeros_like()
+        out.flat.copy_(self.flat)
+        return out
+
+    # ------------------------------------------------------------------
+    # Interop
+    # ------------------------------------------------------------------
+    def copy_from_(self, named: Mapping[str, torch.Tensor]) -> FlatParams:
+        for name, view in self.views.items():
+            view.copy_(named[name].detach())
+        return self
+
+    def bind_(self, module: torch.nn.Module) -> FlatParams:
+        """
+        Make the module's matching parameters views into this buffer.
+
+        Values are copied in first; afterwards `apply_` / `add_` on this
+        FlatParams update the live model in one kernel.
+        """
+        params = dict(module.named_parameters())
+        missing = [n for n in self.views if n not in params]
+        if missing:
+            raise KeyError(f"Module has no parameters named {missing}")
+        with torch.no_grad():
+            for name, view in self.views.items():
+                p = params[name]
+                if p.shape != view.shape or p.dtype != view.dtype:
+                    raise ValueError(f"Parameter {name} does not match the flat layout")
+                view.copy_(p)
+                p.data = view
+        return self
+
+    def data(self) -> memoryview:
+        """The raw data section, ready to frame."""
+        return memoryview(self._data)[self._data_start : self._data_start + self.nbytes]
+
+    def to_message(
+        self,
+        client_id: str,
+        round_id: str,
+        model_version: str,
+        num_examples: int,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> bytearray:
+        header: Dict[str, Any] = {
+            "kind": "delta",
+            "client_id": client_id,
+            "round_id": round_id,
+            "model_version": model_version,
+            "num_examples": int(num_examples),
+        }
+        if meta:
+            header["meta"] = meta
+        return frame_data(header, self.layout, self.data())
+
+    # ------------------------------------------------------------------
+    # Single-kernel math
+    # ------------------------------------------------------------------
+    def _check(self, other: FlatParams) -> None:
+        if other.layout is not self.layout and other.layout != self.layout:
+            raise ValueError("FlatParams layouts differ")
+
+    def delta(self, old: FlatParams, out: Optional[FlatParams] = None) -> FlatParams:
+        """self - old, e.g. the edge delta after a local round."""
+        self._check(old)
+        out = out if out is not None else self.zeros_like()
+        self._check(out)
+        torch.sub(self.flat, old.flat, out=out.flat)
+        return out
+
+    def norm(self) -> float:
+        return float(torch.linalg.vector_norm(self.flat, dtype=torch.float32))
+
+    def clip_(self, max_norm: float) -> float:
+        """Scale to L2 norm <= max_norm in place; returns the pre-clip norm."""
+        norm = self.norm()
+        if norm > max_norm:
+            self.flat.mul_(max_norm / (norm + 1e-12))
+        return norm
+
+    def scale_(self, factor: float) -> FlatParams:
+        self.flat.mul_(factor)
+        return self
+
+    def add_(self, other: FlatParams, alpha: float = 1.0) -> FlatParams:
+        """self += alpha * other (aggregation, or applying a delta)."""
+        self._check(other)
+        self.flat.add_(other.flat, alpha=alpha)
+        return self
+
+    def apply_(self, delta: FlatParams, lr: float = 1.0) -> FlatParams:
+        """Apply a delta to these (typically bound) parameters."""
+        return self.add_(delta, alpha=lr)
+
+
+def benchmark_flat_ops(
+    num_experts: int = 64,
+    tensors_per_expert: int = 4,
+    shape: Tuple[int, int] = (8, 512),
+    repeats: int = 20,
+    seed: int = 0,
+) -> Dict[str, float]:
+    """
+    Time delta + norm + clip + scale-add + apply with per-tensor loops versus
+    FlatParams, over num_experts * tensors_per_expert adapter-sized tensors.
+    """
+    gen = torch.Generator().manual_seed(seed)
+    names = [
+        f"experts.{e}.lora_{i}"
+        for e in range(num_experts)
+        for i in range(tensors_per_expert)
+    ]
+    old = {n: torch.randn(shape, generator=gen) for n in names}
+    new = {n: t + 0.01 * torch.randn(shape, generator=gen) for n, t in old.items()}
+
+    # Both sides reuse preallocated workspaces, so this measures per-tensor
+    # dispatch overhead rather than allocator behaviour.
+    loop_delta = {n: torch.empty(shape) for n in names}
+    loop_acc = {n: torch.empty(shape) for n in names}
+
+    def loop_round() -> None:
+        for n in names:
+            torch.sub(new[n], old[n], out=loop_delta[n])
+        squares = torch.stack([d.pow(2).sum() for d in loop_delta.values()])
+        norm = float(squares.sum().sqrt())
+        if norm > 1.0:
+            for d in loop_delta.values():
+                d.mul_(1.0 / norm)
+        for n in names:
+            loop_acc[n].zero_().add_(loop_delta[n], alpha=0.5)
+        for n in names:
+            old[n].add_(loop_acc[n], alpha=0.0)
+
+    flat_old = FlatParams.from_tensors(old)
+    flat_new = FlatParams.from_tensors(new)
+    flat_delta = flat_old.zeros_like()
+    flat_acc = flat_old.zeros_like()
+
+    def flat_round() -> None:
+        flat_new.delta(flat_old, out=flat_delta)
+        flat_delta.clip_(1.0)
+        flat_acc.scale_(0.0).add_(flat_delta, alpha=0.5)
+        flat_old.apply_(flat_acc, lr=0.0)
+
+    results: Dict[str, float] = {
+        "tensors": float(len(names)),
+        "numel": float(len(names) * shape[0] * shape[1]),
+    }
+    for label, fn in (("loop", loop_round), ("flat", flat_round)):
+        fn()  # warm-up
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fn()
+        results[f"{label}_ms"] = (time.perf_counter() - start) / repeats * 1000
+    results["speedup"] = results["loop_ms"] / max(results["flat_ms"], 1e-9)
+    return results
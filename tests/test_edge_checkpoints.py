@@ -0,0 +1,109 @@
+"""Tests for the edge-side checkpoint ring used for local rollback."""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict
+
+import pytest
+import torch
+
+from fednestd.model.checkpointing import EdgeCheckpointRing, build_edge_checkpoint_ring
+from fednestd.training.tier2_trainer import rollback_adapters, snapshot_adapters
+
+
+def _adapters(step: int) -> Dict[str, torch.Tensor]:
+    """Synthetic LoRA weights that drift slightly every round."""
+    gen = torch.Generator().manual_seed(0)
+    state = {
+        f"experts.{i}.fc1.lora_A": torch.randn(16, 64, generator=gen) for i in range(4)
+    }
+    for name in state:
+        state[name] = state[name] + 1e-4 * step
+    state["experts.0.fc1.lora_B"] = torch.zeros(64, 16)  # never changes
+    return state
+
+
+def test_edge_ring_restores_every_retained_version_exactly(tmp_path: Path) -> None:
+    ring = EdgeCheckpointRing(tmp_path, max_snapshots=8, base_interval=4)
+    for step in range(6):
+        ring.save(f"r{step}", _adapters(step))
+
+    for step in range(6):
+        restored = ring.restore(f"r{step}")
+        for name, tensor in _adapters(step).items():
+            assert torch.equal(restored[name], tensor)
+
+    kinds = [ring._entries[s]["kind"] for s in sorted(ring._entries)]
+    assert kinds == ["base", "delta", "delta", "delta", "base", "delta"]
+
+
+def test_edge_ring_deltas_are_smaller_than_full_snapshots(tmp_path: Path) -> None:
+    ring = EdgeCheckpointRing(tmp_path, base_interval=8)
+    base = ring.save("r0", _adapters(0))
+    delta = ring.save("r1", _adapters(1))
+    assert delta["kind"] == "delta"
+    assert delta["bytes"] < base["bytes"]
+    assert ring.stats()["write_amplification"] < 1.0
+
+
+def test_edge_ring_respects_snapshot_and_disk_budget(tmp_path: Path) -> None:
+    ring = EdgeCheckpointRing(tmp_path, max_snapshots=3, base_interval=2)
+    for step in range(10):
+        ring.save(f"r{step}", _adapters(step))
+    assert len(ring.versions()) <= 3
+    assert ring.versions()[-1] == "r9"
+    with pytest.raises(KeyError):
+        ring.restore("r0")
+
+    budget = ring.stats()["disk_bytes"]
+    small = EdgeCheckpointRing(tmp_path / "small", disk_budget_bytes=budget)
+    for step in range(10):
+        small.save(f"r{step}", _adapters(step))
+        assert small.versions()[-1] == f"r{step}"
+        assert torch.equal(
+            small.restore()["experts.1.fc1.lora_A"],
+            _adapters(step)["experts.1.fc1.lora_A"],
+        )
+    assert small.stats()["disk_bytes"] <= budget
+
+
+def test_edge_ring_rebases_despite_eviction(tmp_path: Path) -> None:
+    ring = EdgeCheckpointRing(tmp_path, max_snapshots=3, base_interval=4)
+    entries = [ring.save(f"r{step}", _adapters(step)) for step in range(12)]
+
+    assert [e["kind"] for e in entries].count("base") == 3
+    assert ring.versions() == ["r8", "r10", "r11"]  # r8 is their base
+    seqs = [e["seq"] for e in entries]
+    assert seqs == sorted(set(seqs))
+    assert entries[-1]["base_seq"] == 8
+
+    # Sequence numbers survive index compaction and reopening.
+    assert EdgeCheckpointRing(tmp_path).save("r12", _adapters(12))["seq"] == 12
+
+
+def test_edge_ring_survives_torn_index_write(tmp_path: Path) -> None:
+    ring = EdgeCheckpointRing(tmp_path)
+    ring.save("r0", _adapters(0))
+    ring.save("r1", _adapters(1))
+    with open(tmp_path / EdgeCheckpointRing.INDEX_FILE, "ab") as f:
+        f.write(b'{"seq": 2, "vers')  # crash mid-append
+    (tmp_path / "snap-00000002.tmp").write_bytes(b"partial")
+
+    reopened = EdgeCheckpointRing(tmp_path)
+    assert reopened.versions() == ["r0", "r1"]
+    assert not (tmp_path / "snap-00000002.tmp").exists()
+    reopened.save("r2", _adapters(2))
+    assert EdgeCheckpointRing(tmp_path).versions() == ["r0", "r1", "r2"]
+
+
+def test_tier2_snapshot_stores_only_adapters(tmp_path: Path) -> None:
+    ring = build_edge_checkpoint_ring({"checkpoints": {"dir": str(tmp_path)}})
+    assert ring is not None
+    state = dict(_adapters(0))
+    state["core.attn.weight"] = torch.randn(8, 8)
+    state["experts.0.fc1.weight"] = torch.randn(8, 8)
+
+    snapshot_adapters(ring, "r0", state)
+    restored = rollback_adapters(ring)
+    assert set(restored) == set(_adapters(0))
+    assert build_edge_checkpoint_ring({}) is None
@@ -0,0 +1,100 @@
+"""Tests for the candidate-vs-baseline evaluation engine."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import torch
+
+from fednestd.training.evaluation import (
+    BaselineCache,
+    EvaluationEngine,
+    SequentialTestConfig,
+    ShardOutput,
+    build_evaluation_engine,
+)
+
+SHARDS = [f"shard-{i}" for i in range(10)]
+CALLS: list[tuple[str, str]] = []
+
+
+def _synthetic_eval(version: str, shard_id: str) -> ShardOutput:
+    """Fake per-example losses: 'worse' adds a clear regression, 'same' adds noise."""
+    CALLS.append((version, shard_id))
+    gen = torch.Generator().manual_seed(int(shard_id.split("-")[1]))
+    losses = torch.rand(200, generator=gen) + 1.0
+    if version == "worse":
+        losses = losses + 0.5
+    elif version.startswith("same"):
+        # "same-<k>": another equivalent candidate with independent noise.
+        _, _, k = version.partition("-")
+        if k:
+            gen = torch.Generator().manual_seed(1000 * int(k) + gen.initial_seed())
+        losses = losses + 0.01 * torch.randn(200, generator=gen)
+    accuracy = 0.6 if version == "worse" else 0.9
+    return {"losses": losses, "metrics": {"accuracy": accuracy}}
+
+
+def _engine(tmp_path: Path, max_workers: int = 0) -> EvaluationEngine:
+    return EvaluationEngine(
+        _synthetic_eval,
+        BaselineCache(tmp_path / "cache"),
+        test=SequentialTestConfig(margin=0.05, min_fraction=0.2),
+        max_workers=max_workers,
+    )
+
+
+def test_evaluation_rejects_clearly_worse_candidate_early(tmp_path: Path) -> None:
+    report = _engine(tmp_path).compare("worse", "v1", SHARDS)
+    assert report.decision == "reject"
+    assert report.early_stopped
+    assert report.fraction_evaluated < 0.5
+    assert report.time_to_decision_s > 0
+    assert report.candidate_metrics["accuracy"] < report.baseline_metrics["accuracy"]
+
+
+def test_evaluation_accepts_equivalent_candidate_on_full_data(tmp_path: Path) -> None:
+    report = _engine(tmp_path).compare("same", "v1", SHARDS)
+    assert report.decision == "accept"
+    assert not report.early_stopped
+    assert report.shards_evaluated == len(SHARDS)
+    assert abs(report.mean_loss_delta) < 0.05
+
+
+def test_evaluation_default_config_accepts_equivalent_candidates(
+    tmp_path: Path,
+) -> None:
+    # margin=0: an equivalent candidate's mean delta is positive about half the
+    # time, so the final call must rest on significance, not on its sign.
+    engine = build_evaluation_engine(
+        {"evaluation": {"cache_dir": str(tmp_path)}}, _synthetic_eval
+    )
+    for version in ("same", "same-1", "same-2", "same-3"):
+        report = engine.compare(version, "v1", SHARDS)
+        assert report.decision == "accept", (version, report.z_score)
+        assert not report.early_stopped
+    assert engine.compare("worse", "v1", SHARDS).decision == "reject"
+
+
+def test_evaluation_reuses_cached_baseline_outputs(tmp_path: Path) -> None:
+    engine = _engine(tmp_path)
+    assert engine.warm_baseline("v1", SHARDS) == len(SHARDS)
+
+    CALLS.clear()
+    report = engine.compare("same", "v1", SHARDS)
+    assert report.baseline_cache_hits == len(SHARDS)
+    assert all(version == "same" for version, _ in CALLS)
+
+
+def test_evaluation_runs_shards_on_process_pool(tmp_path: Path) -> None:
+    report = _engine(tmp_path, max_workers=2).compare("same", "v1", SHARDS)
+    assert report.decision == "accept"
+    assert report.examples_evaluated == 200 * len(SHARDS)
+
+
+def test_build_evaluation_engine_reads_config(tmp_path: Path) -> None:
+    engine = build_evaluation_engine(
+        {"evaluation": {"cache_dir": str(tmp_path), "margin": 0.1, "max_workers": 3}},
+        _synthetic_eval,
+    )
+    assert engine.test.margin == 0.1
+    assert engine.max_workers == 3
@@ -0,0 +1,143 @@
+"""Tests for the binary control-plane event codec and partition sizing."""
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from fednestd.messaging import events
+from fednestd.messaging.events import (
+    EDGE_TELEMETRY,
+    ROUND_START,
+    TRAINING_TASK,
+    EventSchema,
+    Field,
+    benchmark_event_codec,
+    decode_event,
+    encode_event,
+    partition_for,
+    partition_key,
+    recommend_partitions,
+    register_schema,
+    sized_topic_partitions,
+)
+
+
+def test_round_trip_and_size() -> None:
+    event = {
+        "round_id": "r-42",
+        "model_version": "v7",
+        "deadline_ts": 1.7e9,
+        "target_clients": 5000,
+    }
+    buf = encode_event(ROUND_START, event)
+    schema, decoded = decode_event(buf)
+
+    assert schema is ROUND_START
+    assert decoded == event
+    assert len(buf) < len(json.dumps(event))
+
+
+@pytest.fixture
+def isolated_registry(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Schemas registered by a test are dropped afterwards."""
+    monkeypatch.setattr(events, "_REGISTRY", dict(events._REGISTRY))
+
+
+@pytest.mark.usefixtures("isolated_registry")
+def test_schema_versions_are_forward_and_backward_compatible() -> None:
+    v1 = EventSchema(
+        "probe", 250, "telemetry.edge", "client_id", [Field("client_id", "str")]
+    )
+    v2 = EventSchema(
+        "probe",
+        250,
+        "telemetry.edge",
+        "client_id",
+        [
+            Field("client_id", "str"),
+            Field("rtt_ms", "f32", since=2, default=-1.0),
+            Field("carrier", "str", since=2, default=""),
+        ],
+    )
+    old_payload = encode_event(v1, {"client_id": "c1"})
+    new_payload = encode_event(v2, {"client_id": "c1", "rtt_ms": 12.5, "carrier": "x"})
+
+    register_schema(v2)  # new reader
+    assert decode_event(old_payload)[1] == {
+        "client_id": "c1",
+        "rtt_ms": -1.0,
+        "carrier": "",
+    }
+    # Writers may omit fields that have a default.
+    assert decode_event(encode_event(v2, {"client_id": "c2"}))[1] == {
+        "client_id": "c2",
+        "rtt_ms": -1.0,
+        "carrier": "",
+    }
+    register_schema(v1)  # old reader ignores the v2 block
+    assert decode_event(new_payload)[1] == {"client_id": "c1"}
+
+    with pytest.raises(ValueError, match="already used"):
+        register_schema(EventSchema("other", 250, "t", "a", [Field("a", "str")]))
+    with pytest.raises(ValueError, match="Unknown event type"):
+        decode_event(b"\xfe\x01")
+
+
+def test_partitions_are_stable_and_match_kafka() -> None:
+    telemetry = {
+        "client_id": "edge-17",
+        "region": "eu",
+        "ts": 0.0,
+        "cpu_util": 0.1,
+        "mem_mb": 1.0,
+        "battery": 1.0,
+        "local_loss": 0.0,
+        "steps": 3,
+    }
+    task = {
+        "task_id": "t1",
+        "expert_id": 3,
+        "region": "eu",
+        "dataset": "d",
+        "priority": 1,
+    }
+    key = partition_key(EDGE_TELEMETRY, telemetry)
+    assert key == b"edge-17"
+    assert partition_key(TRAINING_TASK, task) == b"3"
+
+    # Kafka's murmur2(b"abc") is 479470107, so the producer picks 3 of 12.
+    assert partition_for(b"abc", 12) == 3
+    spread = {partition_for(f"edge-{i}".encode(), 12) for i in range(200)}
+    assert spread == set(range(12))
+    assert partition_for(key, 12) == partition_for(b"edge-17", 12)
+
+
+def test_recommend_partitions_scales_with_fleet() -> None:
+    # 1M clients * 60 events/h * 3x peak = 50k events/s -> 10 partitions at 5k/s.
+    assert recommend_partitions(1_000_000, 60, 48) == 10
+    assert recommend_partitions(100, 60, 48) == 3
+    assert recommend_partitions(10**9, 3600, 48, max_partitions=64) == 64
+    # Byte-bound: large events need more partitions than the event rate implies.
+    assert recommend_partitions(1_000_000, 60, 3000) == 30
+
+    kafka_cfg = {
+        "num_partitions": 6,
+        "sizing": {
+            "fleet_size": 1_000_000,
+            "topics": {"telemetry.edge": {"events_per_client_per_hour": 60}},
+        },
+    }
+    assert sized_topic_partitions(kafka_cfg) == {"telemetry.edge": 10}
+    assert sized_topic_partitions({"num_partitions": 3}) == {}
+
+
+def test_benchmark_event_codec() -> None:
+    stats = benchmark_event_codec(num_events=2000)
+    assert stats["binary_bytes_per_event"] < stats["json_bytes_per_event"] / 2
+    assert stats["binary_decode_per_s"] > 0
+
+
+def test_registered_test_schemas_do_not_leak() -> None:
+    with pytest.raises(ValueError, match="Unknown event type"):
+        decode_event(b"\xfa\x01\x00\x00")
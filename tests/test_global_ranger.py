@@ -0,0 +1,159 @@
+"""Tests for the local policy decision point (stub policy server, no real Ranger)."""
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+import pytest
+
+from fednestd.governance.global_ranger import (
+    PolicyBundle,
+    PolicyDecisionPoint,
+    check_delta_publish,
+    http_policy_source,
+)
+
+
+def _bundle(version: str, allow_edges: bool = True) -> PolicyBundle:
+    return {
+        "version": version,
+        "policies": [
+            {
+                "id": "curated-read",
+                "resource": "dataset:curated/*",
+                "actions": ["read"],
+                "principals": ["group:tier1-trainers"],
+                "effect": "allow",
+            },
+            {
+                "id": "pii-deny",
+                "resource": "dataset:curated/pii/*",
+                "actions": ["*"],
+                "principals": ["*"],
+                "effect": "deny",
+            },
+            {
+                "id": "edge-publish",
+                "resource": "topic:updates.experts.local",
+                "actions": ["publish"],
+                "principals": ["group:edge"],
+                "effect": "allow" if allow_edges else "deny",
+            },
+        ],
+    }
+
+
+class _StubPolicyServer:
+    """Serves whatever bundle is assigned to `.bundle`; honours If-None-Match."""
+
+    def __init__(self) -> None:
+        self.bundle: Optional[PolicyBundle] = _bundle("1")
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802 (http.server API)
+                stub.requests += 1
+                if stub.bundle is None:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                if self.headers.get("If-None-Match") == stub.bundle["version"]:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = json.dumps(stub.bundle).encode()
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        self.server = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/bundle"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture()
+def stub_server() -> Iterator[_StubPolicyServer]:
+    server = _StubPolicyServer()
+    yield server
+    server.close()
+
+
+def test_ranger_pdp_allows_and_denies_by_index(stub_server: _StubPolicyServer) -> None:
+    pdp = PolicyDecisionPoint(http_policy_source(stub_server.url))
+    assert pdp.sync()
+
+    trainer = ["group:tier1-trainers"]
+    assert pdp.is_allowed("user:t1", "dataset:curated/news/2024", "read", trainer)
+    assert not pdp.is_allowed("user:t1", "dataset:curated/news/2024", "write", trainer)
+    assert not pdp.is_allowed("user:t1", "dataset:raw/logs", "read", trainer)
+    # Deny on a sub-path overrides the broader allow.
+    decision = pdp.decide("user:t1", "dataset:curated/pii/users", "read", trainer)
+    assert not decision.allowed
+    assert decision.policy_id == "pii-deny"
+
+
+def test_ranger_pdp_fails_closed_without_bundle() -> None:
+    def unreachable(_: Optional[str]) -> Optional[PolicyBundle]:
+        raise ConnectionError("policy server down")
+
+    pdp = PolicyDecisionPoint(unreachable)
+    assert not pdp.sync()
+    assert not pdp.is_allowed("user:x", "dataset:curated/a", "read")
+
+
+def test_ranger_pdp_serves_last_known_bundle_during_outage(
+    stub_server: _StubPolicyServer, tmp_path: Path
+) -> None:
+    bundle_path = tmp_path / "bundle.json"
+    source = http_policy_source(stub_server.url)
+    pdp = PolicyDecisionPoint(source, bundle_path=bundle_path)
+    pdp.sync()
+
+    stub_server.bundle = None  # outage
+    assert not pdp.sync()
+    check_delta_publish(pdp, "edge-1", "updates.experts.local", ["group:edge"])
+
+    # A restarted process still has the persisted bundle.
+    restarted = PolicyDecisionPoint(
+        http_policy_source(stub_server.url), bundle_path=bundle_path
+    )
+    assert restarted.bundle_version == "1"
+    assert restarted.is_allowed(
+        "client:edge-1", "topic:updates.experts.local", "publish", ["group:edge"]
+    )
+
+
+def test_ranger_pdp_cache_invalidated_on_new_bundle_version(
+    stub_server: _StubPolicyServer,
+) -> None:
+    pdp = PolicyDecisionPoint(http_policy_source(stub_server.url), cache_ttl_s=3600)
+    pdp.sync()
+    args = ("client:edge-1", "topic:updates.experts.local", "publish", ["group:edge"])
+    assert pdp.is_allowed(*args)
+    assert pdp.is_allowed(*args)  # served from cache
+
+    pdp.sync()  # unchanged -> 304, nothing reinstalled
+    assert pdp.bundle_version == "1"
+
+    stub_server.bundle = _bundle("2", allow_edges=False)
+    pdp.sync()
+    assert pdp.bundle_version == "2"
+    with pytest.raises(PermissionError):
+        check_delta_publish(pdp, "edge-1", "updates.experts.local", ["group:edge"])
+
+    latency = pdp.decision_latency_percentiles()
+    assert set(latency) == {"p50", "p95", "p99"}
+    assert latency["p50"] < 0.01
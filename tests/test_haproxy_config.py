@@ -0,0 +1,121 @@
+"""Tests for sharded HAProxy config rendering."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from fednestd.infra.deployment_profiles import load_profile
+from fednestd.networking import haproxy_config
+from fednestd.networking.haproxy_config import (
+    CLIENT_ID_HEADER,
+    render_haproxy_config,
+    validate_haproxy_profile,
+)
+
+
+def test_haproxy_renders_consistent_hash_shards() -> None:
+    rendered = render_haproxy_config(load_profile("prod"))
+    assert f"balance hdr({CLIENT_ID_HEADER})" in rendered
+    assert "hash-type consistent" in rendered
+    assert "option httpchk GET /healthz" in rendered
+    assert "option http-keep-alive" in rendered
+    # 60000 clients over 3 shards with 25% headroom.
+    for i in (1, 2, 3):
+        assert (
+            f"server fed{i} fedserver-{i}.prod.local:443 "
+            "weight 1 maxconn 25000 maxqueue 25000 ssl verify required "
+            "ca-file /etc/haproxy/certs/fedserver-ca.pem "
+            f"verifyhost fedserver-{i}.prod.local"
+        ) in rendered
+    assert "bind *:443 ssl crt /etc/haproxy/certs/fedserver.pem" in rendered
+    assert "server kafka3 kafka-3.prod.local:9092" in rendered
+    assert "maxconn 61024" in rendered
+    assert "{" not in rendered
+
+
+def test_haproxy_single_backend_profile_still_renders() -> None:
+    rendered = render_haproxy_config(load_profile("dev"))
+    assert "server fed1 fedserver.dev.local:8080 " in rendered
+    assert "bind *:8080\n" in rendered and " ssl " not in rendered
+    assert "server kafka1 kafka.dev.local:9092" in rendered
+
+
+def test_haproxy_profile_validation_lists_every_problem() -> None:
+    errors = validate_haproxy_profile(
+        {
+            "fedserver_backends": [
+                {"name": "a", "host": "h", "port": 80},
+                {"name": "a", "host": "h", "port": 80, "weight": 0},
+                {"name": "bad name", "host": "", "port": 70000},
+            ],
+            "kafka_brokers": ["kafka-no-port"],
+            "max_clients": 0,
+        }
+    )
+    joined = "\n".join(errors)
+    for fragment in (
+        "duplicate name",
+        "duplicate address",
+        "weight must be",
+        "alphanumeric",
+        "host is missing",
+        "invalid port",
+        "must be host:port",
+        "max_clients",
+    ):
+        assert fragment in joined
+    with pytest.raises(ValueError, match="Invalid HAProxy profile"):
+        render_haproxy_config({"haproxy": {"fedserver_backends": []}})
+
+
+def test_haproxy_rejects_proxying_to_itself() -> None:
+    # The edge profile has no haproxy section, so only defaults apply.
+    with pytest.raises(ValueError, match="proxy loop"):
+        render_haproxy_config(load_profile("edge"))
+    errors = validate_haproxy_profile(
+        {
+            "fedserver_backends": [
+                {"name": "local", "host": "localhost", "port": 9092},
+                {"name": "sidecar", "host": "127.0.0.1", "port": 8081},
+            ],
+            "kafka_brokers": ["0.0.0.0:9092", "kafka.local:9092"],
+        }
+    )
+    assert errors == [
+        "backend local: localhost:9092 is HAProxy's own listener (proxy loop)",
+        "kafka broker 0.0.0.0:9092 is HAProxy's own listener (proxy loop)",
+    ]
+
+
+def test_haproxy_template_drift_is_detected(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    template = tmp_path / "haproxy.cfg.j2"
+    template.write_text("backend x\n    {FEDSERVER_SERVERS}\n    {TYPO_FIELD}\n")
+    monkeypatch.setattr(haproxy_config, "_template_path", lambda: template)
+    with pytest.raises(ValueError, match="TYPO_FIELD"):
+        render_haproxy_config(load_profile("dev"))
+
+
+def test_haproxy_port_443_requires_tls() -> None:
+    errors = validate_haproxy_profile(
+        {
+            "fedserver_backends": [{"name": "a", "host": "h", "port": 443}],
+            "bind_port": 443,
+        }
+    )
+    joined = "\n".join(errors)
+    assert "bind_port 443 needs tls_cert" in joined
+    assert "port 443 needs backend_tls" in joined
+
+    errors = validate_haproxy_profile(
+        {
+            "fedserver_backends": [{"name": "a", "host": "h", "port": 443}],
+            "bind_port": 443,
+            "tls_cert": "certs/fed.pem",
+            "backend_tls": True,
+        }
+    )
+    assert any("tls_cert must be an absolute path" in e for e in errors)
+    assert any("backend_ca_file" in e for e in errors)
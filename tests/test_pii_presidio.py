@@ -0,0 +1,100 @@
+"""Tests for batched PII scanning (synthetic data only)."""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from fednestd.governance.pii_presidio import (
+    PIIScanCache,
+    PIIScanner,
+    benchmark_pii_scan,
+    build_pii_scanner,
+    scan_jsonl_shards,
+)
+
+DICTIONARIES = {"SITE_NAME": ["Plant North", "depot-7"]}
+
+
+def _write_shard(path: Path, texts: List[str]) -> Path:
+    path.write_text("".join(json.dumps({"text": t, "label": 0}) + "\n" for t in texts))
+    return path
+
+
+def test_pii_scanner_detects_regex_and_dictionary_entities() -> None:
+    scanner = PIIScanner(dictionaries=DICTIONARIES)
+    text = "Ping test.user@example.com from plant north, card 4111 1111 1111 1111."
+    entities = sorted(f.entity for f in scanner.scan(text))
+    assert entities == ["CREDIT_CARD", "EMAIL_ADDRESS", "SITE_NAME"]
+
+    # Dictionary terms match whole words only.
+    assert scanner.scan("the planted northern field") == []
+    # Luhn check rejects random digit runs.
+    assert scanner.scan("serial 1234 5678 9012 3456") == []
+
+
+def test_pii_scanner_redacts_spans() -> None:
+    scanner = PIIScanner(dictionaries=DICTIONARIES)
+    redacted = scanner.redact("mail a@example.org at depot-7")
+    assert redacted == "mail <EMAIL_ADDRESS> at <SITE_NAME>"
+
+
+def test_pii_prefilter_skips_records_without_candidates(tmp_path: Path) -> None:
+    shard = _write_shard(
+        tmp_path / "s0.jsonl",
+        ["sensor reading nominal", "all good", "call 555-010-0199 now"],
+    )
+    result = PIIScanner().scan_jsonl(shard)
+    assert result["records"] == 3
+    assert result["records_skipped"] == 2
+    assert result["flagged_lines"] == [2]
+    assert result["entity_counts"] == {"PHONE_NUMBER": 1}
+
+
+def test_pii_scan_shards_uses_content_hash_cache(tmp_path: Path) -> None:
+    shards = [
+        _write_shard(tmp_path / f"s{i}.jsonl", ["ok", f"user{i}@example.com"])
+        for i in range(3)
+    ]
+    cache = PIIScanCache(tmp_path / "cache")
+    scanner = PIIScanner(dictionaries=DICTIONARIES)
+
+    first = scan_jsonl_shards(scanner, shards, cache=cache, max_workers=2)
+    assert [r["cached"] for r in first] == [False, False, False]
+    assert all(r["records_with_pii"] == 1 for r in first)
+
+    _write_shard(shards[1], ["changed", "still fine"])
+    second = scan_jsonl_shards(scanner, shards, cache=cache)
+    assert [r["cached"] for r in second] == [True, False, True]
+    assert second[1]["records_with_pii"] == 0
+
+
+def test_pii_scan_cache_is_keyed_on_text_fields(tmp_path: Path) -> None:
+    shard = tmp_path / "notes.jsonl"
+    shard.write_text(json.dumps({"text": "ok", "note": "mail a@example.com"}) + "\n")
+    cache = PIIScanCache(tmp_path / "cache")
+    scanner = PIIScanner()
+
+    (text_only,) = scan_jsonl_shards(scanner, [shard], ("text",), cache=cache)
+    (with_note,) = scan_jsonl_shards(scanner, [shard], ("text", "note"), cache=cache)
+    assert text_only["records_with_pii"] == 0
+    assert with_note["cached"] is False
+    assert with_note["records_with_pii"] == 1
+
+
+def test_pii_benchmark_reports_throughput() -> None:
+    texts = ["routine telemetry line"] * 50 + ["reach me at x@example.net"] * 5
+    result = benchmark_pii_scan(texts, DICTIONARIES)
+    assert result["records"] == 55
+    assert result["scanner_records_per_s"] > 0
+    assert result["naive_records_per_s"] > 0
+
+
+def test_build_pii_scanner_rejects_unknown_entity() -> None:
+    with pytest.raises(ValueError):
+        build_pii_scanner({"governance": {"pii": {"entities": ["FOO"]}}})
+    config = {"governance": {"pii": {"entities": ["EMAIL_ADDRESS"]}}}
+    scanner = build_pii_scanner(config)
+    assert scanner.scan("555-010-0199") == []
@@ -0,0 +1,116 @@
+"""Tests for the in-process fleet simulator (small fleets, no sleeping)."""
+from __future__ import annotations
+
+import queue
+
+import torch
+
+from fednestd.federation.messages import decode_delta, encode_delta
+from fednestd.federation.simulator import (
+    FleetSimulator,
+    SimulationConfig,
+    WeightedMeanAggregator,
+    build_simulation_config,
+    plan_client,
+)
+
+
+def _cfg(**overrides: object) -> SimulationConfig:
+    cfg = SimulationConfig(
+        num_clients=300,
+        rounds=2,
+        processes=2,
+        participation=0.5,
+        dropout=0.1,
+        staleness_prob=0.2,
+        delta_numel=256,
+        seed=7,
+    )
+    for key, value in overrides.items():
+        setattr(cfg, key, value)
+    return cfg
+
+
+def _outcomes(cfg: SimulationConfig) -> list:
+    report = FleetSimulator(cfg).run()
+    return [
+        (r.selected, r.accepted, r.dropped, r.late, r.stale_rejected, r.simulated_s)
+        for r in report.rounds
+    ]
+
+
+def test_fleet_simulation_is_reproducible_from_seed() -> None:
+    first = _outcomes(_cfg())
+    assert first == _outcomes(_cfg(processes=3))
+    assert first != _outcomes(_cfg(seed=8))
+
+    selected, accepted, dropped, late, stale, _ = first[0]
+    assert selected == 150
+    assert accepted + dropped + late + stale == selected
+    assert dropped > 0 and stale > 0
+
+
+def test_fleet_simulation_reports_server_metrics() -> None:
+    report = FleetSimulator(_cfg(rounds=1, round_timeout_s=1.5)).run()
+    (r,) = report.rounds
+    assert r.late > 0  # slow clients miss the timeout
+    assert r.bytes_received > r.accepted * 1024
+    assert report.throughput_updates_per_s > 0
+    assert report.server_peak_rss_mb > 0
+    assert set(report.to_dict()) >= {"rounds", "server_cpu_s", "throughput_mb_per_s"}
+
+
+class _ScriptedWorker:
+    """Control queue that answers each round itself, after some stale items."""
+
+    def __init__(self, updates: queue.Queue, numel: int) -> None:
+        self.updates = updates
+        self.delta = {"experts.0.lora_A": torch.ones(numel)}
+
+    def _delta(self, round_idx: int, version: int) -> bytearray:
+        return encode_delta(
+            self.delta,
+            "c1",
+            f"r{round_idx:06d}",
+            f"v{version:06d}",
+            10,
+            meta={"sim_arrival_s": 1.0},
+        )
+
+    def put(self, msg: tuple) -> None:
+        round_idx, version = msg
+        # Late arrivals from the previous round that no drain could have seen.
+        self.updates.put(self._delta(round_idx - 1, version))
+        self.updates.put(("done", 0, round_idx - 1, {"sent": 5, "dropped": 0}))
+        self.updates.put(self._delta(round_idx, version))
+        self.updates.put(("done", 0, round_idx, {"sent": 1, "late": 0}))
+
+
+def test_round_ignores_updates_from_earlier_rounds() -> None:
+    cfg = _cfg(processes=1, delta_numel=16)
+    sim = FleetSimulator(cfg)
+    updates: queue.Queue = queue.Queue()
+    worker = _ScriptedWorker(updates, cfg.delta_numel)
+    updates.put(("done", 0, 0, {"sent": 3}))  # still queued from round 0
+
+    stats, update = sim._run_round(1, [worker], updates)
+    assert (stats.selected, stats.accepted, stats.stale_rejected) == (1, 1, 0)
+    assert stats.bytes_received == len(worker._delta(1, 0))
+    assert torch.equal(update["experts.0.lora_A"], torch.ones(16))
+    assert updates.empty()
+
+
+def test_weighted_mean_aggregator_matches_fedavg() -> None:
+    agg = WeightedMeanAggregator()
+    deltas = [(torch.full((3,), 1.0), 10), (torch.full((3,), 4.0), 30)]
+    for t, n in deltas:
+        header, views = decode_delta(encode_delta({"lora_A": t}, "c", "r", "v1", n))
+        agg.add(header, views)
+    assert torch.allclose(agg.finalize()["lora_A"], torch.full((3,), 3.25))
+
+
+def test_client_plans_and_config() -> None:
+    cfg = build_simulation_config({"simulation": {"num_clients": 10, "seed": 3}})
+    assert cfg.num_clients == 10
+    assert plan_client(cfg, 0, 4) == plan_client(cfg, 0, 4)
+    assert plan_client(cfg, 0, 4) != plan_client(cfg, 1, 4)
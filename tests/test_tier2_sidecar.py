@@ -0,0 +1,274 @@
+"""Tests for the local outbound sidecar (validation, in-place DP, audit)."""
+from __future__ import annotations
+
+import io
+import json
+import struct
+from pathlib import Path
+
+import pytest
+import torch
+
+from fednestd.federation.messages import (
+    MAGIC,
+    WIRE_VERSION,
+    decode_delta,
+    decode_header,
+    encode_delta,
+    frame_data,
+    header_padding,
+)
+from fednestd.governance.local_sidecar import (
+    AuditLog,
+    DPConfig,
+    LocalSidecar,
+    PayloadRejected,
+    PrivacyAccountant,
+    SidecarPolicy,
+    build_sidecar,
+)
+
+
+def _adapter_delta() -> dict:
+    torch.manual_seed(0)
+    return {
+        "experts.0.lora_A": torch.randn(8, 4),
+        "experts.0.lora_B": torch.randn(4, 8),
+    }
+
+
+def _sidecar(tmp_path: Path, dp: DPConfig | None = None) -> LocalSidecar:
+    return LocalSidecar(
+        SidecarPolicy(device_id="edge-1"),
+        AuditLog(tmp_path / "audit.jsonl"),
+        dp=dp,
+    )
+
+
+def _audit(tmp_path: Path) -> list:
+    lines = (tmp_path / "audit.jsonl").read_text().splitlines()
+    return [json.loads(line) for line in lines]
+
+
+def test_sidecar_rejects_core_tensors_and_unknown_fields(tmp_path: Path) -> None:
+    sidecar = _sidecar(tmp_path)
+    core = encode_delta({"encoder.weight": torch.ones(4)}, "edge-1", "r1", "v1", 10)
+    with pytest.raises(PayloadRejected, match="may not leave"):
+        sidecar.process(core)
+
+    leaky = encode_delta(
+        _adapter_delta(), "edge-1", "r1", "v1", 10, meta={"sample_text": 1}
+    )
+    with pytest.raises(PayloadRejected, match="meta"):
+        sidecar.process(leaky)
+
+    spoofed = encode_delta(_adapter_delta(), "edge-2", "r1", "v1", 10)
+    with pytest.raises(PayloadRejected, match="client_id"):
+        sidecar.process(spoofed)
+
+    records = _audit(tmp_path)
+    assert [r["decision"] for r in records] == ["reject"] * 3
+
+
+def test_sidecar_applies_dp_in_place_and_audits(tmp_path: Path) -> None:
+    dp = DPConfig(enabled=True, clip_norm=1.0, noise_multiplier=0.0001, seed=0)
+    sidecar = _sidecar(tmp_path, dp)
+    buf = encode_delta(_adapter_delta(), "edge-1", "r1", "v1", 10, meta={"loss": 0.5})
+    _, before = decode_delta(buf)
+    ptr = before["experts.0.lora_A"].data_ptr()
+
+    result = sidecar.process(buf, round_time_s=10.0)
+
+    _, after = decode_delta(buf)
+    assert after["experts.0.lora_A"].data_ptr() == ptr
+    total = torch.linalg.vector_norm(
+        torch.stack([torch.linalg.vector_norm(t) for t in after.values()])
+    )
+    assert result.clipped
+    assert total.item() == pytest.approx(1.0, abs=0.01)
+    assert result.overhead_fraction is not None and result.overhead_fraction < 0.1
+
+    (record,) = _audit(tmp_path)
+    assert record["decision"] == "allow"
+    assert record["sha256"] == result.sha256
+    assert record["bytes"] == len(buf)
+    assert record["dp"]["epsilon"] == result.epsilon
+
+
+def test_sidecar_stream_matches_message_layout(tmp_path: Path) -> None:
+    sidecar = _sidecar(tmp_path)
+    buf = encode_delta(_adapter_delta(), "edge-1", "r1", "v1", 10)
+    dst = io.BytesIO()
+    streamed = sidecar.process_stream(io.BytesIO(bytes(buf)), dst)
+    in_place = sidecar.process(bytearray(buf))
+
+    # Without DP both paths publish the message unchanged.
+    assert dst.getvalue() == bytes(buf)
+    assert streamed.sha256 == in_place.sha256
+    report = sidecar.overhead_report()
+    assert report["messages"] == 2
+
+
+def test_privacy_accountant_grows_and_persists(tmp_path: Path) -> None:
+    path = tmp_path / "acct.json"
+    acct = PrivacyAccountant(delta=1e-5, path=path)
+    eps = [acct.record(1.1) for _ in range(5)]
+    assert eps == sorted(eps) and eps[0] > 0
+
+    restored = PrivacyAccountant(delta=1e-5, path=path)
+    assert restored.releases == 5
+    assert restored.epsilon() == pytest.approx(eps[-1])
+
+
+def test_sidecar_enforces_privacy_budget(tmp_path: Path) -> None:
+    sidecar = build_sidecar(
+        {
+            "governance": {
+                "sidecar": {
+                    "audit_log": str(tmp_path / "audit.jsonl"),
+                    "dp": {
+                        "enabled": True,
+                        "noise_multiplier": 1.0,
+                        "max_epsilon": 6.0,
+                    },
+                }
+            }
+        }
+    )
+    with pytest.raises(PayloadRejected, match="budget"):
+        for _ in range(50):
+            sidecar.process(encode_delta(_adapter_delta(), "edge-1", "r", "v1", 1))
+    assert sidecar.accountant is not None
+    assert sidecar.accountant.epsilon() <= 6.0
+
+
+def test_sidecar_stream_dp_noise_matches_in_place(tmp_path: Path) -> None:
+    zeros = {f"experts.{i}.lora_A": torch.zeros(64, 64) for i in range(16)}
+    dp = DPConfig(enabled=True, clip_norm=1.0, noise_multiplier=1.0, seed=0)
+    sidecar = _sidecar(tmp_path, dp)
+
+    buf = encode_delta(zeros, "edge-1", "r1", "v1", 10)
+    dst = io.BytesIO()
+    streamed = sidecar.process_stream(io.BytesIO(bytes(buf)), dst)
+    sidecar.process(buf)
+
+    # Same sensitivity, same noise std, same epsilon charge on both paths.
+    _, noisy_stream = decode_delta(bytearray(dst.getvalue()))
+    _, noisy_in_place = decode_delta(buf)
+    for noisy in (noisy_stream, noisy_in_place):
+        std = torch.cat([t.flatten() for t in noisy.values()]).std().item()
+        assert std == pytest.approx(1.0, rel=0.05)
+    assert sidecar.accountant is not None
+    assert sidecar.accountant.releases == 2
+    assert streamed.epsilon == pytest.approx(PrivacyAccountant(1e-5).record(1.0))
+
+
+def test_sidecar_stream_rejects_malformed_and_truncated(tmp_path: Path) -> None:
+    sidecar = _sidecar(tmp_path)
+    buf = encode_delta(_adapter_delta(), "edge-1", "r1", "v1", 10)
+
+    dst = io.BytesIO()
+    with pytest.raises(PayloadRejected, match="past the end"):
+        sidecar.process_stream(io.BytesIO(bytes(buf[:-16])), dst)
+    assert dst.getvalue() == b""
+
+    class _Unseekable(io.BytesIO):
+        def seekable(self) -> bool:
+            return False
+
+    dst = io.BytesIO()
+    with pytest.raises(PayloadRejected, match="stream ended"):
+        sidecar.process_stream(_Unseekable(bytes(buf[:-16])), dst)
+    assert dst.getvalue() == b""
+
+    header, data_start = decode_header(buf)
+    envelope = {k: v for k, v in header.items() if k != "tensors"}
+    layout = [{"name": "experts.0.lora_A"}, *header["tensors"][1:]]
+    malformed = frame_data(envelope, layout, buf[data_start:])
+    with pytest.raises(PayloadRejected, match="malformed"):
+        sidecar.process_stream(io.BytesIO(bytes(malformed)), io.BytesIO())
+
+    assert [r["decision"] for r in _audit(tmp_path)] == ["reject"] * 3
+
+
+def test_sidecar_rejects_bytes_outside_declared_tensors(tmp_path: Path) -> None:
+    sidecar = _sidecar(tmp_path)
+    # 12-byte tensors leave a gap before the next 64-byte boundary.
+    delta = {"experts.0.lora_A": torch.ones(3), "experts.0.lora_B": torch.ones(3)}
+    clean = encode_delta(delta, "edge-1", "r1", "v1", 10)
+    _, data_start = decode_header(clean)
+    assert len(header_padding(clean)) > 0
+
+    def tampered(pos: int) -> bytearray:
+        buf = bytearray(clean)
+        buf[pos] = 1
+        return buf
+
+    cases = [
+        (clean + b"\0" * 64, "after the last tensor"),
+        (clean + b"x", "after the last tensor"),
+        (tampered(len(clean) - 1), "after the last tensor"),
+        (tampered(data_start + 12), "between tensors"),
+        (tampered(data_start - 1), "header padding"),
+    ]
+    for buf, reason in cases:
+        with pytest.raises(PayloadRejected, match=reason):
+            sidecar.process(bytearray(buf))
+
+    dst = io.BytesIO()
+    with pytest.raises(PayloadRejected, match="before tensor"):
+        sidecar.process_stream(io.BytesIO(bytes(tampered(data_start + 12))), dst)
+    assert dst.getvalue() == b""
+    with pytest.raises(PayloadRejected, match="after the last tensor"):
+        sidecar.process_stream(io.BytesIO(bytes(clean + b"x")), io.BytesIO())
+
+    assert [r["decision"] for r in _audit(tmp_path)] == ["reject"] * 7
+    dst = io.BytesIO()
+    sidecar.process_stream(io.BytesIO(bytes(clean)), dst)
+    assert dst.getvalue() == clean
+
+
+def _raw_frame(header: object) -> bytearray:
+    head = json.dumps(header).encode()
+    prefix = struct.pack("<4sHI", MAGIC, WIRE_VERSION, len(head)) + head
+    return bytearray(prefix + b"\0" * (-len(prefix) % 64 + 256))
+
+
+def test_sidecar_audits_mistyped_headers(tmp_path: Path) -> None:
+    sidecar = _sidecar(tmp_path)
+    header, _ = decode_header(encode_delta(_adapter_delta(), "edge-1", "r1", "v1", 10))
+    first = header["tensors"][0]
+    bad_tensors = [
+        5,
+        {**first, "offset": "0"},
+        {**first, "offset": 0.5},
+        {**first, "offset": 2},
+        {**first, "offset": True},
+        {**first, "name": 3},
+        {**first, "shape": 32},
+    ]
+    frames = [_raw_frame({**header, "tensors": [t]}) for t in bad_tensors]
+    frames += [_raw_frame([header]), _raw_frame({**header, "tensors": {"a": 1}})]
+    for frame in frames:
+        with pytest.raises(PayloadRejected):
+            sidecar.process(frame)
+
+    records = _audit(tmp_path)
+    assert [r["decision"] for r in records] == ["reject"] * len(frames)
+    assert records[-2]["client_id"] is None
+
+
+def test_dp_config_rejects_zero_noise(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="noise_multiplier"):
+        DPConfig(enabled=True, noise_multiplier=0.0)
+    with pytest.raises(ValueError, match="noise_multiplier"):
+        build_sidecar(
+            {
+                "governance": {
+                    "sidecar": {
+                        "audit_log": str(tmp_path / "audit.jsonl"),
+                        "dp": {"enabled": True, "noise_multiplier": 0},
+                    }
+                }
+            }
+        )
@@ -0,0 +1,85 @@
+"""Tests for flat parameter buffers."""
+from __future__ import annotations
+
+import pytest
+import torch
+
+from fednestd.federation.messages import decode_delta, decode_header
+from fednestd.utils.torch_utils import FlatParams, benchmark_flat_ops, select_params
+
+
+class _TinyExperts(torch.nn.Module):
+    def __init__(self) -> None:
+        super().__init__()
+        self.encoder = torch.nn.Linear(4, 4)
+        self.experts = torch.nn.ModuleList(torch.nn.Linear(4, 3) for _ in range(2))
+        for expert in self.experts:
+            expert.lora_A = torch.nn.Parameter(torch.zeros(2, 4))
+
+
+def test_flat_params_ops_match_per_tensor_math() -> None:
+    model = _TinyExperts()
+    adapters = select_params(model.named_parameters(), groups=("adapters",))
+    assert sorted(adapters) == ["experts.0.lora_A", "experts.1.lora_A"]
+    assert sorted(select_params(model.named_parameters(), prefix="experts.1.")) == [
+        "experts.1.bias",
+        "experts.1.lora_A",
+        "experts.1.weight",
+    ]
+
+    old = FlatParams.from_tensors(adapters).bind_(model)
+    new = old.clone()
+    new.views["experts.0.lora_A"].fill_(3.0)
+    new.views["experts.1.lora_A"].fill_(4.0)
+
+    delta = new.delta(old)
+    assert delta.norm() == pytest.approx((8 * 9 + 8 * 16) ** 0.5)
+    assert delta.clip_(1.0) > 1.0
+    assert delta.norm() == pytest.approx(1.0, rel=1e-5)
+
+    # Applying to the bound buffer updates the live module parameters.
+    old.apply_(delta, lr=2.0)
+    expected = 2.0 * 3.0 / (8 * 9 + 8 * 16) ** 0.5
+    assert torch.allclose(model.experts[0].lora_A, torch.full((2, 4), expected))
+
+
+def test_flat_params_round_trip_through_wire_format() -> None:
+    named = {"experts.0.lora_A": torch.randn(3, 5), "experts.0.lora_B": torch.randn(7)}
+    flat = FlatParams.from_tensors(named)
+    msg = flat.to_message("edge-1", "r1", "v1", num_examples=5)
+
+    header, views = decode_delta(msg)
+    assert header["tensors"] == flat.layout
+    for name, t in named.items():
+        assert torch.equal(views[name], t)
+
+    received = FlatParams.from_message(msg)
+    received.scale_(2.0)  # zero-copy: edits land in the message buffer
+    _, after = decode_delta(msg)
+    assert torch.equal(after["experts.0.lora_B"], named["experts.0.lora_B"] * 2)
+
+    with pytest.raises(ValueError):
+        flat.add_(FlatParams.from_tensors({"other": torch.zeros(3)}))
+    with pytest.raises(ValueError):
+        FlatParams.from_tensors(
+            {"a": torch.zeros(2), "b": torch.zeros(2, dtype=torch.float64)}
+        )
+
+
+def test_flat_ops_benchmark_reports_both_paths() -> None:
+    # Timings are reported, not asserted: speedups vary with machine load.
+    result = benchmark_flat_ops(num_experts=32, tensors_per_expert=4, repeats=5)
+    assert result["tensors"] == 128
+    assert result["loop_ms"] > 0 and result["flat_ms"] > 0
+
+
+def test_flat_params_from_message_ignores_sender_padding() -> None:
+    named = {"experts.0.lora_A": torch.ones(3), "experts.0.lora_B": torch.ones(5)}
+    msg = FlatParams.from_tensors(named).to_message("edge-1", "r1", "v1", 1)
+    header, data_start = decode_header(msg)
+    for e in header["tensors"]:
+        end = data_start + e["offset"] + e["nbytes"]
+        msg[end : end + 4] = b"\xff\xff\x7f\x7f"  # garbage in the padding
+
+    received = FlatParams.from_message(msg)
+    assert received.norm() == pytest.approx(8**0.5)
@@ -0,0 +1,163 @@
+"""Tests for the local workflow executor (no Flyte needed)."""
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+import torch
+
+from fednestd.model.registry import build_registry
+from fednestd.orchestration.flyte_integration import run_stage_json
+from fednestd.orchestration.workflows import (
+    LocalExecutor,
+    Stage,
+    StageCache,
+    Workflow,
+    federation_cycle,
+    rollout_stage,
+)
+
+
+def _sleepy(
+    config: Dict[str, Any], upstream: Dict[str, Any], input_version: str
+) -> Dict[str, Any]:
+    start = time.time()
+    time.sleep(config.get("sleep_s", 0.0))
+    return {"pid": os.getpid(), "start": start, "end": time.time()}
+
+
+def _join(
+    config: Dict[str, Any], upstream: Dict[str, Any], input_version: str
+) -> Dict[str, Any]:
+    return {
+        "inputs": sorted(upstream),
+        "lr": config.get("train", {}).get("lr"),
+        "version": input_version,
+    }
+
+
+def _improving_eval(version: str, shard_id: str) -> Dict[str, Any]:
+    """Each committed version is a little better than the one before."""
+    gen = torch.Generator().manual_seed(int(shard_id))
+    losses = torch.rand(100, generator=gen) + 1.0 - 0.05 * int(version[1:])
+    return {"losses": losses, "metrics": {}}
+
+
+def _workflow() -> Workflow:
+    return Workflow(
+        "test",
+        [
+            Stage("a", _sleepy),
+            Stage("b", _sleepy),
+            Stage("join", _join, deps=("a", "b"), config_keys=("train",)),
+        ],
+    )
+
+
+def test_workflow_rejects_cycles_and_unknown_deps() -> None:
+    with pytest.raises(ValueError, match="cycle"):
+        Workflow("w", [Stage("x", _join, deps=("y",)), Stage("y", _join, deps=("x",))])
+    with pytest.raises(ValueError, match="unknown"):
+        Workflow("w", [Stage("x", _join, deps=("missing",))])
+    assert federation_cycle().order[-2:] == ["evaluate", "rollout"]
+
+
+def test_local_executor_runs_independent_stages_in_parallel() -> None:
+    executor = LocalExecutor(max_workers=2)
+    report = executor.run(_workflow(), {"sleep_s": 0.5}, "v1")
+
+    a, b = report.outputs["a"], report.outputs["b"]
+    assert report.outputs["join"]["inputs"] == ["a", "b"]
+    assert a["pid"] != b["pid"]
+    assert a["start"] < b["end"] and b["start"] < a["end"]  # ran concurrently
+    assert [s.stage for s in report.stages][-1] == "join"
+
+
+def test_local_executor_skips_unchanged_stages(tmp_path: Path) -> None:
+    timings = tmp_path / "cycles.jsonl"
+    executor = LocalExecutor(cache=StageCache(tmp_path / "cache"), timings_log=timings)
+    config = {"train": {"lr": 0.1}}
+
+    first = executor.run(_workflow(), config, "v1")
+    assert first.cache_hits == 0
+
+    second = executor.run(_workflow(), config, "v1")
+    assert second.cache_hits == 3
+    assert second.outputs == first.outputs
+
+    # `a` and `b` hash the whole config, so every stage reruns.
+    config["train"]["lr"] = 0.2
+    third = executor.run(_workflow(), config, "v1")
+    assert {s.stage: s.cached for s in third.stages} == {
+        "a": False,
+        "b": False,
+        "join": False,
+    }
+    fourth = executor.run(_workflow(), {"train": {"lr": 0.2}}, "v2")
+    assert fourth.cache_hits == 0
+
+    records = [json.loads(line) for line in timings.read_text().splitlines()]
+    assert len(records) == 4
+    assert {s["stage"] for s in records[0]["stages"]} == {"a", "b", "join"}
+
+
+def test_federation_cycle_skips_gate_without_eval_fn() -> None:
+    report = LocalExecutor().run(federation_cycle(), {}, "v1")
+    assert report.outputs["evaluate"] == {"decision": "skipped"}
+    assert report.outputs["rollout"]["rolled_out"] is False
+
+
+def test_stages_see_input_version_and_same_config_on_flyte_path() -> None:
+    config = {"train": {"lr": 0.1}, "other": 1}
+    report = LocalExecutor().run(_workflow(), config, "v000042")
+    assert report.outputs["join"]["version"] == "v000042"
+
+    ref = f"{_join.__module__}:{_join.__qualname__}"
+    upstream = [json.dumps({"stage": "a", "output": {}})]
+    for keys, lr in ((["train"], 0.1), ([], None), (None, 0.1)):
+        raw = run_stage_json("join", ref, keys, json.dumps(config), "v7", upstream)
+        output = json.loads(raw)["output"]
+        assert output == {"inputs": ["a"], "lr": lr, "version": "v7"}
+
+
+def test_rollout_points_ref_at_input_version(tmp_path: Path) -> None:
+    config = {"registry": {"backend": "local", "root": str(tmp_path)}}
+    registry = build_registry(config)
+    old = registry.commit({"w": torch.zeros(2)}, version="v000041")
+    new = registry.commit({"w": torch.ones(2)}, version="v000042")
+    registry.set_ref("production", old)
+
+    upstream = {"evaluate": {"decision": "accept", "candidate": new}}
+    assert rollout_stage(config, upstream, new)["version"] == new
+    assert registry.resolve("production") == new
+
+
+def test_evaluation_baseline_follows_rollouts(tmp_path: Path) -> None:
+    config = {
+        "registry": {"backend": "local", "root": str(tmp_path / "registry")},
+        "evaluation": {
+            "eval_fn": f"{__name__}:_improving_eval",
+            "shards": ["0", "1", "2"],
+            "cache_dir": str(tmp_path / "eval_cache"),
+        },
+    }
+    registry = build_registry(config)
+    for i in (1, 2, 3):
+        registry.commit({"w": torch.full((2,), float(i))}, version=f"v00000{i}")
+    registry.set_ref("production", "v000001")
+    executor = LocalExecutor()
+
+    first = executor.run(federation_cycle(), config, "v000002")
+    assert first.outputs["evaluate"]["baseline"] == "v000001"
+    assert registry.resolve("production") == "v000002"
+
+    # The cached "production" outputs must not be reused for the new baseline.
+    second = executor.run(federation_cycle(), config, "v000003")
+    assert second.outputs["evaluate"]["baseline"] == "v000002"
+    assert second.outputs["rollout"]["version"] == "v000003"
+    cached = {p.name for p in (tmp_path / "eval_cache" / "default").iterdir()}
+    assert cached == {"v000001", "v000002"}